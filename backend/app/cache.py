@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+MAX_TRACKED_INVALIDATIONS = 4096
+
+
+class TTLCache:
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: Optional[int] = None,
+        now_fn: Optional[Callable[[], float]] = None,
+    ) -> None:
+        self._ttl_seconds = float(ttl_seconds)
+        self._max_entries = max_entries
+        self._now_fn = now_fn or time.monotonic
+        self._data: "OrderedDict[Hashable, Tuple[object, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._generation = 0
+        self._cleared_at = 0
+        # Generation at which each recently invalidated key was dropped; keys
+        # that fell off the end count as invalidated at _evicted_at.
+        self._invalidated_at: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._evicted_at = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl_seconds > 0
+
+    def _now(self) -> float:
+        return float(self._now_fn())
+
+    def get(self, key: Hashable, default: object = None) -> object:
+        with self._lock:
+            return self._get_locked(key, default)
+
+    def _get_locked(self, key: Hashable, default: object) -> object:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if self._now() >= expires_at:
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: object) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._set_locked(key, value)
+
+    def _set_locked(self, key: Hashable, value: object) -> None:
+        self._data[key] = (value, self._now() + self._ttl_seconds)
+        self._data.move_to_end(key)
+        if self._max_entries is not None:
+            while len(self._data) > self._max_entries:
+                self._data.popitem(last=False)
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def set_if_unchanged(self, key: Hashable, value: object, generation: int) -> bool:
+        # For callers that load outside get_or_load: read generation() before
+        # loading, and the store is skipped if the key was invalidated since.
+        if not self.enabled:
+            return False
+        with self._lock:
+            if self._invalidated_since_locked(key, generation):
+                return False
+            self._set_locked(key, value)
+            return True
+
+    def _invalidated_since_locked(self, key: Hashable, generation: int) -> bool:
+        if self._cleared_at > generation:
+            return True
+        return self._invalidated_at.get(key, self._evicted_at) > generation
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], object]) -> object:
+        if not self.enabled:
+            return loader()
+        missing = object()
+        with self._lock:
+            value = self._get_locked(key, missing)
+            if value is not missing:
+                return value
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                value = self._get_locked(key, missing)
+                if value is not missing:
+                    return value
+                generation = self._generation
+            try:
+                value = loader()
+                with self._lock:
+                    # Skip the store if an invalidation raced the load.
+                    if not self._invalidated_since_locked(key, generation):
+                        self._set_locked(key, value)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+            return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._cleared_at = self._generation
+                self._data.clear()
+                self._invalidated_at.clear()
+                return
+            self._data.pop(key, None)
+            self._invalidated_at[key] = self._generation
+            self._invalidated_at.move_to_end(key)
+            while len(self._invalidated_at) > MAX_TRACKED_INVALIDATIONS:
+                _, self._evicted_at = self._invalidated_at.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
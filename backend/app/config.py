@@ -46,6 +46,8 @@ SHADOW_LEAK_WINDOW_SECONDS = _get_int("SHADOW_LEAK_WINDOW_SECONDS", 7 * 24 * 360
 SECURITY_EVENT_HMAC_KEY = os.getenv("SECURITY_EVENT_HMAC_KEY", "dev_security_event_key")
 SECURITY_EVENTS_RETENTION_DAYS = _get_int("SECURITY_EVENTS_RETENTION_DAYS", 30)
 DAILY_ACK_RETENTION_DAYS = _get_int("DAILY_ACK_RETENTION_DAYS", 180)
+DAILY_ACK_AGGREGATE_SHARDS = _get_int("DAILY_ACK_AGGREGATE_SHARDS", 8)
+EVENT_PARTITION_DAYS_AHEAD = _get_int("EVENT_PARTITION_DAYS_AHEAD", 7)
 MATCH_TUNING_LOW_INTENSITY_BAND = _get_int("MATCH_TUNING_LOW_INTENSITY_BAND", 0)
 MATCH_TUNING_HIGH_INTENSITY_BAND = _get_int("MATCH_TUNING_HIGH_INTENSITY_BAND", 2)
 MATCH_TUNING_POOL_MULTIPLIER_LOW = float(os.getenv("MATCH_TUNING_POOL_MULTIPLIER_LOW", "-0.5"))
@@ -61,18 +63,34 @@ AFFINITY_SCORE_MAX = _get_float("AFFINITY_SCORE_MAX", 50.0)
 AFFINITY_DECAY_PER_DAY = _get_float("AFFINITY_DECAY_PER_DAY", 0.98)
 AFFINITY_SCALE = _get_float("AFFINITY_SCALE", 0.02)
 AFFINITY_MAX_BIAS = _get_float("AFFINITY_MAX_BIAS", 0.10)
+AFFINITY_MAP_CACHE_TTL_SECONDS = _get_int("AFFINITY_MAP_CACHE_TTL_SECONDS", 60)
+AFFINITY_MAP_CACHE_MAX_ENTRIES = _get_int("AFFINITY_MAP_CACHE_MAX_ENTRIES", 10000)
 
 MATCH_MIN_POOL_K = _get_int("MATCH_MIN_POOL_K", 3)
 MATCH_COOLDOWN_SECONDS = _get_int("MATCH_COOLDOWN_SECONDS", 3600)
 MATCH_SAMPLE_LIMIT = _get_int("MATCH_SAMPLE_LIMIT", 50)
 ELIGIBLE_RECENCY_HOURS = _get_int("ELIGIBLE_RECENCY_HOURS", 72)
+CANDIDATE_POOL_CACHE_TTL_SECONDS = _get_int("CANDIDATE_POOL_CACHE_TTL_SECONDS", 30)
+CANDIDATE_POOL_CACHE_MAX_ENTRIES = _get_int("CANDIDATE_POOL_CACHE_MAX_ENTRIES", 256)
+CANDIDATE_POOL_MAX_ROWS = _get_int("CANDIDATE_POOL_MAX_ROWS", 2000)
+ELIGIBLE_POOL_BACKEND = os.getenv("ELIGIBLE_POOL_BACKEND", "postgres").strip().lower()
+ELIGIBLE_POOL_WARM_CHECK_SECONDS = _get_int("ELIGIBLE_POOL_WARM_CHECK_SECONDS", 60)
+ELIGIBLE_WRITE_FLUSH_SECONDS = _get_float("ELIGIBLE_WRITE_FLUSH_SECONDS", 0.0)
+ELIGIBLE_WRITE_MAX_PENDING = _get_int("ELIGIBLE_WRITE_MAX_PENDING", 500)
+MATCHING_TUNING_CACHE_TTL_SECONDS = _get_int("MATCHING_TUNING_CACHE_TTL_SECONDS", 60)
+PRINCIPAL_STATE_CACHE_TTL_SECONDS = _get_int("PRINCIPAL_STATE_CACHE_TTL_SECONDS", 600)
+PRINCIPAL_STATE_CACHE_MAX_ENTRIES = _get_int("PRINCIPAL_STATE_CACHE_MAX_ENTRIES", 10000)
 MIN_ANON_DENSITY_K = _get_int(
     "MIN_ANON_DENSITY_K",
     _get_int("COLD_START_MIN_POOL", 25),
 )
 COLD_START_MIN_POOL = MIN_ANON_DENSITY_K
 K_ANON_MIN = _get_int("K_ANON_MIN", 25)
+HELPED_COUNTS_BACKFILL_CHECK_SECONDS = _get_int("HELPED_COUNTS_BACKFILL_CHECK_SECONDS", 300)
 SIMILAR_WINDOW_DAYS = _get_int("SIMILAR_WINDOW_DAYS", 7)
+SIMILAR_COUNT_GRID_MAX_AGE_SECONDS = _get_int("SIMILAR_COUNT_GRID_MAX_AGE_SECONDS", 900)
+SIMILAR_COUNT_GRID_REFRESH_SECONDS = _get_int("SIMILAR_COUNT_GRID_REFRESH_SECONDS", 0)
+MOOD_PRINCIPAL_SKETCH_INTERVAL_SECONDS = _get_int("MOOD_PRINCIPAL_SKETCH_INTERVAL_SECONDS", 0)
 CRISIS_WINDOW_HOURS = _get_int("CRISIS_WINDOW_HOURS", 24)
 
 GHOST_SIGNAL_POLL_INTERVAL_SECONDS = _get_int("GHOST_SIGNAL_POLL_INTERVAL_SECONDS", 60)
@@ -84,6 +102,16 @@ SECOND_TOUCH_MIN_AFFINITY = _get_int("SECOND_TOUCH_MIN_AFFINITY", 4)
 SECOND_TOUCH_MIN_SPAN_DAYS = _get_int("SECOND_TOUCH_MIN_SPAN_DAYS", 7)
 SECOND_TOUCH_COOLDOWN_DAYS = _get_int("SECOND_TOUCH_COOLDOWN_DAYS", 7)
 SECOND_TOUCH_MONTHLY_CAP = _get_int("SECOND_TOUCH_MONTHLY_CAP", 2)
+SECOND_TOUCH_RECHECK_MINUTES = _get_int("SECOND_TOUCH_RECHECK_MINUTES", 60)
+SECOND_TOUCH_OFFER_INTERVAL_SECONDS = _get_int("SECOND_TOUCH_OFFER_INTERVAL_SECONDS", 300)
+SECOND_TOUCH_OFFER_BATCH_SIZE = _get_int("SECOND_TOUCH_OFFER_BATCH_SIZE", 500)
 SECOND_TOUCH_DISABLE_DAYS = _get_int("SECOND_TOUCH_DISABLE_DAYS", 90)
 SECOND_TOUCH_AGG_RETENTION_DAYS = _get_int("SECOND_TOUCH_AGG_RETENTION_DAYS", 180)
 SECOND_TOUCH_EVENTS_RETENTION_DAYS = _get_int("SECOND_TOUCH_EVENTS_RETENTION_DAYS", 90)
+SECOND_TOUCH_RECOMPUTE_INTERVAL_SECONDS = _get_int("SECOND_TOUCH_RECOMPUTE_INTERVAL_SECONDS", 300)
+SECOND_TOUCH_DIRTY_GRACE_SECONDS = _get_int("SECOND_TOUCH_DIRTY_GRACE_SECONDS", 60)
+SECOND_TOUCH_COUNTER_FLUSH_SECONDS = _get_float("SECOND_TOUCH_COUNTER_FLUSH_SECONDS", 0.0)
+SECOND_TOUCH_COUNTER_MAX_PENDING = _get_int("SECOND_TOUCH_COUNTER_MAX_PENDING", 500)
+SECOND_TOUCH_COUNTER_MAX_BUFFERED_EVENTS = _get_int(
+    "SECOND_TOUCH_COUNTER_MAX_BUFFERED_EVENTS", 10000
+)
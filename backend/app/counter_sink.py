@@ -0,0 +1,227 @@
+from datetime import datetime
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import (
+    SECOND_TOUCH_COUNTER_FLUSH_SECONDS,
+    SECOND_TOUCH_COUNTER_MAX_BUFFERED_EVENTS,
+    SECOND_TOUCH_COUNTER_MAX_PENDING,
+)
+from .logging import configure_logging
+
+logger = configure_logging()
+
+CounterIncrement = Tuple[str, str, int]
+CounterEvent = Tuple[str, str, Optional[str], datetime]
+CounterFlush = Callable[[List[CounterIncrement], List[CounterEvent]], None]
+
+MAX_FLUSH_BACKOFF_SECONDS = 60.0
+
+
+class SecondTouchCounterSink:
+    def __init__(
+        self,
+        flush_fn: CounterFlush,
+        flush_interval_seconds: float,
+        max_pending: int = SECOND_TOUCH_COUNTER_MAX_PENDING,
+        max_buffered_events: int = SECOND_TOUCH_COUNTER_MAX_BUFFERED_EVENTS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._flush_fn = flush_fn
+        self._flush_interval_seconds = min(max(float(flush_interval_seconds), 0.05), 3600.0)
+        self._max_pending = max(int(max_pending), 1)
+        self._max_buffered_events = max(int(max_buffered_events), self._max_pending)
+        self._clock = clock
+        self._deltas: Dict[Tuple[str, str], int] = {}
+        self._events: List[CounterEvent] = []
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._flushes = 0
+        self._increments_flushed = 0
+        self._failures = 0
+        self._consecutive_failures = 0
+        self._retry_at = 0.0
+        self._events_dropped = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+
+    @property
+    def flush_interval_seconds(self) -> float:
+        return self._flush_interval_seconds
+
+    def record(
+        self,
+        increments: Iterable[CounterIncrement],
+        events: Iterable[CounterEvent] = (),
+    ) -> None:
+        with self._lock:
+            self._pending += _add_increments(self._deltas, increments)
+            self._events.extend(events)
+            self._drop_oldest_events()
+            pending = self._pending
+        if pending >= self._max_pending and not self._backing_off():
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def _backing_off(self) -> bool:
+        # After a failed flush, requests stop retrying inline until the backoff
+        # passes; the background thread keeps retrying on its own schedule.
+        with self._lock:
+            return self._clock() < self._retry_at
+
+    def _drop_oldest_events(self) -> None:
+        # Deltas are bounded by distinct (day, counter) keys, but the event log
+        # grows per call; while flushes fail, keep only the newest events.
+        overflow = len(self._events) - self._max_buffered_events
+        if overflow > 0:
+            del self._events[:overflow]
+            self._events_dropped += overflow
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                deltas, events, pending = self._deltas, self._events, self._pending
+                self._deltas, self._events, self._pending = {}, [], 0
+            if not pending:
+                return 0
+            started = self._clock()
+            try:
+                self._flush_fn(_sorted_increments(deltas), events)
+            except Exception:
+                with self._lock:
+                    # Counts are additive, so failed deltas fold back into
+                    # whatever was recorded while the flush was running.
+                    _add_increments(
+                        self._deltas,
+                        ((day, key, amount) for (day, key), amount in deltas.items()),
+                    )
+                    self._events[:0] = events
+                    self._drop_oldest_events()
+                    self._pending += pending
+                    self._failures += 1
+                    self._consecutive_failures += 1
+                    self._retry_at = self._clock() + _failure_backoff_seconds(
+                        self._flush_interval_seconds, self._consecutive_failures
+                    )
+                    pending = self._pending
+                    dropped = self._events_dropped
+                logger.info(
+                    "second_touch_counter_flush",
+                    {
+                        "status": "failed",
+                        "counters": len(deltas),
+                        "pending": pending,
+                        "events_dropped": dropped,
+                    },
+                )
+                return 0
+            latency_ms = (self._clock() - started) * 1000.0
+            with self._lock:
+                self._consecutive_failures = 0
+                self._retry_at = 0.0
+                self._flushes += 1
+                self._increments_flushed += pending
+                self._last_flush_ms = latency_ms
+                self._max_flush_ms = max(self._max_flush_ms, latency_ms)
+            logger.info(
+                "second_touch_counter_flush",
+                {
+                    "status": "ok",
+                    "counters": len(deltas),
+                    "events": len(events),
+                    "latency_ms": round(latency_ms, 2),
+                },
+            )
+            return pending
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "flushes": self._flushes,
+                "increments_flushed": self._increments_flushed,
+                "failures": self._failures,
+                "events_dropped": self._events_dropped,
+                "last_flush_ms": round(self._last_flush_ms, 2),
+                "max_flush_ms": round(self._max_flush_ms, 2),
+            }
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self._flush_interval_seconds + 5)
+        return self.flush()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None or self._stop_event.is_set():
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run,
+                name="second-touch-counter-sink",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self._flush_interval_seconds):
+            if not self._backing_off():
+                self.flush()
+
+
+_sinks: Dict[str, SecondTouchCounterSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def get_second_touch_counter_sink(
+    key: str, flush_fn: CounterFlush
+) -> Optional[SecondTouchCounterSink]:
+    if SECOND_TOUCH_COUNTER_FLUSH_SECONDS <= 0:
+        return None
+    with _sinks_lock:
+        sink = _sinks.get(key)
+        if sink is None:
+            sink = SecondTouchCounterSink(flush_fn, SECOND_TOUCH_COUNTER_FLUSH_SECONDS)
+            _sinks[key] = sink
+        return sink
+
+
+def stop_second_touch_counters() -> int:
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+        _sinks.clear()
+    return sum(sink.stop() for sink in sinks)
+
+
+def merge_counter_increments(increments: Iterable[CounterIncrement]) -> List[CounterIncrement]:
+    deltas: Dict[Tuple[str, str], int] = {}
+    _add_increments(deltas, increments)
+    return _sorted_increments(deltas)
+
+
+def _failure_backoff_seconds(flush_interval_seconds: float, failures: int) -> float:
+    return min(flush_interval_seconds * (2 ** min(failures, 16)), MAX_FLUSH_BACKOFF_SECONDS)
+
+
+def _add_increments(
+    deltas: Dict[Tuple[str, str], int], increments: Iterable[CounterIncrement]
+) -> int:
+    added = 0
+    for day_key, counter_key, amount in increments:
+        key = (day_key, counter_key)
+        deltas[key] = deltas.get(key, 0) + amount
+        added += 1
+    return added
+
+
+def _sorted_increments(deltas: Dict[Tuple[str, str], int]) -> List[CounterIncrement]:
+    # A stable key order keeps concurrent flushes from deadlocking on row locks.
+    return [(day, key, amount) for (day, key), amount in sorted(deltas.items())]
@@ -0,0 +1,569 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import redis
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    redis = None
+
+from .config import (
+    CRISIS_WINDOW_HOURS,
+    ELIGIBLE_POOL_BACKEND,
+    ELIGIBLE_RECENCY_HOURS,
+    ELIGIBLE_WRITE_FLUSH_SECONDS,
+    ELIGIBLE_WRITE_MAX_PENDING,
+    REDIS_URL,
+)
+from .logging import configure_logging
+from .matching import Candidate
+
+logger = configure_logging()
+
+MAX_FLUSH_BACKOFF_SECONDS = 60.0
+
+
+class RedisEligiblePool:
+    def __init__(self, client) -> None:
+        self._client = client
+
+    def upsert(
+        self,
+        principal_id: str,
+        intensity_bucket: str,
+        theme_tags: List[str],
+        now: datetime,
+    ) -> None:
+        previous = self._client.hgetall(_meta_key(principal_id))
+        score = _active_score(now)
+        new_keys = _pool_keys(intensity_bucket, theme_tags)
+        stale_keys = []
+        if previous:
+            old_keys = _pool_keys(
+                previous.get("intensity", ""),
+                _split_themes(previous.get("themes", "")),
+            )
+            stale_keys = [key for key in old_keys if key not in new_keys]
+        pipe = self._client.pipeline()
+        for key in stale_keys:
+            pipe.zrem(key, principal_id)
+        pipe.hset(
+            _meta_key(principal_id),
+            mapping={"intensity": intensity_bucket, "themes": _join_themes(theme_tags)},
+        )
+        pipe.expire(_meta_key(principal_id), ELIGIBLE_RECENCY_HOURS * 3600)
+        self._add_to_keys(pipe, new_keys, principal_id, score, now)
+        pipe.execute()
+
+    def touch(self, principal_id: str, intensity_bucket: str, now: datetime) -> None:
+        previous = self._client.hgetall(_meta_key(principal_id))
+        if not previous:
+            self.upsert(principal_id, intensity_bucket, [], now)
+            return
+        keys = _pool_keys(
+            previous.get("intensity", intensity_bucket),
+            _split_themes(previous.get("themes", "")),
+        )
+        pipe = self._client.pipeline()
+        pipe.expire(_meta_key(principal_id), ELIGIBLE_RECENCY_HOURS * 3600)
+        self._add_to_keys(pipe, keys, principal_id, _active_score(now), now)
+        pipe.execute()
+
+    def mark_crisis(self, principal_id: str, at: datetime, now: datetime) -> None:
+        remaining = (at + timedelta(hours=CRISIS_WINDOW_HOURS)) - now
+        ttl_seconds = int(remaining.total_seconds())
+        if ttl_seconds <= 0:
+            return
+        self._client.set(_crisis_key(principal_id), "1", ex=ttl_seconds)
+
+    def begin_warm(self) -> str:
+        return self._client.get(_GENERATION_KEY) or "0"
+
+    def mark_cold(self) -> None:
+        # Bumping the generation also voids any warm that is still running.
+        self._client.incr(_GENERATION_KEY)
+
+    def is_warm(self) -> bool:
+        return _is_warm(*self._client.mget(_WARM_KEY, _GENERATION_KEY))
+
+    def load_pool(
+        self,
+        intensity_bucket: str,
+        theme_tags: List[str],
+        now: datetime,
+        limit: int,
+    ) -> Optional[Tuple[Candidate, ...]]:
+        cutoff = _recency_cutoff(now)
+        keys = _pool_keys(intensity_bucket, theme_tags)
+        if theme_tags:
+            keys = keys[1:]
+        pipe = self._client.pipeline()
+        pipe.mget(_WARM_KEY, _GENERATION_KEY)
+        for key in keys:
+            pipe.zremrangebyscore(key, "-inf", f"({cutoff}")
+            pipe.zrangebyscore(key, cutoff, "+inf", withscores=True)
+        results = pipe.execute()
+        if not _is_warm(*results[0]):
+            # Empty after a restart or flush, or possibly missing a crisis
+            # mark: the caller reads Postgres until the next warm.
+            return None
+        scores: Dict[str, float] = {}
+        for members in results[2::2]:
+            for member, score in members:
+                scores[member] = max(score, scores.get(member, score))
+        if not scores:
+            return ()
+        ordered = sorted(scores, key=lambda member: (-scores[member], member))
+        pipe = self._client.pipeline()
+        for member in ordered:
+            pipe.hgetall(_meta_key(member))
+            pipe.exists(_crisis_key(member))
+        lookups = pipe.execute()
+        candidates: List[Candidate] = []
+        for index, member in enumerate(ordered):
+            meta = lookups[index * 2]
+            in_crisis = lookups[index * 2 + 1]
+            if not meta or in_crisis:
+                continue
+            if meta.get("intensity") != intensity_bucket:
+                continue
+            candidates.append(
+                Candidate(
+                    candidate_id=member,
+                    intensity=meta["intensity"],
+                    themes=_split_themes(meta.get("themes", "")),
+                )
+            )
+            if len(candidates) >= limit:
+                break
+        return tuple(candidates)
+
+    def load_rows(
+        self,
+        rows: Iterable[Tuple[str, str, List[str], datetime]],
+        crisis_rows: Iterable[Tuple[str, datetime]],
+        now: datetime,
+        generation: str,
+    ) -> int:
+        loaded = 0
+        for principal_id, intensity_bucket, theme_tags, last_active in rows:
+            pipe = self._client.pipeline()
+            pipe.hset(
+                _meta_key(principal_id),
+                mapping={
+                    "intensity": intensity_bucket,
+                    "themes": _join_themes(theme_tags or []),
+                },
+            )
+            pipe.expire(_meta_key(principal_id), ELIGIBLE_RECENCY_HOURS * 3600)
+            self._add_to_keys(
+                pipe,
+                _pool_keys(intensity_bucket, theme_tags or []),
+                principal_id,
+                _active_score(last_active),
+                now,
+            )
+            pipe.execute()
+            loaded += 1
+        for principal_id, last_action_at in crisis_rows:
+            self.mark_crisis(principal_id, last_action_at, now)
+        self._client.set(_WARM_KEY, generation)
+        return loaded
+
+    def _add_to_keys(self, pipe, keys: List[str], principal_id: str, score: float, now: datetime) -> None:
+        cutoff = _recency_cutoff(now)
+        for key in keys:
+            pipe.zadd(key, {principal_id: score})
+            pipe.zremrangebyscore(key, "-inf", f"({cutoff}")
+
+
+class FallbackEligiblePool:
+    def __init__(self) -> None:
+        self._redis: Optional[RedisEligiblePool] = None
+        self._cold_pending = False
+
+    def _ensure_redis(self) -> Optional[RedisEligiblePool]:
+        if self._redis is not None or redis is None or not REDIS_URL:
+            return self._redis
+        try:
+            client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+            client.ping()
+            pool = RedisEligiblePool(client)
+            if self._cold_pending:
+                pool.mark_cold()
+                self._cold_pending = False
+            self._redis = pool
+        except redis.RedisError:
+            self._redis = None
+        return self._redis
+
+    def _call(self, action: Callable[[RedisEligiblePool], object]) -> Tuple[bool, object]:
+        pool = self._ensure_redis()
+        if pool is None:
+            return False, None
+        try:
+            return True, action(pool)
+        except redis.RedisError:
+            self._redis = None
+            return False, None
+
+    def upsert(self, principal_id: str, intensity_bucket: str, theme_tags: List[str], now: datetime) -> bool:
+        ok, _ = self._call(lambda pool: pool.upsert(principal_id, intensity_bucket, theme_tags, now))
+        return ok
+
+    def touch(self, principal_id: str, intensity_bucket: str, now: datetime) -> bool:
+        ok, _ = self._call(lambda pool: pool.touch(principal_id, intensity_bucket, now))
+        return ok
+
+    def mark_crisis(self, principal_id: str, at: datetime, now: datetime) -> bool:
+        ok, _ = self._call(lambda pool: pool.mark_crisis(principal_id, at, now))
+        return ok
+
+    def mark_cold(self) -> bool:
+        # Remembered until it lands, so a reconnect never serves a mirror
+        # that missed a write.
+        self._cold_pending = True
+        ok, _ = self._call(lambda pool: pool.mark_cold())
+        if ok:
+            self._cold_pending = False
+        return ok
+
+    def begin_warm(self) -> Optional[str]:
+        ok, generation = self._call(lambda pool: pool.begin_warm())
+        return generation if ok else None
+
+    def is_warm(self) -> Optional[bool]:
+        ok, warm = self._call(lambda pool: pool.is_warm())
+        return warm if ok else None
+
+    def load_pool(
+        self,
+        intensity_bucket: str,
+        theme_tags: List[str],
+        now: datetime,
+        limit: int,
+    ) -> Optional[Tuple[Candidate, ...]]:
+        ok, pool = self._call(lambda pool: pool.load_pool(intensity_bucket, theme_tags, now, limit))
+        return pool if ok else None
+
+    def load_rows(
+        self,
+        rows: Iterable[Tuple[str, str, List[str], datetime]],
+        crisis_rows: Iterable[Tuple[str, datetime]],
+        now: datetime,
+        generation: str,
+    ) -> Optional[int]:
+        ok, loaded = self._call(
+            lambda pool: pool.load_rows(rows, crisis_rows, now, generation)
+        )
+        return loaded if ok else None
+
+
+PendingEligibleWrite = Tuple[str, Optional[List[str]], datetime]
+
+
+class EligibleWriteCoalescer:
+    def __init__(
+        self,
+        flush_fn: Callable[
+            [List[Tuple[str, str, Optional[List[str]], datetime]], Dict[str, int]], None
+        ],
+        flush_interval_seconds: float,
+        max_pending: int = ELIGIBLE_WRITE_MAX_PENDING,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._flush_fn = flush_fn
+        self._flush_interval_seconds = _clamp_flush_interval(flush_interval_seconds)
+        self._max_pending = max(int(max_pending), 1)
+        self._clock = clock
+        self._pending: Dict[str, PendingEligibleWrite] = {}
+        self._pending_offsets: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._flushes = 0
+        self._rows_flushed = 0
+        self._failures = 0
+        self._consecutive_failures = 0
+        self._retry_at = 0.0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+
+    @property
+    def flush_interval_seconds(self) -> float:
+        return self._flush_interval_seconds
+
+    def record_upsert(
+        self,
+        principal_id: str,
+        intensity_bucket: str,
+        theme_tags: List[str],
+        now: datetime,
+    ) -> None:
+        self._record(principal_id, (intensity_bucket, list(theme_tags), _active_bucket(now)))
+
+    def record_touch(self, principal_id: str, intensity_bucket: str, now: datetime) -> None:
+        self._record(principal_id, (intensity_bucket, None, _active_bucket(now)))
+
+    def record_timezone_offset(self, principal_id: str, offset_minutes: int) -> None:
+        # Applied after the batch's upserts, so a principal whose first row is
+        # still buffered keeps the offset sent alongside it.
+        with self._lock:
+            self._pending_offsets[principal_id] = int(offset_minutes)
+            pending = len(self._pending) + len(self._pending_offsets)
+        self._after_record(pending)
+
+    def _record(self, principal_id: str, write: PendingEligibleWrite) -> None:
+        with self._lock:
+            existing = self._pending.get(principal_id)
+            self._pending[principal_id] = (
+                write if existing is None else _merge_pending_write(existing, write)
+            )
+            pending = len(self._pending) + len(self._pending_offsets)
+        self._after_record(pending)
+
+    def _after_record(self, pending: int) -> None:
+        if pending >= self._max_pending and not self._backing_off():
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def _backing_off(self) -> bool:
+        # After a failed flush, requests stop retrying inline until the backoff
+        # passes; the background thread keeps retrying on its own schedule.
+        with self._lock:
+            return self._clock() < self._retry_at
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending
+                offsets = self._pending_offsets
+                self._pending = {}
+                self._pending_offsets = {}
+            rows = len(batch.keys() | offsets.keys())
+            if not rows:
+                return 0
+            started = self._clock()
+            try:
+                # A stable key order keeps concurrent multi-row upserts from
+                # deadlocking on eligible_principals row locks.
+                self._flush_fn(
+                    [(principal_id,) + write for principal_id, write in sorted(batch.items())],
+                    dict(sorted(offsets.items())),
+                )
+            except Exception:
+                with self._lock:
+                    for principal_id, write in batch.items():
+                        newer = self._pending.get(principal_id)
+                        self._pending[principal_id] = (
+                            write if newer is None else _merge_pending_write(write, newer)
+                        )
+                    for principal_id, offset_minutes in offsets.items():
+                        self._pending_offsets.setdefault(principal_id, offset_minutes)
+                    pending = len(self._pending) + len(self._pending_offsets)
+                    self._failures += 1
+                    self._consecutive_failures += 1
+                    self._retry_at = self._clock() + _failure_backoff_seconds(
+                        self._flush_interval_seconds, self._consecutive_failures
+                    )
+                logger.info(
+                    "eligible_write_flush",
+                    {"status": "failed", "rows": rows, "pending": pending},
+                )
+                return 0
+            latency_ms = (self._clock() - started) * 1000.0
+            with self._lock:
+                self._consecutive_failures = 0
+                self._retry_at = 0.0
+                self._flushes += 1
+                self._rows_flushed += rows
+                self._last_flush_ms = latency_ms
+                self._max_flush_ms = max(self._max_flush_ms, latency_ms)
+                pending = len(self._pending) + len(self._pending_offsets)
+            logger.info(
+                "eligible_write_flush",
+                {
+                    "status": "ok",
+                    "rows": rows,
+                    "pending": pending,
+                    "latency_ms": round(latency_ms, 2),
+                },
+            )
+            return rows
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "pending": len(self._pending) + len(self._pending_offsets),
+                "flushes": self._flushes,
+                "rows_flushed": self._rows_flushed,
+                "failures": self._failures,
+                "last_flush_ms": round(self._last_flush_ms, 2),
+                "max_flush_ms": round(self._max_flush_ms, 2),
+            }
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self._flush_interval_seconds + 5)
+        return self.flush()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None or self._stop_event.is_set():
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run,
+                name="eligible-write-coalescer",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self._flush_interval_seconds):
+            if not self._backing_off():
+                self.flush()
+
+
+_fallback_pool = FallbackEligiblePool()
+_mirror_executor: Optional[ThreadPoolExecutor] = None
+
+
+_coalescers: Dict[str, EligibleWriteCoalescer] = {}
+_coalescers_lock = threading.Lock()
+
+
+def get_eligible_write_coalescer(
+    key: str,
+    flush_fn: Callable[
+        [List[Tuple[str, str, Optional[List[str]], datetime]], Dict[str, int]], None
+    ],
+) -> Optional[EligibleWriteCoalescer]:
+    if ELIGIBLE_WRITE_FLUSH_SECONDS <= 0:
+        return None
+    with _coalescers_lock:
+        coalescer = _coalescers.get(key)
+        if coalescer is None:
+            coalescer = EligibleWriteCoalescer(flush_fn, ELIGIBLE_WRITE_FLUSH_SECONDS)
+            _coalescers[key] = coalescer
+        return coalescer
+
+
+def eligible_write_stats() -> Dict[str, object]:
+    with _coalescers_lock:
+        coalescers = list(_coalescers.values())
+    totals: Dict[str, object] = {
+        "pending": 0,
+        "flushes": 0,
+        "rows_flushed": 0,
+        "failures": 0,
+        "last_flush_ms": 0.0,
+        "max_flush_ms": 0.0,
+    }
+    for coalescer in coalescers:
+        stats = coalescer.stats()
+        for key in ("pending", "flushes", "rows_flushed", "failures"):
+            totals[key] += stats[key]
+        for key in ("last_flush_ms", "max_flush_ms"):
+            totals[key] = max(totals[key], stats[key])
+    return totals
+
+
+def stop_eligible_writes() -> int:
+    with _coalescers_lock:
+        coalescers = list(_coalescers.values())
+        _coalescers.clear()
+    return sum(coalescer.stop() for coalescer in coalescers)
+
+
+def get_eligible_pool() -> Optional[FallbackEligiblePool]:
+    if ELIGIBLE_POOL_BACKEND != "redis":
+        return None
+    return _fallback_pool
+
+
+def submit_mirror_write(write: Callable[[], None]) -> None:
+    global _mirror_executor
+    if _mirror_executor is None:
+        _mirror_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="eligible-mirror",
+        )
+    future = _mirror_executor.submit(write)
+    future.add_done_callback(_log_mirror_failure)
+
+
+def _log_mirror_failure(future) -> None:
+    if future.exception() is not None:
+        logger.info("eligible_pool_mirror", {"status": "write_failed", "reason": "exception"})
+
+
+_WARM_KEY = "elig:warm"
+_GENERATION_KEY = "elig:generation"
+
+
+def _is_warm(warm: Optional[str], generation: Optional[str]) -> bool:
+    return warm is not None and warm == (generation or "0")
+
+
+def _meta_key(principal_id: str) -> str:
+    return f"elig:meta:{principal_id}"
+
+
+def _crisis_key(principal_id: str) -> str:
+    return f"elig:crisis:{principal_id}"
+
+
+def _pool_keys(intensity_bucket: str, theme_tags: List[str]) -> List[str]:
+    keys = [f"elig:pool:{intensity_bucket}"]
+    keys.extend(f"elig:pool:{intensity_bucket}:{theme}" for theme in sorted(set(theme_tags)))
+    return keys
+
+
+def _join_themes(theme_tags: List[str]) -> str:
+    return ",".join(sorted(set(theme_tags)))
+
+
+def _split_themes(value: str) -> List[str]:
+    return [theme for theme in value.split(",") if theme]
+
+
+def _active_bucket(timestamp: datetime) -> datetime:
+    # Same hour granularity as eligible_principals.last_active_bucket.
+    return timestamp.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _active_score(timestamp: datetime) -> float:
+    return _active_bucket(timestamp).timestamp()
+
+
+def _clamp_flush_interval(seconds: float) -> float:
+    # Buffered rows carry their own hour bucket, so a flush must land well
+    # before that bucket could fall out of the recency window.
+    max_interval = min(3600, ELIGIBLE_RECENCY_HOURS * 3600)
+    return min(max(float(seconds), 0.05), float(max_interval))
+
+
+def _failure_backoff_seconds(flush_interval_seconds: float, failures: int) -> float:
+    return min(flush_interval_seconds * (2 ** min(failures, 16)), MAX_FLUSH_BACKOFF_SECONDS)
+
+
+def _merge_pending_write(
+    older: PendingEligibleWrite, newer: PendingEligibleWrite
+) -> PendingEligibleWrite:
+    bucket = max(older[2], newer[2])
+    if newer[1] is None:
+        # A touch never overwrites the themes of a buffered upsert.
+        return (older[0], older[1], bucket)
+    return (newer[0], newer[1], bucket)
+
+
+def _recency_cutoff(now: datetime) -> float:
+    return (now - timedelta(hours=ELIGIBLE_RECENCY_HOURS)).timestamp()
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import Iterable, Optional
+
+from .config import SECURITY_EVENT_HMAC_KEY
+
+DEFAULT_PRECISION = 12
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+_FORMAT_VERSION = 1
+_HASH_BITS = 64
+# Registers keep a few bits of each value's hash; keying it means a stored
+# sketch cannot be probed for a known principal id without the secret.
+_HASH_KEY = hashlib.sha256(SECURITY_EVENT_HMAC_KEY.encode("utf-8")).digest()
+
+
+def hash_key_id() -> str:
+    # Stored next to each sketch so a key rotation never unions registers
+    # hashed under different keys; it does not reveal the key itself.
+    return hashlib.sha256(b"hll-key-id:" + _HASH_KEY).hexdigest()[:16]
+
+
+class HyperLogLog:
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[bytes] = None) -> None:
+        if precision < MIN_PRECISION or precision > MAX_PRECISION:
+            raise ValueError("invalid_precision")
+        self.precision = precision
+        self._m = 1 << precision
+        if registers is None:
+            self._registers = bytearray(self._m)
+        else:
+            if len(registers) != self._m:
+                raise ValueError("invalid_registers")
+            self._registers = bytearray(registers)
+
+    def add(self, value: str) -> None:
+        hashed = int.from_bytes(
+            hashlib.blake2b(value.encode("utf-8"), digest_size=8, key=_HASH_KEY).digest(),
+            "big",
+        )
+        suffix_bits = _HASH_BITS - self.precision
+        index = hashed >> suffix_bits
+        suffix = hashed & ((1 << suffix_bits) - 1)
+        rank = suffix_bits - suffix.bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def update(self, values: Iterable[str]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("precision_mismatch")
+        registers = self._registers
+        for index, rank in enumerate(other._registers):
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def count(self) -> int:
+        m = self._m
+        inverse_sum = 0.0
+        zeros = 0
+        for rank in self._registers:
+            inverse_sum += 2.0 ** -rank
+            if rank == 0:
+                zeros += 1
+        estimate = _alpha(m) * m * m / inverse_sum
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def is_empty(self) -> bool:
+        return not any(self._registers)
+
+    def to_bytes(self) -> bytes:
+        return bytes([_FORMAT_VERSION, self.precision]) + bytes(self._registers)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "HyperLogLog":
+        if len(payload) < 2 or payload[0] != _FORMAT_VERSION:
+            raise ValueError("invalid_sketch")
+        return cls(precision=payload[1], registers=bytes(payload[2:]))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, HyperLogLog):
+            return NotImplemented
+        return self.precision == other.precision and self._registers == other._registers
+
+
+def union(sketches: Iterable[HyperLogLog], precision: int = DEFAULT_PRECISION) -> HyperLogLog:
+    merged = HyperLogLog(precision)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
+
+
+def _alpha(m: int) -> float:
+    if m == 16:
+        return 0.673
+    if m == 32:
+        return 0.697
+    if m == 64:
+        return 0.709
+    return 0.7213 / (1 + 1.079 / m)
@@ -30,7 +30,11 @@ from .repository import MessageRecord, MoodEventRecord, MoodRecord, get_reposito
 from .security_events import safe_record_security_event
 from .themes import map_mood_to_themes, normalize_theme_tags
 from .security import current_principal
+from .counter_sink import stop_second_touch_counters
+from .eligible_pool import stop_eligible_writes
 from .ghost_signal_runner import run_forever, stop_task
+from .maintenance_runner import run_forever as run_maintenance_forever
+from .pg_notify import stop_listeners
 
 logger = configure_logging()
 
@@ -38,21 +42,29 @@ app = FastAPI(title="We Are Many API", version=API_VERSION)
 
 _ghost_signal_stop_event = asyncio.Event()
 _ghost_signal_task: Optional[asyncio.Task] = None
+_maintenance_task: Optional[asyncio.Task] = None
 
 
 @app.on_event("startup")
 async def start_ghost_signal_runner() -> None:
-    global _ghost_signal_task
+    global _ghost_signal_task, _maintenance_task
     _ghost_signal_stop_event.clear()
     _ghost_signal_task = asyncio.create_task(
         run_forever(_ghost_signal_stop_event)
     )
+    _maintenance_task = asyncio.create_task(
+        run_maintenance_forever(_ghost_signal_stop_event)
+    )
 
 
 @app.on_event("shutdown")
 async def stop_ghost_signal_runner() -> None:
     _ghost_signal_stop_event.set()
     await stop_task(_ghost_signal_task)
+    await stop_task(_maintenance_task)
+    await asyncio.to_thread(stop_eligible_writes)
+    await asyncio.to_thread(stop_second_touch_counters)
+    await asyncio.to_thread(stop_listeners)
 
 
 @app.middleware("http")
@@ -419,7 +431,14 @@ def submit_message(
                     "throttle_count": identity_leak_count,
                 },
             )
-        in_crisis_window = repo.is_in_crisis_window(principal.principal_id, CRISIS_WINDOW_HOURS)
+        # Health and affinity only feed matching, which a held message skips.
+        context = repo.load_principal_context(
+            principal.principal_id,
+            window_days=7,
+            include_health=hold_reason is None,
+            include_affinity=hold_reason is None,
+        )
+        in_crisis_window = context.in_crisis_window(CRISIS_WINDOW_HOURS)
         message_id = None
         deliver_at = None
         candidates = []
@@ -443,7 +462,7 @@ def submit_message(
                 )
             )
             repo.upsert_eligible_principal(principal.principal_id, payload.intensity, message_themes)
-            health = repo.get_matching_health(principal.principal_id, window_days=7)
+            health = context.health
             tuning = repo.get_matching_tuning()
             params = progressive_params(health.ratio, tuning)
             logger.info(
@@ -458,7 +477,7 @@ def submit_message(
             limit = max(1, int(MATCH_SAMPLE_LIMIT * (1 + params.pool_multiplier)))
             cold_start_min = max(COLD_START_MIN_POOL, 1)
             candidate_limit = max(limit, cold_start_min)
-            affinity_map = repo.get_affinity_map(principal.principal_id)
+            affinity_map = context.affinity_map
             candidates = repo.get_eligible_candidates(
                 principal.principal_id,
                 payload.intensity,
@@ -725,7 +744,10 @@ def send_second_touch(
             hold_reason=HoldReason.OFFER_UNAVAILABLE.value,
         )
     repo.increment_second_touch_counter(day_key, "sends_attempted")
-    if repo.is_in_crisis_window(principal.principal_id, CRISIS_WINDOW_HOURS):
+    context = repo.load_principal_context(
+        principal.principal_id, include_health=False, now=now, include_affinity=False
+    )
+    if context.in_crisis_window(CRISIS_WINDOW_HOURS, now=now):
         repo.increment_second_touch_counter(
             day_key,
             f"sends_held_{HoldReason.CRISIS_WINDOW.value}",
@@ -0,0 +1,160 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .config import (
+    ELIGIBLE_POOL_WARM_CHECK_SECONDS,
+    HELPED_COUNTS_BACKFILL_CHECK_SECONDS,
+    MOOD_PRINCIPAL_SKETCH_INTERVAL_SECONDS,
+    SECOND_TOUCH_OFFER_BATCH_SIZE,
+    SECOND_TOUCH_OFFER_INTERVAL_SECONDS,
+    SECOND_TOUCH_RECOMPUTE_INTERVAL_SECONDS,
+    SIMILAR_COUNT_GRID_REFRESH_SECONDS,
+    SIMILAR_WINDOW_DAYS,
+)
+from .eligible_pool import get_eligible_pool
+from .logging import configure_logging
+from .repository import Repository, get_repository
+
+logger = configure_logging()
+
+
+@dataclass(frozen=True)
+class MaintenanceJob:
+    name: str
+    interval_seconds: float
+    run: Callable[[Repository], object]
+
+
+def _generate_second_touch_offers(repo: Repository) -> object:
+    # The in-memory repository still generates offers lazily on /inbox.
+    if not hasattr(repo, "generate_second_touch_offers"):
+        return None
+    return repo.generate_second_touch_offers(limit=SECOND_TOUCH_OFFER_BATCH_SIZE)
+
+
+def _warm_eligible_pool_if_cold(repo: Repository) -> object:
+    pool = get_eligible_pool()
+    if pool is None or not hasattr(repo, "warm_eligible_pool"):
+        return None
+    # None means Redis is unreachable; matching already reads Postgres.
+    if pool.is_warm() is not False:
+        return None
+    return repo.warm_eligible_pool()
+
+
+def _backfill_helped_counts(repo: Repository) -> object:
+    # A no-op lookup once the first backfill after migration 0023 is done.
+    if not hasattr(repo, "backfill_helped_counts"):
+        return None
+    return repo.backfill_helped_counts()
+
+
+def _recompute_dirty_second_touch_days(repo: Repository) -> object:
+    if not hasattr(repo, "recompute_dirty_second_touch_days"):
+        return None
+    return repo.recompute_dirty_second_touch_days()
+
+
+def _refresh_similar_count_grid(repo: Repository) -> object:
+    if not hasattr(repo, "refresh_similar_count_grid"):
+        return None
+    return repo.refresh_similar_count_grid(SIMILAR_WINDOW_DAYS)
+
+
+def _sketch_mood_principals(repo: Repository) -> object:
+    if not hasattr(repo, "sketch_mood_principals"):
+        return None
+    # Yesterday is re-sketched once more so late events before midnight land.
+    today = datetime.now(timezone.utc).date()
+    return {
+        day.isoformat(): repo.sketch_mood_principals(day)
+        for day in (today - timedelta(days=1), today)
+    }
+
+
+def default_jobs() -> List[MaintenanceJob]:
+    jobs = [
+        MaintenanceJob(
+            "eligible_pool_warm",
+            ELIGIBLE_POOL_WARM_CHECK_SECONDS,
+            _warm_eligible_pool_if_cold,
+        ),
+        MaintenanceJob(
+            "helped_counts_backfill",
+            HELPED_COUNTS_BACKFILL_CHECK_SECONDS,
+            _backfill_helped_counts,
+        ),
+        MaintenanceJob(
+            "second_touch_offers",
+            SECOND_TOUCH_OFFER_INTERVAL_SECONDS,
+            _generate_second_touch_offers,
+        ),
+        MaintenanceJob(
+            "second_touch_recompute",
+            SECOND_TOUCH_RECOMPUTE_INTERVAL_SECONDS,
+            _recompute_dirty_second_touch_days,
+        ),
+        MaintenanceJob(
+            "similar_count_grid",
+            SIMILAR_COUNT_GRID_REFRESH_SECONDS,
+            _refresh_similar_count_grid,
+        ),
+        MaintenanceJob(
+            "mood_principal_sketch",
+            MOOD_PRINCIPAL_SKETCH_INTERVAL_SECONDS,
+            _sketch_mood_principals,
+        ),
+    ]
+    return [job for job in jobs if job.interval_seconds > 0]
+
+
+def run_due_jobs(
+    jobs: Sequence[MaintenanceJob],
+    next_run_at: Dict[str, float],
+    repo: Repository,
+    clock: Callable[[], float] = time.monotonic,
+) -> List[str]:
+    ran: List[str] = []
+    for job in jobs:
+        now = clock()
+        if next_run_at.get(job.name, 0.0) > now:
+            continue
+        next_run_at[job.name] = now + job.interval_seconds
+        try:
+            job.run(repo)
+        except Exception:
+            logger.info(
+                "maintenance_runner",
+                {"job": job.name, "status": "tick_failed", "reason": "exception"},
+            )
+            continue
+        ran.append(job.name)
+    return ran
+
+
+async def run_forever(
+    stop_event: asyncio.Event,
+    jobs: Optional[Sequence[MaintenanceJob]] = None,
+    repo_factory: Callable[[], Repository] = get_repository,
+) -> None:
+    jobs = default_jobs() if jobs is None else list(jobs)
+    if not jobs:
+        return
+    poll_seconds = min(job.interval_seconds for job in jobs)
+    next_run_at: Dict[str, float] = {}
+    while not stop_event.is_set():
+        try:
+            # Jobs block on the database; keep them off the event loop.
+            await asyncio.to_thread(run_due_jobs, jobs, next_run_at, repo_factory())
+        except Exception:
+            logger.info(
+                "maintenance_runner",
+                {"status": "tick_failed", "reason": "exception"},
+            )
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=poll_seconds)
+        except asyncio.TimeoutError:
+            continue
@@ -262,12 +262,21 @@ def _apply_affinity_bias(
     if max_score <= 0:
         return candidates
 
-    scored = []
-    for index, candidate in enumerate(candidates):
-        weight = _affinity_weight(candidate, affinity_map, max_score)
-        scored.append((-weight, index, candidate))
-    scored.sort()
-    return [item[2] for item in scored]
+    # Pools repeat a small number of theme sets, so weigh each set once and
+    # order by a stable descending sort (ties keep pool order).
+    weights_by_themes: Dict[tuple, float] = {}
+    weights = []
+    for candidate in candidates:
+        themes_key = tuple(candidate.themes)
+        weight = weights_by_themes.get(themes_key)
+        if weight is None:
+            weight = _affinity_weight(candidate, affinity_map, max_score)
+            weights_by_themes[themes_key] = weight
+        weights.append(weight)
+    if len(set(weights_by_themes.values())) <= 1:
+        return candidates
+    order = sorted(range(len(candidates)), key=weights.__getitem__, reverse=True)
+    return [candidates[index] for index in order]
 
 
 def _affinity_weight(
@@ -0,0 +1,91 @@
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import psycopg
+    from psycopg import sql
+except Exception:  # pragma: no cover - optional dependency at runtime
+    psycopg = None
+    sql = None
+
+from .logging import configure_logging
+
+logger = configure_logging()
+
+
+class NotifyListener:
+    def __init__(
+        self,
+        dsn: str,
+        channel: str,
+        on_notify: Callable[[Optional[str]], None],
+        poll_seconds: float = 1.0,
+        retry_seconds: float = 5.0,
+    ) -> None:
+        self._dsn = dsn
+        self._channel = channel
+        self._on_notify = on_notify
+        self._poll_seconds = poll_seconds
+        self._retry_seconds = retry_seconds
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"pg-notify-{self._channel}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._poll_seconds + 1)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                with psycopg.connect(self._dsn, autocommit=True) as conn:
+                    conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self._channel)))
+                    # Anything published while disconnected was missed.
+                    self._on_notify(None)
+                    while not self._stop_event.is_set():
+                        for notify in conn.notifies(timeout=self._poll_seconds):
+                            self._on_notify(notify.payload)
+            except psycopg.Error:
+                logger.info(
+                    "pg_notify_listener",
+                    {"channel": self._channel, "status": "reconnecting"},
+                )
+                self._stop_event.wait(self._retry_seconds)
+
+
+_listeners: Dict[Tuple[str, str], NotifyListener] = {}
+_listeners_lock = threading.Lock()
+
+
+def ensure_listener(
+    dsn: str,
+    channel: str,
+    on_notify: Callable[[Optional[str]], None],
+) -> None:
+    if psycopg is None:
+        return
+    key = (dsn, channel)
+    with _listeners_lock:
+        if key in _listeners:
+            return
+        listener = NotifyListener(dsn, channel, on_notify)
+        _listeners[key] = listener
+    listener.start()
+
+
+def stop_listeners() -> None:
+    with _listeners_lock:
+        listeners = list(_listeners.values())
+        _listeners.clear()
+    for listener in listeners:
+        listener.stop()
@@ -1,35 +1,62 @@
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta, timezone
 import hashlib
 import hmac
+import random
 from typing import Dict, List, Optional, Protocol
 
 import os
 
 from .bridge import SYSTEM_SENDER_ID
+from .cache import TTLCache
+from .counter_sink import get_second_touch_counter_sink, merge_counter_increments
+from .eligible_pool import (
+    get_eligible_pool,
+    get_eligible_write_coalescer,
+    submit_mirror_write,
+)
 from .finite_content_store import select_finite_content_id
 from .inbox_origin import InboxOrigin
+from .pg_notify import ensure_listener
 from .matching import Candidate, MatchingTuning, default_matching_tuning
 from .config import (
     AFFINITY_DECAY_PER_DAY,
+    AFFINITY_MAP_CACHE_MAX_ENTRIES,
+    AFFINITY_MAP_CACHE_TTL_SECONDS,
     AFFINITY_SCORE_MAX,
+    CANDIDATE_POOL_CACHE_MAX_ENTRIES,
+    CANDIDATE_POOL_CACHE_TTL_SECONDS,
+    CANDIDATE_POOL_MAX_ROWS,
     CRISIS_WINDOW_HOURS,
+    DAILY_ACK_AGGREGATE_SHARDS,
+    EVENT_PARTITION_DAYS_AHEAD,
     ELIGIBLE_RECENCY_HOURS,
     MATCH_SAMPLE_LIMIT,
+    MATCHING_TUNING_CACHE_TTL_SECONDS,
+    PRINCIPAL_STATE_CACHE_MAX_ENTRIES,
+    PRINCIPAL_STATE_CACHE_TTL_SECONDS,
     SECURITY_EVENT_HMAC_KEY,
+    SIMILAR_COUNT_GRID_MAX_AGE_SECONDS,
     SECOND_TOUCH_COOLDOWN_DAYS,
+    SECOND_TOUCH_DIRTY_GRACE_SECONDS,
     SECOND_TOUCH_DISABLE_DAYS,
     SECOND_TOUCH_MIN_AFFINITY,
     SECOND_TOUCH_MIN_POSITIVE,
     SECOND_TOUCH_MIN_SPAN_DAYS,
     SECOND_TOUCH_MONTHLY_CAP,
+    SECOND_TOUCH_RECHECK_MINUTES,
 )
+from .hll import HyperLogLog, hash_key_id, union
 from .hold_reasons import HoldReason
+from .themes import CANONICAL_THEMES
 
 try:
     import psycopg
+    from psycopg import sql
 except Exception:  # pragma: no cover - optional dependency at runtime
     psycopg = None
+    sql = None
 
 
 @dataclass
@@ -69,6 +96,44 @@ class MatchingHealth:
     ratio: float
 
 
+@dataclass(frozen=True)
+class AffinitySnapshot:
+    reference_at: datetime
+    valid_until: Optional[datetime]
+    scores: array
+    extras: tuple[tuple[str, float], ...] = ()
+
+    def covers(self, now: datetime) -> bool:
+        if now < self.reference_at:
+            return False
+        return self.valid_until is None or now < self.valid_until
+
+    def as_map(self) -> Dict[str, float]:
+        result = {
+            theme: score
+            for theme, score in zip(CANONICAL_THEMES, self.scores)
+            if score > 0
+        }
+        result.update(self.extras)
+        return result
+
+
+@dataclass(frozen=True)
+class PrincipalContext:
+    principal_id: str
+    actor_hash: str
+    crisis_at: Optional[datetime]
+    timezone_offset_minutes: Optional[int]
+    affinity_map: Dict[str, float]
+    health: MatchingHealth
+
+    def in_crisis_window(self, window_hours: int, now: Optional[datetime] = None) -> bool:
+        if self.crisis_at is None:
+            return False
+        now_value = now or datetime.now(timezone.utc)
+        return self.crisis_at >= now_value - timedelta(hours=window_hours)
+
+
 @dataclass
 class MessageRecord:
     principal_id: str
@@ -305,6 +370,16 @@ class Repository(Protocol):
     def get_matching_health(self, principal_id: str, window_days: int = 7) -> MatchingHealth:
         ...
 
+    def load_principal_context(
+        self,
+        principal_id: str,
+        window_days: int = 7,
+        include_health: bool = True,
+        now: Optional[datetime] = None,
+        include_affinity: bool = True,
+    ) -> PrincipalContext:
+        ...
+
     def get_similar_count(
         self,
         principal_id: str,
@@ -314,6 +389,25 @@ class Repository(Protocol):
     ) -> int:
         ...
 
+    def add_distinct_values(
+        self,
+        dimension: str,
+        day: datetime.date,
+        values: List[str],
+    ) -> None:
+        ...
+
+    def count_distinct_window(
+        self,
+        dimension: str,
+        end_day: datetime.date,
+        window_days: int,
+    ) -> int:
+        ...
+
+    def sketch_mood_principals(self, day: datetime.date) -> int:
+        ...
+
     def record_security_event(self, record: SecurityEventRecord) -> None:
         ...
 
@@ -358,6 +452,7 @@ class Repository(Protocol):
         self,
         now_utc: datetime,
         retention_days: Dict[str, int],
+        fast: bool = False,
     ) -> Dict[str, Dict[str, int]]:
         ...
 
@@ -408,6 +503,7 @@ class InMemoryRepository:
         self.second_touch_events: List[SecondTouchEventRecord] = []
         self.principal_timezones: Dict[str, int] = {}
         self.notification_intents: Dict[str, NotificationIntentRecord] = {}
+        self.distinct_sketches: Dict[tuple[str, datetime.date], HyperLogLog] = {}
 
     def save_mood(self, record: MoodRecord) -> None:
         if record.risk_level == 2:
@@ -444,6 +540,41 @@ class InMemoryRepository:
             principals.add(record.principal_id)
         return len(principals)
 
+    def add_distinct_values(
+        self,
+        dimension: str,
+        day: datetime.date,
+        values: List[str],
+    ) -> None:
+        if not values:
+            return
+        sketch = self.distinct_sketches.setdefault((dimension, day), HyperLogLog())
+        sketch.update(values)
+
+    def count_distinct_window(
+        self,
+        dimension: str,
+        end_day: datetime.date,
+        window_days: int,
+    ) -> int:
+        start_day = end_day - timedelta(days=window_days - 1)
+        return union(
+            sketch
+            for (sketch_dimension, day), sketch in self.distinct_sketches.items()
+            if sketch_dimension == dimension and start_day <= day <= end_day
+        ).count()
+
+    def sketch_mood_principals(self, day: datetime.date) -> int:
+        principals = sorted(
+            {
+                record.principal_id
+                for record in self.mood_events
+                if record.created_at.astimezone(timezone.utc).date() == day
+            }
+        )
+        self.add_distinct_values(MOOD_PRINCIPALS_DIMENSION, day, principals)
+        return len(principals)
+
     def save_message(self, record: MessageRecord) -> str:
         if record.risk_level == 2:
             raise ValueError("risk_level_2_blocked")
@@ -771,6 +902,32 @@ class InMemoryRepository:
             ratio=ratio,
         )
 
+    def load_principal_context(
+        self,
+        principal_id: str,
+        window_days: int = 7,
+        include_health: bool = True,
+        now: Optional[datetime] = None,
+        include_affinity: bool = True,
+    ) -> PrincipalContext:
+        timestamp = now or datetime.now(timezone.utc)
+        crisis = self.crisis_state.get(principal_id)
+        health = (
+            self.get_matching_health(principal_id, window_days)
+            if include_health
+            else MatchingHealth(delivered_count=0, positive_ack_count=0, ratio=0.0)
+        )
+        return PrincipalContext(
+            principal_id=principal_id,
+            actor_hash=_hash_affinity_actor(principal_id),
+            crisis_at=crisis["at"] if crisis else None,
+            timezone_offset_minutes=self.get_last_known_timezone_offset(principal_id),
+            affinity_map=(
+                self.get_affinity_map(principal_id, now=timestamp) if include_affinity else {}
+            ),
+            health=health,
+        )
+
     def record_security_event(self, record: SecurityEventRecord) -> None:
         self.security_events.append(record)
 
@@ -877,6 +1034,7 @@ class InMemoryRepository:
         self,
         now_utc: datetime,
         retention_days: Dict[str, int],
+        fast: bool = False,
     ) -> Dict[str, Dict[str, int]]:
         report: Dict[str, Dict[str, int]] = {}
 
@@ -1327,33 +1485,128 @@ class PostgresRepository:
                     record.created_at,
                 ),
             )
+            cur.execute(
+                """
+                INSERT INTO mood_daily_rollups AS rollup
+                  (principal_id, utc_day, entry_count, valence_sum, last_valence,
+                   last_event_at, emotion_counts)
+                VALUES (
+                  %(principal_id)s,
+                  (%(created_at)s::timestamptz AT TIME ZONE 'UTC')::date,
+                  1,
+                  %(valence_score)s,
+                  %(valence)s,
+                  %(created_at)s,
+                  CASE
+                    WHEN %(emotion)s::text IS NULL THEN '{}'::jsonb
+                    ELSE jsonb_build_object(%(emotion)s::text, 1)
+                  END
+                )
+                ON CONFLICT (principal_id, utc_day)
+                DO UPDATE SET
+                  entry_count = rollup.entry_count + 1,
+                  valence_sum = rollup.valence_sum + EXCLUDED.valence_sum,
+                  last_valence = CASE
+                    WHEN EXCLUDED.last_event_at >= rollup.last_event_at
+                    THEN EXCLUDED.last_valence
+                    ELSE rollup.last_valence
+                  END,
+                  last_event_at = GREATEST(rollup.last_event_at, EXCLUDED.last_event_at),
+                  emotion_counts = CASE
+                    WHEN %(emotion)s::text IS NULL THEN rollup.emotion_counts
+                    ELSE rollup.emotion_counts || jsonb_build_object(
+                      %(emotion)s::text,
+                      COALESCE((rollup.emotion_counts ->> %(emotion)s::text)::int, 0) + 1
+                    )
+                  END
+                """,
+                {
+                    "principal_id": record.principal_id,
+                    "created_at": record.created_at,
+                    "valence_score": int(_VALENCE_SCORES.get(record.valence, 0.0)),
+                    "valence": record.valence,
+                    "emotion": record.expressed_emotion,
+                },
+            )
 
     def get_reflection_summary(self, principal_id: str, window_days: int) -> ReflectionSummary:
         cutoff = datetime.now(timezone.utc) - timedelta(days=window_days)
+        # The cutoff day is partial, so it is read from raw events; every later
+        # day comes from mood_daily_rollups.
+        first_full_day = cutoff.date() + timedelta(days=1)
+        first_full_day_start = datetime.combine(first_full_day, datetime.min.time(), timezone.utc)
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT created_at, valence, intensity, expressed_emotion, risk_level, theme_tag
+                SELECT valence, expressed_emotion
                 FROM mood_events
-                WHERE device_id = %s AND created_at >= %s
+                WHERE device_id = %s AND created_at >= %s AND created_at < %s
                 ORDER BY created_at ASC
                 """,
-                (principal_id, cutoff),
+                (principal_id, cutoff, first_full_day_start),
             )
-            rows = cur.fetchall()
-        records = [
-            MoodEventRecord(
-                principal_id=principal_id,
-                created_at=row[0],
-                valence=row[1],
-                intensity=row[2],
-                expressed_emotion=row[3],
-                risk_level=row[4],
-                theme_tag=row[5],
+            boundary_rows = cur.fetchall()
+            cur.execute(
+                """
+                SELECT utc_day, entry_count, valence_sum, last_valence, emotion_counts
+                FROM mood_daily_rollups
+                WHERE principal_id = %s AND utc_day >= %s
+                ORDER BY utc_day ASC
+                """,
+                (principal_id, first_full_day),
             )
-            for row in rows
-        ]
-        return _summarize_mood_events(records, window_days)
+            day_rows = cur.fetchall()
+
+            total_entries = len(boundary_rows) + sum(int(row[1]) for row in day_rows)
+            mid = max(1, total_entries // 2)
+            distribution: Dict[str, int] = {}
+            day_valences: List[str] = []
+            scores = [_VALENCE_SCORES.get(valence, 0.0) for valence, _ in boundary_rows]
+            first_sum = sum(scores[:mid])
+            total_sum = sum(scores)
+            consumed = len(scores)
+            for _, emotion in boundary_rows:
+                if emotion:
+                    distribution[emotion] = distribution.get(emotion, 0) + 1
+            if boundary_rows:
+                day_valences.append(boundary_rows[-1][0])
+            for utc_day, entry_count, valence_sum, last_valence, emotion_counts in day_rows:
+                entry_count = int(entry_count)
+                if consumed < mid < consumed + entry_count:
+                    # The trend split falls inside this day; read just its head.
+                    day_start = datetime.combine(utc_day, datetime.min.time(), timezone.utc)
+                    cur.execute(
+                        """
+                        SELECT valence
+                        FROM mood_events
+                        WHERE device_id = %s AND created_at >= %s AND created_at < %s
+                        ORDER BY created_at ASC
+                        LIMIT %s
+                        """,
+                        (principal_id, day_start, day_start + timedelta(days=1), mid - consumed),
+                    )
+                    first_sum += sum(_VALENCE_SCORES.get(row[0], 0.0) for row in cur.fetchall())
+                elif consumed + entry_count <= mid:
+                    first_sum += valence_sum
+                consumed += entry_count
+                total_sum += valence_sum
+                for emotion, count in (emotion_counts or {}).items():
+                    distribution[emotion] = distribution.get(emotion, 0) + int(count)
+                day_valences.append(last_valence)
+
+        trend = "stable"
+        if total_entries:
+            first_avg = first_sum / mid
+            last_count = total_entries - mid
+            last_avg = (total_sum - first_sum) / last_count if last_count else first_avg
+            trend = _reflection_trend(last_avg - first_avg)
+        return ReflectionSummary(
+            window_days=window_days,
+            total_entries=total_entries,
+            distribution=distribution,
+            trend=trend,
+            volatility_days=_valence_changes(day_valences),
+        )
 
     def save_message(self, record: MessageRecord) -> str:
         if record.risk_level == 2:
@@ -1403,6 +1656,29 @@ class PostgresRepository:
         principal_id: str,
         intensity_bucket: str,
         theme_tags: List[str],
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        pool = get_eligible_pool()
+        mirrored = pool is not None and pool.upsert(
+            principal_id, intensity_bucket, theme_tags, now
+        )
+        coalescer = get_eligible_write_coalescer(self._dsn, self._flush_eligible_writes)
+        if coalescer is not None:
+            coalescer.record_upsert(principal_id, intensity_bucket, theme_tags, now)
+        elif mirrored:
+            submit_mirror_write(
+                lambda: self._upsert_eligible_principal_db(
+                    principal_id, intensity_bucket, theme_tags
+                )
+            )
+        else:
+            self._upsert_eligible_principal_db(principal_id, intensity_bucket, theme_tags)
+
+    def _upsert_eligible_principal_db(
+        self,
+        principal_id: str,
+        intensity_bucket: str,
+        theme_tags: List[str],
     ) -> None:
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
@@ -1421,6 +1697,20 @@ class PostgresRepository:
             )
 
     def touch_eligible_principal(self, principal_id: str, intensity_bucket: str) -> None:
+        now = datetime.now(timezone.utc)
+        pool = get_eligible_pool()
+        mirrored = pool is not None and pool.touch(principal_id, intensity_bucket, now)
+        coalescer = get_eligible_write_coalescer(self._dsn, self._flush_eligible_writes)
+        if coalescer is not None:
+            coalescer.record_touch(principal_id, intensity_bucket, now)
+        elif mirrored:
+            submit_mirror_write(
+                lambda: self._touch_eligible_principal_db(principal_id, intensity_bucket)
+            )
+        else:
+            self._touch_eligible_principal_db(principal_id, intensity_bucket)
+
+    def _touch_eligible_principal_db(self, principal_id: str, intensity_bucket: str) -> None:
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
@@ -1435,19 +1725,133 @@ class PostgresRepository:
                 (principal_id, intensity_bucket, []),
             )
 
-    def set_last_known_timezone_offset(
-        self, principal_id: str, offset_minutes: int
+    def _flush_eligible_writes(
+        self,
+        writes: List[tuple[str, str, Optional[List[str]], datetime]],
+        offsets: Dict[str, int],
     ) -> None:
+        upserts = [write for write in writes if write[2] is not None]
+        touches = [write for write in writes if write[2] is None]
+        offsets_written: List[str] = []
+        with self._conn() as conn, conn.cursor() as cur:
+            if upserts:
+                values = ", ".join(["(%s, %s, %s, %s, now())"] * len(upserts))
+                cur.execute(
+                    f"""
+                    INSERT INTO eligible_principals
+                    (principal_id, intensity_bucket, theme_tags, last_active_bucket, updated_at)
+                    VALUES {values}
+                    ON CONFLICT (principal_id)
+                    DO UPDATE SET
+                      intensity_bucket = EXCLUDED.intensity_bucket,
+                      theme_tags = EXCLUDED.theme_tags,
+                      last_active_bucket = GREATEST(
+                        eligible_principals.last_active_bucket,
+                        EXCLUDED.last_active_bucket
+                      ),
+                      updated_at = now()
+                    """,
+                    [value for write in upserts for value in write],
+                )
+            if touches:
+                values = ", ".join(["(%s, %s, %s::text[], %s, now())"] * len(touches))
+                cur.execute(
+                    f"""
+                    INSERT INTO eligible_principals
+                    (principal_id, intensity_bucket, theme_tags, last_active_bucket, updated_at)
+                    VALUES {values}
+                    ON CONFLICT (principal_id)
+                    DO UPDATE SET
+                      last_active_bucket = GREATEST(
+                        eligible_principals.last_active_bucket,
+                        EXCLUDED.last_active_bucket
+                      ),
+                      updated_at = now()
+                    """,
+                    [
+                        value
+                        for principal_id, intensity_bucket, _, bucket in touches
+                        for value in (principal_id, intensity_bucket, [], bucket)
+                    ],
+                )
+            if offsets:
+                offsets_written = self._write_timezone_offsets(cur, offsets)
+        for principal_id in offsets_written:
+            _principal_state_cache.set(
+                _principal_state_key(self._dsn, "tz_offset", principal_id),
+                offsets[principal_id],
+            )
+
+    def warm_eligible_pool(self, now: Optional[datetime] = None) -> Dict[str, object]:
+        pool = get_eligible_pool()
+        if pool is None:
+            return {"status": "skipped", "reason": "pool_disabled", "loaded": 0}
+        now_value = now or datetime.now(timezone.utc)
+        cutoff = now_value - timedelta(hours=ELIGIBLE_RECENCY_HOURS)
+        crisis_cutoff = now_value - timedelta(hours=CRISIS_WINDOW_HOURS)
+        # Taken before reading Postgres: a crisis write that fails meanwhile
+        # bumps the generation and keeps this warm from marking the pool ready.
+        generation = pool.begin_warm()
+        if generation is None:
+            return {"status": "fail", "reason": "redis_unavailable", "loaded": 0}
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
-                UPDATE eligible_principals
-                SET last_known_timezone_offset_minutes = %s,
-                    updated_at = now()
-                WHERE principal_id = %s
+                SELECT principal_id, intensity_bucket, theme_tags, last_active_bucket
+                FROM eligible_principals
+                WHERE last_active_bucket >= %s
+                """,
+                (cutoff,),
+            )
+            rows = cur.fetchall()
+            cur.execute(
+                """
+                SELECT principal_id, last_action_at
+                FROM principal_crisis_state
+                WHERE last_action_at >= %s
                 """,
-                (offset_minutes, principal_id),
+                (crisis_cutoff,),
             )
+            crisis_rows = cur.fetchall()
+        loaded = pool.load_rows(rows, crisis_rows, now_value, generation)
+        if loaded is None:
+            return {"status": "fail", "reason": "redis_unavailable", "loaded": 0}
+        _candidate_pool_cache.invalidate()
+        return {"status": "ok", "loaded": loaded, "crisis": len(crisis_rows)}
+
+    def set_last_known_timezone_offset(
+        self, principal_id: str, offset_minutes: int
+    ) -> None:
+        coalescer = get_eligible_write_coalescer(self._dsn, self._flush_eligible_writes)
+        if coalescer is not None:
+            coalescer.record_timezone_offset(principal_id, offset_minutes)
+            return
+        with self._conn() as conn, conn.cursor() as cur:
+            written = self._write_timezone_offsets(cur, {principal_id: offset_minutes})
+        cache_key = _principal_state_key(self._dsn, "tz_offset", principal_id)
+        if written:
+            _principal_state_cache.set(cache_key, offset_minutes)
+        else:
+            # Unchanged or no eligible row yet; the next read goes to Postgres.
+            _principal_state_cache.invalidate(cache_key)
+
+    def _write_timezone_offsets(self, cur, offsets: Dict[str, int]) -> List[str]:
+        # Unchanged offsets are filtered in SQL rather than against the
+        # process-local cache, which another worker's write can leave stale.
+        principal_ids = list(offsets)
+        cur.execute(
+            """
+            UPDATE eligible_principals AS e
+            SET last_known_timezone_offset_minutes = o.offset_minutes,
+                updated_at = now()
+            FROM unnest(%s::text[], %s::integer[]) AS o(principal_id, offset_minutes)
+            WHERE e.principal_id = o.principal_id
+              AND e.last_known_timezone_offset_minutes IS DISTINCT FROM o.offset_minutes
+            RETURNING e.principal_id
+            """,
+            (principal_ids, [offsets[principal_id] for principal_id in principal_ids]),
+        )
+        return [row[0] for row in cur.fetchall()]
 
     def get_last_known_timezone_offset(self, principal_id: str) -> Optional[int]:
         with self._conn() as conn, conn.cursor() as cur:
@@ -1456,6 +1860,10 @@ class PostgresRepository:
     def _get_last_known_timezone_offset_db(
         self, cur, principal_id: str
     ) -> Optional[int]:
+        cache_key = _principal_state_key(self._dsn, "tz_offset", principal_id)
+        cached = _principal_state_cache.get(cache_key, _CACHE_MISS)
+        if cached is not _CACHE_MISS:
+            return cached
         cur.execute(
             """
             SELECT last_known_timezone_offset_minutes
@@ -1465,9 +1873,9 @@ class PostgresRepository:
             (principal_id,),
         )
         row = cur.fetchone()
-        if not row:
-            return None
-        return row[0]
+        offset = row[0] if row else None
+        _principal_state_cache.set(cache_key, offset)
+        return offset
 
     def _is_in_crisis_window_db(
         self, cur, principal_id: str, window_hours: int, now: datetime
@@ -1519,7 +1927,16 @@ class PostgresRepository:
             theme_id,
             delivered_delta=1,
             positive_delta=0,
+            peer=_is_peer_origin(origin_device_id),
         )
+        if origin_device_id:
+            self._increment_sender_daily_health(
+                cur,
+                origin_device_id,
+                _utc_day_key(),
+                delivered_delta=1,
+                positive_delta=0,
+            )
         if identity_leak and origin_device_id and origin_device_id != SYSTEM_SENDER_ID:
             self.block_second_touch_pair(
                 origin_device_id, recipient_id, until=None, permanent=True
@@ -1683,93 +2100,200 @@ class PostgresRepository:
         return items
 
     def acknowledge(self, inbox_item_id: str, recipient_id: str, reaction: str) -> str:
+        now = datetime.now(timezone.utc)
+        positive = reaction in {"thanks", "helpful", "relate"}
+        affinity_actor = None
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT message_id, recipient_device_id
-                FROM inbox_items
-                WHERE id = %s
+                WITH item AS (
+                  SELECT message_id, recipient_device_id
+                  FROM inbox_items
+                  WHERE id = %(inbox_item_id)s
+                ),
+                inserted AS (
+                  INSERT INTO acknowledgements (message_id, recipient_device_id, reaction)
+                  SELECT message_id, %(recipient_id)s, %(reaction)s
+                  FROM item
+                  WHERE recipient_device_id = %(recipient_id)s
+                  ON CONFLICT (message_id, recipient_device_id)
+                  DO NOTHING
+                  RETURNING id
+                )
+                SELECT
+                  item.recipient_device_id,
+                  m.id IS NOT NULL,
+                  m.origin_device_id,
+                  m.theme_tags,
+                  EXISTS (SELECT 1 FROM inserted)
+                FROM item
+                LEFT JOIN messages m ON m.id = item.message_id
                 """,
-                (inbox_item_id,),
+                {
+                    "inbox_item_id": inbox_item_id,
+                    "recipient_id": recipient_id,
+                    "reaction": reaction,
+                },
             )
             row = cur.fetchone()
-            if not row or row[1] != recipient_id:
+            if not row or row[0] != recipient_id:
                 raise PermissionError("forbidden")
-            message_id = row[0]
-            cur.execute(
-                """
-                INSERT INTO acknowledgements (message_id, recipient_device_id, reaction)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (message_id, recipient_device_id)
-                DO NOTHING
-                RETURNING id
-                """,
-                (message_id, recipient_id, reaction),
-            )
-            inserted = cur.fetchone()
-        if inserted:
-            if reaction in {"thanks", "helpful", "relate"}:
-                with self._conn() as conn, conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        SELECT origin_device_id, theme_tags
-                        FROM messages
-                        WHERE id = %s
-                        """,
-                        (message_id,),
-                    )
-                    row = cur.fetchone()
-                if row and row[0] and row[1]:
-                    theme_id = row[1][0] if row[1] else None
-                    if theme_id:
-                        self.record_affinity(row[0], theme_id, 1.0)
-                        with self._conn() as conn, conn.cursor() as cur:
-                            self._increment_daily_ack_aggregate(
-                                cur,
-                                _utc_day_key(),
-                                _normalize_theme_id(theme_id),
-                                delivered_delta=0,
-                                positive_delta=1,
-                            )
-                        self.update_second_touch_pair_positive(
-                            row[0], recipient_id, datetime.now(timezone.utc)
+            _, message_found, origin, theme_tags, inserted = row
+            if inserted and positive:
+                day_key = _utc_day_key(now)
+                theme_id = theme_tags[0] if theme_tags else None
+                # Side effects share the ack's transaction and are sent in
+                # one pipelined round trip.
+                with conn.pipeline():
+                    if message_found:
+                        self._increment_daily_ack_aggregate(
+                            cur,
+                            day_key,
+                            _normalize_theme_id(theme_id),
+                            delivered_delta=0,
+                            positive_delta=1,
+                            peer=_is_peer_origin(origin),
                         )
+                    if origin:
+                        self._increment_sender_daily_health(
+                            cur,
+                            origin,
+                            day_key,
+                            delivered_delta=0,
+                            positive_delta=1,
+                        )
+                        self._record_helped_pair(cur, origin, recipient_id)
+                    if origin and theme_id:
+                        affinity_actor = self._upsert_affinity(cur, origin, theme_id, 1.0, now)
+                        self._upsert_second_touch_pair_positive(cur, origin, recipient_id, now)
+        if affinity_actor:
+            _affinity_map_cache.invalidate((self._dsn, affinity_actor))
+        if inserted:
             return "recorded"
-        if reaction not in {"thanks", "helpful", "relate"}:
-            with self._conn() as conn, conn.cursor() as cur:
-                cur.execute(
-                    """
-                    SELECT origin_device_id
-                    FROM messages
-                    WHERE id = %s
-                    """,
-                    (message_id,),
-                )
-                row = cur.fetchone()
-            if row and row[0]:
-                disable_until = datetime.now(timezone.utc) + timedelta(
-                    days=SECOND_TOUCH_DISABLE_DAYS
-                )
-                self.block_second_touch_pair(
-                    row[0], recipient_id, disable_until, permanent=False
-                )
+        if not positive and origin:
+            disable_until = now + timedelta(days=SECOND_TOUCH_DISABLE_DAYS)
+            self.block_second_touch_pair(origin, recipient_id, disable_until, permanent=False)
         return "already_recorded"
 
     def get_helped_count(self, principal_id: str) -> int:
+        # Until the one-off backfill has recorded its marker, helped_counts
+        # misses pre-0023 history, so count from acknowledgements instead.
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT COUNT(DISTINCT a.recipient_device_id)
-                FROM acknowledgements a
-                JOIN messages m ON m.id = a.message_id
-                WHERE m.origin_device_id = %s
-                  AND a.reaction IN ('thanks', 'helpful', 'relate')
+                SELECT CASE
+                  WHEN EXISTS (SELECT 1 FROM helped_counts_backfill WHERE id = 1) THEN (
+                    SELECT COALESCE(MAX(helped_count), 0)
+                    FROM helped_counts
+                    WHERE sender_hash = %s
+                  )
+                  ELSE (
+                    SELECT COUNT(DISTINCT a.recipient_device_id)
+                    FROM acknowledgements a
+                    JOIN messages m ON m.id = a.message_id
+                    WHERE m.origin_device_id = %s
+                      AND a.reaction IN ('thanks', 'helpful', 'relate')
+                  )
+                END
                 """,
-                (principal_id,),
+                (_hash_affinity_actor(principal_id), principal_id),
             )
             row = cur.fetchone()
         return int(row[0] or 0)
 
+    def _record_helped_pair(self, cur, sender_id: str, recipient_id: str) -> None:
+        # Only the first positive ack per (sender, recipient) pair counts.
+        cur.execute(
+            """
+            WITH new_pair AS (
+              INSERT INTO helped_pairs (sender_hash, recipient_hash)
+              VALUES (%s, %s)
+              ON CONFLICT (sender_hash, recipient_hash) DO NOTHING
+              RETURNING sender_hash
+            )
+            INSERT INTO helped_counts (sender_hash, helped_count, updated_at)
+            SELECT sender_hash, 1, now()
+            FROM new_pair
+            ON CONFLICT (sender_hash)
+            DO UPDATE SET
+              helped_count = helped_counts.helped_count + 1,
+              updated_at = now()
+            """,
+            (_hash_affinity_actor(sender_id), _hash_affinity_actor(recipient_id)),
+        )
+
+    def rebuild_helped_counts(self, batch_size: int = 1000) -> Dict[str, object]:
+        # Runs in short per-batch transactions next to live acks: missing pairs
+        # are added with ON CONFLICT, then every sender is recounted.
+        pairs = 0
+        senders = 0
+        with self._conn() as source_conn, self._conn() as conn:
+            with source_conn.cursor() as cur:
+                cur.execute(
+                    "SELECT pg_try_advisory_lock(hashtext('helped_counts_rebuild'))"
+                )
+                if not cur.fetchone()[0]:
+                    return {"status": "skipped", "reason": "locked", "pairs": 0, "senders": 0}
+            with source_conn.cursor(name="helped_pairs_rebuild") as source:
+                source.itersize = batch_size
+                source.execute(
+                    """
+                    SELECT DISTINCT m.origin_device_id, a.recipient_device_id
+                    FROM acknowledgements a
+                    JOIN messages m ON m.id = a.message_id
+                    WHERE m.origin_device_id IS NOT NULL
+                      AND a.reaction IN ('thanks', 'helpful', 'relate')
+                    """
+                )
+                while True:
+                    rows = source.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    with conn.cursor() as cur:
+                        _insert_helped_pairs(
+                            cur,
+                            [_hash_affinity_actor(sender) for sender, _ in rows],
+                            [_hash_affinity_actor(recipient) for _, recipient in rows],
+                        )
+                    conn.commit()
+                    pairs += len(rows)
+            source_conn.commit()
+            with source_conn.cursor(name="helped_counts_recount") as source:
+                source.itersize = batch_size
+                source.execute(
+                    """
+                    SELECT sender_hash FROM helped_counts
+                    UNION
+                    SELECT DISTINCT sender_hash FROM helped_pairs
+                    ORDER BY 1
+                    """
+                )
+                while True:
+                    batch = [row[0] for row in source.fetchmany(batch_size)]
+                    if not batch:
+                        break
+                    with conn.cursor() as cur:
+                        _recount_helped_senders(cur, batch)
+                    conn.commit()
+                    senders += len(batch)
+            source_conn.commit()
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO helped_counts_backfill (id, completed_at)
+                    VALUES (1, now())
+                    ON CONFLICT (id) DO UPDATE SET completed_at = EXCLUDED.completed_at
+                    """
+                )
+        return {"status": "ok", "pairs": pairs, "senders": senders}
+
+    def backfill_helped_counts(self, batch_size: int = 1000) -> Optional[Dict[str, object]]:
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM helped_counts_backfill WHERE id = 1")
+            if cur.fetchone() is not None:
+                return None
+        return self.rebuild_helped_counts(batch_size=batch_size)
+
     def record_affinity(
         self,
         sender_id: str,
@@ -1779,33 +2303,45 @@ class PostgresRepository:
     ) -> None:
         if not theme_id:
             return
-        actor_id = _hash_affinity_actor(sender_id)
-        timestamp = now or datetime.now(timezone.utc)
         with self._conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT score, updated_at
-                FROM affinity_scores
-                WHERE sender_device_id = %s AND theme_id = %s
-                """,
-                (actor_id, theme_id),
-            )
-            row = cur.fetchone()
-            current = float(row[0]) if row else 0.0
-            updated_at = row[1] if row else timestamp
-            decayed = _apply_affinity_decay(current, updated_at, timestamp)
-            next_score = min(AFFINITY_SCORE_MAX, decayed + delta)
-            cur.execute(
-                """
-                INSERT INTO affinity_scores (sender_device_id, theme_id, score, updated_at)
-                VALUES (%s, %s, %s, %s)
-                ON CONFLICT (sender_device_id, theme_id)
-                DO UPDATE SET
-                  score = EXCLUDED.score,
-                  updated_at = EXCLUDED.updated_at
-                """,
-                (actor_id, theme_id, next_score, timestamp),
+            actor_id = self._upsert_affinity(
+                cur, sender_id, theme_id, delta, now or datetime.now(timezone.utc)
             )
+        _affinity_map_cache.invalidate((self._dsn, actor_id))
+
+    def _upsert_affinity(
+        self,
+        cur,
+        sender_id: str,
+        theme_id: str,
+        delta: float,
+        timestamp: datetime,
+    ) -> str:
+        actor_id = _hash_affinity_actor(sender_id)
+        # Decay and add inside the upsert so concurrent acks for the same
+        # sender and theme cannot overwrite each other.
+        cur.execute(
+            f"""
+            INSERT INTO affinity_scores (sender_device_id, theme_id, score, updated_at)
+            VALUES (%(actor_id)s, %(theme_id)s, LEAST(%(max_score)s, %(delta)s), %(now)s)
+            ON CONFLICT (sender_device_id, theme_id)
+            DO UPDATE SET
+              score = LEAST(
+                %(max_score)s,
+                {_AFFINITY_DECAYED_SCORE_SQL} + %(delta)s
+              ),
+              updated_at = EXCLUDED.updated_at
+            """,
+            {
+                "actor_id": actor_id,
+                "theme_id": theme_id,
+                "delta": float(delta),
+                "max_score": float(AFFINITY_SCORE_MAX),
+                "decay": float(AFFINITY_DECAY_PER_DAY),
+                "now": timestamp,
+            },
+        )
+        return actor_id
 
     def get_affinity_map(
         self,
@@ -1814,22 +2350,35 @@ class PostgresRepository:
     ) -> Dict[str, float]:
         actor_id = _hash_affinity_actor(sender_id)
         timestamp = now or datetime.now(timezone.utc)
+        cache_key = (self._dsn, actor_id)
+        generation = _affinity_map_cache.generation()
+        snapshot = _affinity_map_cache.get(cache_key)
+        if snapshot is not None and snapshot.covers(timestamp):
+            return snapshot.as_map()
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
-                """
-                SELECT theme_id, score, updated_at
-                FROM affinity_scores
-                WHERE sender_device_id = %s
+                f"""
+                SELECT theme_id, decayed, updated_at
+                FROM (
+                  SELECT
+                    theme_id,
+                    updated_at,
+                    {_AFFINITY_DECAYED_SCORE_SQL} AS decayed
+                  FROM affinity_scores
+                  WHERE sender_device_id = %(actor_id)s
+                ) AS scores
+                WHERE decayed > 0
                 """,
-                (actor_id,),
+                {
+                    "actor_id": actor_id,
+                    "decay": float(AFFINITY_DECAY_PER_DAY),
+                    "now": timestamp,
+                },
             )
             rows = cur.fetchall()
-        result: Dict[str, float] = {}
-        for theme_id, score, updated_at in rows:
-            decayed = _apply_affinity_decay(float(score), updated_at, timestamp)
-            if decayed > 0:
-                result[theme_id] = decayed
-        return result
+        snapshot = _affinity_snapshot(rows, timestamp)
+        _affinity_map_cache.set_if_unchanged(cache_key, snapshot, generation)
+        return snapshot.as_map()
 
     def record_crisis_action(
         self,
@@ -1851,6 +2400,16 @@ class PostgresRepository:
                 """,
                 (principal_id, action, timestamp),
             )
+            # Other workers drop their cached pools when this commits.
+            cur.execute(sql.SQL("NOTIFY {}").format(sql.Identifier(CANDIDATE_POOL_CHANNEL)))
+        pool = get_eligible_pool()
+        if pool is not None and not pool.mark_crisis(
+            principal_id, timestamp, datetime.now(timezone.utc)
+        ):
+            # The mirror could keep serving this principal; stop reading it
+            # until a warm reloads crisis state from Postgres.
+            pool.mark_cold()
+        _candidate_pool_cache.invalidate()
 
     def is_in_crisis_window(
         self,
@@ -1881,19 +2440,48 @@ class PostgresRepository:
         theme_tags: List[str],
         limit: int = MATCH_SAMPLE_LIMIT,
     ) -> List[Candidate]:
-        cutoff = datetime.now(timezone.utc) - timedelta(hours=ELIGIBLE_RECENCY_HOURS)
-        crisis_cutoff = datetime.now(timezone.utc) - timedelta(hours=CRISIS_WINDOW_HOURS)
         safe_limit = min(max(int(limit), 1), 100)
         day_key = datetime.now(timezone.utc).date().isoformat()
         seed = _candidate_seed(sender_id, day_key)
+        if _candidate_pool_cache.enabled:
+            ensure_listener(
+                self._dsn,
+                CANDIDATE_POOL_CHANNEL,
+                lambda _payload: _candidate_pool_cache.invalidate(),
+            )
+        pool = _candidate_pool_cache.get_or_load(
+            _candidate_pool_key(self._dsn, intensity_bucket, theme_tags),
+            lambda: self._load_candidate_pool(intensity_bucket, theme_tags),
+        )
+        return _sample_candidate_pool(pool, sender_id, seed, safe_limit)
+
+    def _load_candidate_pool(
+        self,
+        intensity_bucket: str,
+        theme_tags: List[str],
+    ) -> tuple[Candidate, ...]:
+        # The bucket pool holds at most CANDIDATE_POOL_MAX_ROWS principals,
+        # most recently active first, and each sender's md5 sample is drawn
+        # from that slice. Buckets larger than the cap therefore only offer
+        # their most recently active principals, where a per-sender query
+        # used to sample every eligible principal.
+        pool_limit = max(int(CANDIDATE_POOL_MAX_ROWS), 1)
+        eligible_pool = get_eligible_pool()
+        if eligible_pool is not None:
+            pool = eligible_pool.load_pool(
+                intensity_bucket, theme_tags, datetime.now(timezone.utc), pool_limit
+            )
+            if pool is not None:
+                return pool
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=ELIGIBLE_RECENCY_HOURS)
+        crisis_cutoff = datetime.now(timezone.utc) - timedelta(hours=CRISIS_WINDOW_HOURS)
         with self._conn() as conn, conn.cursor() as cur:
             if theme_tags:
                 cur.execute(
                     """
                     SELECT principal_id, intensity_bucket, theme_tags
                     FROM eligible_principals
-                    WHERE principal_id != %s
-                      AND intensity_bucket = %s
+                    WHERE intensity_bucket = %s
                       AND last_active_bucket >= %s
                       AND NOT EXISTS (
                         SELECT 1
@@ -1902,17 +2490,15 @@ class PostgresRepository:
                           AND pcs.last_action_at >= %s
                       )
                       AND theme_tags && %s
-                    ORDER BY md5(principal_id || %s)
+                    ORDER BY last_active_bucket DESC, principal_id
                     LIMIT %s
                     """,
                     (
-                        sender_id,
                         intensity_bucket,
                         cutoff,
                         crisis_cutoff,
                         theme_tags,
-                        seed,
-                        safe_limit,
+                        pool_limit,
                     ),
                 )
             else:
@@ -1920,8 +2506,7 @@ class PostgresRepository:
                     """
                     SELECT principal_id, intensity_bucket, theme_tags
                     FROM eligible_principals
-                    WHERE principal_id != %s
-                      AND intensity_bucket = %s
+                    WHERE intensity_bucket = %s
                       AND last_active_bucket >= %s
                       AND NOT EXISTS (
                         SELECT 1
@@ -1929,50 +2514,38 @@ class PostgresRepository:
                         WHERE pcs.principal_id = eligible_principals.principal_id
                           AND pcs.last_action_at >= %s
                       )
-                    ORDER BY md5(principal_id || %s)
+                    ORDER BY last_active_bucket DESC, principal_id
                     LIMIT %s
                     """,
                     (
-                        sender_id,
                         intensity_bucket,
                         cutoff,
                         crisis_cutoff,
-                        seed,
-                        safe_limit,
+                        pool_limit,
                     ),
                 )
             rows = cur.fetchall()
-        return [
+        return tuple(
             Candidate(candidate_id=row[0], intensity=row[1], themes=row[2] or [])
             for row in rows
-        ]
+        )
 
     def get_matching_health(self, principal_id: str, window_days: int = 7) -> MatchingHealth:
-        cutoff = datetime.now(timezone.utc) - timedelta(days=window_days)
+        start_day = _health_window_start_day(datetime.now(timezone.utc), window_days)
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT COUNT(*)
-                FROM inbox_items i
-                JOIN messages m ON m.id = i.message_id
-                WHERE m.origin_device_id = %s
-                  AND i.received_at >= %s
-                """,
-                (principal_id, cutoff),
-            )
-            delivered_count = int(cur.fetchone()[0] or 0)
-            cur.execute(
-                """
-                SELECT COUNT(*)
-                FROM acknowledgements a
-                JOIN messages m ON m.id = a.message_id
-                WHERE m.origin_device_id = %s
-                  AND a.created_at >= %s
-                  AND a.reaction IN ('thanks', 'helpful', 'relate')
+                SELECT COALESCE(SUM(delivered_count), 0),
+                       COALESCE(SUM(positive_ack_count), 0)
+                FROM sender_daily_health
+                WHERE sender_id = %s
+                  AND utc_day >= %s
                 """,
-                (principal_id, cutoff),
+                (principal_id, start_day),
             )
-            positive_ack_count = int(cur.fetchone()[0] or 0)
+            row = cur.fetchone()
+        delivered_count = int(row[0] or 0)
+        positive_ack_count = int(row[1] or 0)
         ratio = _safe_ratio(positive_ack_count, delivered_count)
         return MatchingHealth(
             delivered_count=delivered_count,
@@ -1980,6 +2553,95 @@ class PostgresRepository:
             ratio=ratio,
         )
 
+    def load_principal_context(
+        self,
+        principal_id: str,
+        window_days: int = 7,
+        include_health: bool = True,
+        now: Optional[datetime] = None,
+        include_affinity: bool = True,
+    ) -> PrincipalContext:
+        timestamp = now or datetime.now(timezone.utc)
+        actor_id = _hash_affinity_actor(principal_id)
+        cache_key = (self._dsn, actor_id)
+        generation = _affinity_map_cache.generation()
+        snapshot = _affinity_map_cache.get(cache_key) if include_affinity else None
+        if snapshot is not None and not snapshot.covers(timestamp):
+            snapshot = None
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT
+                  (SELECT last_action_at
+                   FROM principal_crisis_state
+                   WHERE principal_id = %(principal_id)s),
+                  (SELECT last_known_timezone_offset_minutes
+                   FROM eligible_principals
+                   WHERE principal_id = %(principal_id)s),
+                  affinity.theme_ids,
+                  affinity.scores,
+                  affinity.updated_ats,
+                  health.delivered_count,
+                  health.positive_ack_count
+                FROM (
+                  SELECT
+                    SUM(delivered_count) AS delivered_count,
+                    SUM(positive_ack_count) AS positive_ack_count
+                  FROM sender_daily_health
+                  WHERE %(include_health)s
+                    AND sender_id = %(principal_id)s
+                    AND utc_day >= %(start_day)s
+                ) AS health,
+                (
+                  SELECT
+                    array_agg(theme_id) AS theme_ids,
+                    array_agg(decayed) AS scores,
+                    array_agg(updated_at) AS updated_ats
+                  FROM (
+                    SELECT
+                      theme_id,
+                      updated_at,
+                      {_AFFINITY_DECAYED_SCORE_SQL} AS decayed
+                    FROM affinity_scores
+                    WHERE %(include_affinity)s
+                      AND sender_device_id = %(actor_id)s
+                  ) AS decayed_scores
+                  WHERE decayed > 0
+                ) AS affinity
+                """,
+                {
+                    "principal_id": principal_id,
+                    "actor_id": actor_id,
+                    "start_day": _health_window_start_day(timestamp, window_days),
+                    "include_health": include_health,
+                    "include_affinity": include_affinity and snapshot is None,
+                    "decay": float(AFFINITY_DECAY_PER_DAY),
+                    "now": timestamp,
+                },
+            )
+            row = cur.fetchone()
+        crisis_at, offset, theme_ids, scores, updated_ats, delivered, positive = row
+        if include_affinity and snapshot is None:
+            snapshot = _affinity_snapshot(
+                zip(theme_ids or [], scores or [], updated_ats or []),
+                timestamp,
+            )
+            _affinity_map_cache.set_if_unchanged(cache_key, snapshot, generation)
+        delivered_count = int(delivered or 0)
+        positive_ack_count = int(positive or 0)
+        return PrincipalContext(
+            principal_id=principal_id,
+            actor_hash=actor_id,
+            crisis_at=crisis_at,
+            timezone_offset_minutes=offset,
+            affinity_map=snapshot.as_map() if snapshot is not None else {},
+            health=MatchingHealth(
+                delivered_count=delivered_count,
+                positive_ack_count=positive_ack_count,
+                ratio=_safe_ratio(positive_ack_count, delivered_count),
+            ),
+        )
+
     def get_similar_count(
         self,
         principal_id: str,
@@ -1987,8 +2649,46 @@ class PostgresRepository:
         valence: str,
         window_days: int,
     ) -> int:
-        cutoff = datetime.now(timezone.utc) - timedelta(days=window_days)
+        timestamp = datetime.now(timezone.utc)
+        max_age = timedelta(seconds=SIMILAR_COUNT_GRID_MAX_AGE_SECONDS)
         with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT
+                  latest.refreshed_at,
+                  COALESCE(grid.principal_count, 0),
+                  -- CASE keeps the probe off the path that falls back to a live count.
+                  CASE WHEN latest.refreshed_at >= %(fresh_after)s THEN EXISTS (
+                    SELECT 1
+                    FROM mood_events
+                    WHERE device_id = %(principal_id)s
+                      AND theme_tag = %(theme_tag)s
+                      AND valence = %(valence)s
+                      AND risk_level != 2
+                      AND created_at >= latest.window_start
+                      AND created_at <= latest.refreshed_at
+                  ) ELSE false END
+                FROM (
+                  SELECT MAX(refreshed_at) AS refreshed_at, MAX(window_start) AS window_start
+                  FROM similar_count_grid
+                  WHERE window_days = %(window_days)s
+                ) AS latest
+                LEFT JOIN similar_count_grid AS grid
+                  ON grid.window_days = %(window_days)s
+                 AND grid.theme_tag = %(theme_tag)s
+                 AND grid.valence = %(valence)s
+                """,
+                {
+                    "principal_id": principal_id,
+                    "theme_tag": theme_tag,
+                    "valence": valence,
+                    "window_days": window_days,
+                    "fresh_after": timestamp - max_age,
+                },
+            )
+            refreshed_at, cell_count, self_included = cur.fetchone()
+            if refreshed_at is not None and refreshed_at >= timestamp - max_age:
+                return max(0, int(cell_count) - (1 if self_included else 0))
             cur.execute(
                 """
                 SELECT COUNT(DISTINCT device_id)
@@ -1999,12 +2699,133 @@ class PostgresRepository:
                   AND device_id != %s
                   AND created_at >= %s
                 """,
-                (theme_tag, valence, principal_id, cutoff),
+                (theme_tag, valence, principal_id, timestamp - timedelta(days=window_days)),
             )
             row = cur.fetchone()
         return int(row[0] or 0)
 
-    def record_security_event(self, record: SecurityEventRecord) -> None:
+    def refresh_similar_count_grid(
+        self,
+        window_days: int,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, object]:
+        timestamp = now or datetime.now(timezone.utc)
+        window_start = timestamp - timedelta(days=window_days)
+        with self._conn() as conn, conn.cursor() as cur:
+            # Every API process runs this refresh; one rebuild at a time is
+            # enough, and two would collide on the re-inserted keys.
+            cur.execute(
+                "SELECT pg_try_advisory_xact_lock(hashtext('similar_count_grid'), %s)",
+                (window_days,),
+            )
+            if not cur.fetchone()[0]:
+                return {"window_days": window_days, "cells": 0, "skipped": True}
+            cur.execute(
+                "DELETE FROM similar_count_grid WHERE window_days = %s",
+                (window_days,),
+            )
+            cur.execute(
+                """
+                INSERT INTO similar_count_grid
+                  (window_days, theme_tag, valence, principal_count, window_start, refreshed_at)
+                SELECT
+                  %(window_days)s,
+                  theme_tag,
+                  valence,
+                  COUNT(DISTINCT device_id),
+                  %(window_start)s,
+                  %(now)s
+                FROM mood_events
+                WHERE theme_tag IS NOT NULL
+                  AND risk_level != 2
+                  AND created_at >= %(window_start)s
+                  AND created_at <= %(now)s
+                GROUP BY theme_tag, valence
+                """,
+                {"window_days": window_days, "window_start": window_start, "now": timestamp},
+            )
+            cells = cur.rowcount or 0
+        return {"window_days": window_days, "cells": int(cells), "skipped": False}
+
+    def add_distinct_values(
+        self,
+        dimension: str,
+        day: datetime.date,
+        values: List[str],
+    ) -> None:
+        if not values:
+            return
+        key_id = hash_key_id()
+        with self._conn() as conn, conn.cursor() as cur:
+            # Seed the row first so concurrent writers serialize on FOR UPDATE.
+            cur.execute(
+                """
+                INSERT INTO distinct_sketches (dimension, utc_day, sketch, updated_at, key_id)
+                VALUES (%s, %s, %s, now(), %s)
+                ON CONFLICT (dimension, utc_day) DO NOTHING
+                """,
+                (dimension, day, HyperLogLog().to_bytes(), key_id),
+            )
+            cur.execute(
+                """
+                SELECT sketch, key_id
+                FROM distinct_sketches
+                WHERE dimension = %s AND utc_day = %s
+                FOR UPDATE
+                """,
+                (dimension, day),
+            )
+            stored, stored_key_id = cur.fetchone()
+            # A sketch hashed under another key cannot be extended; start over.
+            sketch = (
+                HyperLogLog.from_bytes(bytes(stored))
+                if stored_key_id == key_id
+                else HyperLogLog()
+            )
+            sketch.update(values)
+            cur.execute(
+                """
+                UPDATE distinct_sketches
+                SET sketch = %s, key_id = %s, updated_at = now()
+                WHERE dimension = %s AND utc_day = %s
+                """,
+                (sketch.to_bytes(), key_id, dimension, day),
+            )
+
+    def count_distinct_window(
+        self,
+        dimension: str,
+        end_day: datetime.date,
+        window_days: int,
+    ) -> int:
+        start_day = end_day - timedelta(days=window_days - 1)
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT sketch
+                FROM distinct_sketches
+                WHERE dimension = %s
+                  AND utc_day BETWEEN %s AND %s
+                  AND key_id = %s
+                """,
+                (dimension, start_day, end_day, hash_key_id()),
+            )
+            rows = cur.fetchall()
+        return union(HyperLogLog.from_bytes(bytes(row[0])) for row in rows).count()
+
+    def sketch_mood_principals(self, day: datetime.date) -> int:
+        # Re-adding the same ids is a no-op for the registers, so a day can be
+        # sketched repeatedly while it is still filling up.
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT principal_id FROM mood_daily_rollups WHERE utc_day = %s",
+                (day,),
+            )
+            principals = [row[0] for row in cur.fetchall()]
+        self.add_distinct_values(MOOD_PRINCIPALS_DIMENSION, day, principals)
+        return len(principals)
+
+    def record_security_event(self, record: SecurityEventRecord) -> None:
         with self._conn() as conn, conn.cursor() as cur:
             meta_payload = record.meta or {}
             from psycopg.types.json import Json
@@ -2025,15 +2846,8 @@ class PostgresRepository:
         days = retention_days if retention_days is not None else SECURITY_EVENTS_RETENTION_DAYS
         cutoff = now - timedelta(days=days)
         with self._conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                DELETE FROM security_events
-                WHERE created_at < %s
-                """,
-                (cutoff,),
-            )
-            deleted = cur.rowcount or 0
-        return int(deleted)
+            deleted = _prune_event_partitions(cur, "security_events", cutoff)
+        return deleted
 
     def cleanup_second_touch_events(
         self,
@@ -2042,15 +2856,73 @@ class PostgresRepository:
     ) -> int:
         cutoff = now_utc - timedelta(days=retention_days)
         with self._conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                DELETE FROM second_touch_events
-                WHERE created_at < %s
-                """,
-                (cutoff,),
-            )
-            deleted = cur.rowcount or 0
-        return int(deleted)
+            deleted = _prune_event_partitions(cur, "second_touch_events", cutoff)
+        return deleted
+
+    def drop_expired_partitions(
+        self,
+        table: str,
+        retention_days: int,
+        now_utc: datetime,
+    ) -> int:
+        if table not in PARTITIONED_EVENT_TABLES:
+            return 0
+        cutoff = _retention_cutoff(table, retention_days, now_utc)
+        with self._conn() as conn, conn.cursor() as cur:
+            dropped = _drop_event_partitions(cur, table, cutoff)
+        return dropped
+
+    def delete_expired_batch(
+        self,
+        table: str,
+        retention_days: int,
+        now_utc: datetime,
+        batch_size: int,
+    ) -> int:
+        column = sql.Identifier(RETENTION_COLUMNS[table])
+        cutoff = _retention_cutoff(table, retention_days, now_utc)
+        remaining = batch_size
+        # Each call commits on its own, so an interrupted run simply resumes
+        # from whatever is still older than the cutoff.
+        with self._conn() as conn, conn.cursor() as cur:
+            for target in _retention_delete_targets(cur, table, cutoff):
+                relation = sql.Identifier(target)
+                cur.execute(
+                    sql.SQL(
+                        """
+                        DELETE FROM {relation}
+                        WHERE ctid = ANY(ARRAY(
+                          SELECT ctid FROM {relation} WHERE {column} < %(cutoff)s
+                          LIMIT %(limit)s
+                        ))
+                          AND {column} < %(cutoff)s
+                        """
+                    ).format(relation=relation, column=column),
+                    {"cutoff": cutoff, "limit": remaining},
+                )
+                remaining -= int(cur.rowcount or 0)
+                if remaining <= 0:
+                    break
+        return batch_size - remaining
+
+    def ensure_event_partitions(
+        self,
+        now: Optional[datetime] = None,
+        days_ahead: int = EVENT_PARTITION_DAYS_AHEAD,
+        days_back: int = 0,
+    ) -> Dict[str, int]:
+        today = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).date()
+        days = [today + timedelta(days=offset) for offset in range(-days_back, days_ahead + 1)]
+        created: Dict[str, int] = {}
+        for table in PARTITIONED_EVENT_TABLES:
+            with self._conn() as conn, conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (table,))
+                existing = set(_event_partition_days(cur, table))
+                missing = [day for day in days if day not in existing]
+                for day in missing:
+                    _create_event_partition(cur, table, day)
+            created[table] = len(missing)
+        return created
 
     def cleanup_daily_ack_aggregates(
         self,
@@ -2069,69 +2941,99 @@ class PostgresRepository:
             deleted = cur.rowcount or 0
         return int(deleted)
 
+    def compact_daily_ack_aggregates(self, before_day: datetime.date) -> Dict[str, int]:
+        with self._conn() as conn, conn.cursor() as cur:
+            # Delete and re-add happen in one statement, so readers summing
+            # shards never see a day's totals change.
+            cur.execute(
+                """
+                WITH folded AS (
+                  DELETE FROM daily_ack_aggregates
+                  WHERE utc_day < %s AND shard <> 0
+                  RETURNING utc_day, theme_id, delivered_count, positive_ack_count,
+                            peer_delivered_count, peer_positive_ack_count
+                ),
+                merged AS (
+                  INSERT INTO daily_ack_aggregates
+                    (utc_day, theme_id, shard, delivered_count, positive_ack_count,
+                     peer_delivered_count, peer_positive_ack_count, updated_at)
+                  SELECT utc_day, theme_id, 0, SUM(delivered_count), SUM(positive_ack_count),
+                         SUM(peer_delivered_count), SUM(peer_positive_ack_count), now()
+                  FROM folded
+                  GROUP BY utc_day, theme_id
+                  ON CONFLICT (utc_day, theme_id, shard)
+                  DO UPDATE SET
+                    delivered_count =
+                      daily_ack_aggregates.delivered_count + EXCLUDED.delivered_count,
+                    positive_ack_count =
+                      daily_ack_aggregates.positive_ack_count + EXCLUDED.positive_ack_count,
+                    peer_delivered_count =
+                      daily_ack_aggregates.peer_delivered_count + EXCLUDED.peer_delivered_count,
+                    peer_positive_ack_count =
+                      daily_ack_aggregates.peer_positive_ack_count
+                      + EXCLUDED.peer_positive_ack_count,
+                    updated_at = now()
+                  RETURNING 1
+                )
+                SELECT (SELECT COUNT(*) FROM folded), (SELECT COUNT(*) FROM merged)
+                """,
+                (before_day,),
+            )
+            folded, merged = cur.fetchone()
+        return {"rows_folded": int(folded or 0), "rows_merged": int(merged or 0)}
+
     def get_retention_report(
         self,
         now_utc: datetime,
         retention_days: Dict[str, int],
+        fast: bool = False,
     ) -> Dict[str, Dict[str, int]]:
-        report: Dict[str, Dict[str, int]] = {}
-        with self._conn() as conn, conn.cursor() as cur:
-            security_cutoff = now_utc - timedelta(days=retention_days["security_events"])
-            cur.execute("SELECT COUNT(*) FROM security_events")
-            security_total = int(cur.fetchone()[0] or 0)
-            cur.execute(
-                "SELECT COUNT(*) FROM security_events WHERE created_at < %s",
-                (security_cutoff,),
-            )
-            security_expired = int(cur.fetchone()[0] or 0)
-            report["security_events"] = {
-                "total_rows": security_total,
-                "expired_rows": security_expired,
-                "cutoff_days": retention_days["security_events"],
-            }
-
-            events_cutoff = now_utc - timedelta(days=retention_days["second_touch_events"])
-            cur.execute("SELECT COUNT(*) FROM second_touch_events")
-            events_total = int(cur.fetchone()[0] or 0)
-            cur.execute(
-                "SELECT COUNT(*) FROM second_touch_events WHERE created_at < %s",
-                (events_cutoff,),
-            )
-            events_expired = int(cur.fetchone()[0] or 0)
-            report["second_touch_events"] = {
-                "total_rows": events_total,
-                "expired_rows": events_expired,
-                "cutoff_days": retention_days["second_touch_events"],
-            }
-
-            agg_cutoff = now_utc.date() - timedelta(
-                days=retention_days["second_touch_daily_aggregates"]
+        # One scan per table; fast mode swaps the total for the planner's
+        # reltuples estimate (summed over partitions) and keeps the expired
+        # count exact, since that is what ttl_drift is decided on.
+        if fast:
+            total_sql = sql.SQL(
+                """
+                SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint
+                FROM pg_class c
+                WHERE c.oid = to_regclass({name})
+                   OR c.oid IN (
+                     SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass({name})
+                   )
+                """
             )
-            cur.execute("SELECT COUNT(*) FROM second_touch_daily_aggregates")
-            agg_total = int(cur.fetchone()[0] or 0)
-            cur.execute(
-                "SELECT COUNT(*) FROM second_touch_daily_aggregates WHERE utc_day < %s",
-                (agg_cutoff,),
-            )
-            agg_expired = int(cur.fetchone()[0] or 0)
-            report["second_touch_daily_aggregates"] = {
-                "total_rows": agg_total,
-                "expired_rows": agg_expired,
-                "cutoff_days": retention_days["second_touch_daily_aggregates"],
-            }
-
-            ack_cutoff = now_utc.date() - timedelta(days=retention_days["daily_ack_aggregates"])
-            cur.execute("SELECT COUNT(*) FROM daily_ack_aggregates")
-            ack_total = int(cur.fetchone()[0] or 0)
-            cur.execute(
-                "SELECT COUNT(*) FROM daily_ack_aggregates WHERE utc_day < %s",
-                (ack_cutoff,),
-            )
-            ack_expired = int(cur.fetchone()[0] or 0)
-            report["daily_ack_aggregates"] = {
-                "total_rows": ack_total,
-                "expired_rows": ack_expired,
-                "cutoff_days": retention_days["daily_ack_aggregates"],
+            table_sql = sql.SQL(
+                "SELECT {name}, ({total}), COUNT(*) FROM {table} WHERE {column} < {cutoff}"
+            )
+        else:
+            total_sql = sql.SQL("")
+            table_sql = sql.SQL(
+                "SELECT {name}, COUNT(*), COUNT(*) FILTER (WHERE {column} < {cutoff}) "
+                "FROM {table}"
+            )
+        queries = []
+        params = []
+        for table, column in RETENTION_COLUMNS.items():
+            queries.append(
+                table_sql.format(
+                    name=sql.Literal(table),
+                    total=total_sql.format(name=sql.Literal(table)),
+                    table=sql.Identifier(table),
+                    column=sql.Identifier(column),
+                    cutoff=sql.Placeholder(),
+                )
+            )
+            params.append(_retention_cutoff(table, retention_days[table], now_utc))
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(sql.SQL(" UNION ALL ").join(queries), params)
+            rows = {row[0]: row for row in cur.fetchall()}
+        report: Dict[str, Dict[str, int]] = {}
+        for table in RETENTION_COLUMNS:
+            _, total, expired = rows[table]
+            report[table] = {
+                "total_rows": max(int(total or 0), int(expired or 0)),
+                "expired_rows": int(expired or 0),
+                "cutoff_days": retention_days[table],
             }
         return report
 
@@ -2145,9 +3047,10 @@ class PostgresRepository:
             if theme_id is None:
                 cur.execute(
                     """
-                    SELECT utc_day, theme_id, delivered_count, positive_ack_count
+                    SELECT utc_day, theme_id, SUM(delivered_count), SUM(positive_ack_count)
                     FROM daily_ack_aggregates
                     WHERE utc_day >= %s
+                    GROUP BY utc_day, theme_id
                     ORDER BY utc_day DESC, theme_id
                     """,
                     (cutoff,),
@@ -2155,9 +3058,10 @@ class PostgresRepository:
             else:
                 cur.execute(
                     """
-                    SELECT utc_day, theme_id, delivered_count, positive_ack_count
+                    SELECT utc_day, theme_id, SUM(delivered_count), SUM(positive_ack_count)
                     FROM daily_ack_aggregates
                     WHERE utc_day >= %s AND theme_id = %s
+                    GROUP BY utc_day, theme_id
                     ORDER BY utc_day DESC, theme_id
                     """,
                     (cutoff, _normalize_theme_id(theme_id)),
@@ -2179,32 +3083,49 @@ class PostgresRepository:
         counter_key: str,
         amount: int = 1,
     ) -> None:
-        with self._conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO second_touch_daily_aggregates
-                (utc_day, counter_key, count)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (utc_day, counter_key)
-                DO UPDATE SET
-                  count = second_touch_daily_aggregates.count + EXCLUDED.count
-                """,
-                (day_key, counter_key, amount),
-            )
+        self._record_second_touch_counters([(day_key, counter_key, amount)])
+
+    def _record_second_touch_counters(self, increments: List[tuple[str, str, int]]) -> None:
+        created_at = datetime.now(timezone.utc)
+        events = []
+        for day_key, counter_key, _ in increments:
             event = _event_from_counter_key(counter_key)
             if event:
-                event_type, reason = event
-                try:
-                    cur.execute(
-                        """
-                        INSERT INTO second_touch_events
-                          (event_day_utc, event_type, reason, created_at)
-                        VALUES (%s, %s, %s, now())
-                        """,
-                        (day_key, event_type, reason),
-                    )
-                except Exception:
-                    pass
+                events.append((day_key, event[0], event[1], created_at))
+        sink = get_second_touch_counter_sink(self._dsn, self._flush_second_touch_counters)
+        if sink is not None:
+            sink.record(increments, events)
+        else:
+            self._flush_second_touch_counters(merge_counter_increments(increments), events)
+
+    def _flush_second_touch_counters(
+        self,
+        increments: List[tuple[str, str, int]],
+        events: List[tuple[str, str, Optional[str], datetime]],
+    ) -> None:
+        with self._conn() as conn, conn.cursor() as cur:
+            if increments:
+                values = ", ".join(["(%s::date, %s, %s)"] * len(increments))
+                cur.execute(
+                    f"""
+                    INSERT INTO second_touch_daily_aggregates
+                    (utc_day, counter_key, count)
+                    VALUES {values}
+                    ON CONFLICT (utc_day, counter_key)
+                    DO UPDATE SET
+                      count = second_touch_daily_aggregates.count + EXCLUDED.count
+                    """,
+                    [value for increment in increments for value in increment],
+                )
+            if events:
+                with cur.copy(
+                    """
+                    COPY second_touch_events (event_day_utc, event_type, reason, created_at)
+                    FROM STDIN
+                    """
+                ) as copy:
+                    for event in events:
+                        copy.write_row(event)
 
     def get_second_touch_counters(self, window_days: int) -> Dict[str, int]:
         cutoff = datetime.now(timezone.utc).date() - timedelta(days=max(window_days - 1, 0))
@@ -2244,58 +3165,95 @@ class PostgresRepository:
         end_day_utc: datetime.date,
     ) -> Dict[str, object]:
         try:
+            # Dirty marks are left for the incremental recompute, which knows
+            # how to re-check days that had writers in flight.
             with self._conn() as conn, conn.cursor() as cur:
-                cur.execute(
-                    """
-                    DELETE FROM second_touch_daily_aggregates
-                    WHERE utc_day BETWEEN %s AND %s
-                    """,
-                    (start_day_utc, end_day_utc),
+                days_written = _rebuild_second_touch_days(
+                    cur, "BETWEEN %s AND %s", (start_day_utc, end_day_utc)
                 )
+            return {
+                "days_written": days_written,
+                "recompute_partial": False,
+                "reason": None,
+            }
+        except Exception:
+            return {
+                "days_written": 0,
+                "recompute_partial": True,
+                "reason": "events_missing",
+            }
+
+    def recompute_dirty_second_touch_days(self, limit: int = 31) -> Dict[str, object]:
+        try:
+            with self._conn() as conn, conn.cursor() as cur:
+                # Marks are inserted with DO NOTHING, so a writer still in
+                # flight when a day is claimed leaves no mark of its own. Only
+                # marks older than the grace period are claimed, and every
+                # rebuilt day is re-marked with rebuilt_at. A re-marked day is
+                # rebuilt again only if events created after rebuilt_at minus
+                # the grace period exist by then, which covers any writer
+                # that was in flight during the rebuild.
                 cur.execute(
                     """
-                    SELECT event_day_utc, event_type, reason, COUNT(*)
-                    FROM second_touch_events
-                    WHERE event_day_utc BETWEEN %s AND %s
-                    GROUP BY event_day_utc, event_type, reason
+                    WITH claimed AS (
+                      DELETE FROM second_touch_dirty_days
+                      WHERE utc_day IN (
+                        SELECT utc_day
+                        FROM second_touch_dirty_days
+                        WHERE marked_at < now() - make_interval(secs => %(grace)s)
+                        ORDER BY utc_day DESC
+                        LIMIT %(limit)s
+                        FOR UPDATE SKIP LOCKED
+                      )
+                      RETURNING utc_day, rebuilt_at
+                    )
+                    SELECT claimed.utc_day
+                    FROM claimed
+                    WHERE claimed.rebuilt_at IS NULL
+                       OR EXISTS (
+                         SELECT 1
+                         FROM second_touch_events events
+                         WHERE events.event_day_utc = claimed.utc_day
+                           AND events.created_at
+                             > claimed.rebuilt_at - make_interval(secs => %(grace)s)
+                       )
                     """,
-                    (start_day_utc, end_day_utc),
+                    {"grace": SECOND_TOUCH_DIRTY_GRACE_SECONDS, "limit": limit},
                 )
-                rows = cur.fetchall()
-
-                counts: Dict[tuple[datetime.date, str], int] = {}
-                days_written = set()
-                for event_day, event_type, reason, count in rows:
-                    counter_key = _counter_key_from_event(str(event_type), reason)
-                    if counter_key is None:
-                        continue
-                    counts[(event_day, counter_key)] = (
-                        counts.get((event_day, counter_key), 0) + int(count or 0)
-                    )
-                    days_written.add(event_day)
-
-                inserts = [(day, key, count) for (day, key), count in counts.items()]
-                if inserts:
-                    cur.executemany(
+                days = [row[0] for row in cur.fetchall()]
+                days_written = 0
+                if days:
+                    days_written = _rebuild_second_touch_days(cur, "= ANY(%s)", (days,))
+                    cur.execute(
                         """
-                        INSERT INTO second_touch_daily_aggregates
-                          (utc_day, counter_key, count)
-                        VALUES (%s, %s, %s)
-                        ON CONFLICT (utc_day, counter_key)
-                        DO UPDATE SET count = EXCLUDED.count
+                        INSERT INTO second_touch_dirty_days (utc_day, marked_at, rebuilt_at)
+                        SELECT day, now(), now()
+                        FROM unnest(%s::date[]) AS day
+                        ON CONFLICT (utc_day) DO NOTHING
                         """,
-                        inserts,
+                        (days,),
                     )
-
-            days_written = {day for day in days_written}
+                cur.execute(
+                    """
+                    SELECT COUNT(*)
+                    FROM second_touch_dirty_days
+                    WHERE marked_at < now() - make_interval(secs => %s)
+                    """,
+                    (SECOND_TOUCH_DIRTY_GRACE_SECONDS,),
+                )
+                remaining = int(cur.fetchone()[0] or 0)
             return {
-                "days_written": len(days_written),
-                "recompute_partial": False,
-                "reason": None,
+                "dirty_days": len(days),
+                "days_written": days_written,
+                "remaining": remaining,
+                "recompute_partial": remaining > 0,
+                "reason": "dirty_days_remaining" if remaining else None,
             }
         except Exception:
             return {
+                "dirty_days": 0,
                 "days_written": 0,
+                "remaining": 0,
                 "recompute_partial": True,
                 "reason": "events_missing",
             }
@@ -2307,22 +3265,122 @@ class PostgresRepository:
         theme_id: str,
         delivered_delta: int,
         positive_delta: int,
+        peer: bool = False,
     ) -> None:
         cur.execute(
             """
             INSERT INTO daily_ack_aggregates
-              (utc_day, theme_id, delivered_count, positive_ack_count, updated_at)
-            VALUES (%s, %s, %s, %s, now())
-            ON CONFLICT (utc_day, theme_id)
+              (utc_day, theme_id, shard, delivered_count, positive_ack_count,
+               peer_delivered_count, peer_positive_ack_count, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, now())
+            ON CONFLICT (utc_day, theme_id, shard)
             DO UPDATE SET
               delivered_count = daily_ack_aggregates.delivered_count + EXCLUDED.delivered_count,
               positive_ack_count = daily_ack_aggregates.positive_ack_count + EXCLUDED.positive_ack_count,
+              peer_delivered_count =
+                daily_ack_aggregates.peer_delivered_count + EXCLUDED.peer_delivered_count,
+              peer_positive_ack_count =
+                daily_ack_aggregates.peer_positive_ack_count + EXCLUDED.peer_positive_ack_count,
+              updated_at = now()
+            """,
+            (
+                day_key,
+                theme_id,
+                _daily_ack_shard(),
+                delivered_delta,
+                positive_delta,
+                delivered_delta if peer else 0,
+                positive_delta if peer else 0,
+            ),
+        )
+
+    def _increment_sender_daily_health(
+        self,
+        cur,
+        sender_id: str,
+        day_key: str,
+        delivered_delta: int,
+        positive_delta: int,
+    ) -> None:
+        cur.execute(
+            """
+            INSERT INTO sender_daily_health
+              (sender_id, utc_day, delivered_count, positive_ack_count, updated_at)
+            VALUES (%s, %s, %s, %s, now())
+            ON CONFLICT (sender_id, utc_day)
+            DO UPDATE SET
+              delivered_count = sender_daily_health.delivered_count + EXCLUDED.delivered_count,
+              positive_ack_count = sender_daily_health.positive_ack_count + EXCLUDED.positive_ack_count,
               updated_at = now()
             """,
-            (day_key, theme_id, delivered_delta, positive_delta),
+            (sender_id, day_key, delivered_delta, positive_delta),
         )
 
+    def rebuild_sender_daily_health(
+        self, start_day: datetime.date, end_day: datetime.date
+    ) -> Dict[str, object]:
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                DELETE FROM sender_daily_health
+                WHERE utc_day BETWEEN %s AND %s
+                """,
+                (start_day, end_day),
+            )
+            cur.execute(
+                f"""
+                INSERT INTO sender_daily_health
+                  (sender_id, utc_day, delivered_count, positive_ack_count, updated_at)
+                SELECT sender_id, utc_day, delivered_count, positive_ack_count, now()
+                FROM ({_RAW_SENDER_DAILY_HEALTH_SQL}) AS raw
+                """,
+                {"start_day": start_day, "end_day": end_day},
+            )
+            rows_written = cur.rowcount or 0
+        return {
+            "days": (end_day - start_day).days + 1,
+            "rows_written": int(rows_written),
+        }
+
+    def verify_sender_daily_health(
+        self, start_day: datetime.date, end_day: datetime.date
+    ) -> Dict[str, object]:
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT COUNT(*), COUNT(*) FILTER (
+                  WHERE COALESCE(raw.delivered_count, 0) <> COALESCE(agg.delivered_count, 0)
+                     OR COALESCE(raw.positive_ack_count, 0) <> COALESCE(agg.positive_ack_count, 0)
+                )
+                FROM ({_RAW_SENDER_DAILY_HEALTH_SQL}) AS raw
+                FULL OUTER JOIN (
+                  SELECT sender_id, utc_day, delivered_count, positive_ack_count
+                  FROM sender_daily_health
+                  WHERE utc_day BETWEEN %(start_day)s AND %(end_day)s
+                ) AS agg
+                  ON agg.sender_id = raw.sender_id AND agg.utc_day = raw.utc_day
+                """,
+                {"start_day": start_day, "end_day": end_day},
+            )
+            checked, mismatched = cur.fetchone()
+        return {
+            "days": (end_day - start_day).days + 1,
+            "rows_checked": int(checked or 0),
+            "rows_mismatched": int(mismatched or 0),
+        }
+
     def get_matching_tuning(self) -> MatchingTuning:
+        if not _matching_tuning_cache.enabled:
+            return self._load_matching_tuning()
+        dsn = self._dsn
+        ensure_listener(
+            dsn,
+            MATCHING_TUNING_CHANNEL,
+            lambda _payload: _matching_tuning_cache.invalidate(dsn),
+        )
+        return _matching_tuning_cache.get_or_load(dsn, self._load_matching_tuning)
+
+    def _load_matching_tuning(self) -> MatchingTuning:
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
@@ -2371,33 +3429,26 @@ class PostgresRepository:
                     now,
                 ),
             )
+            cur.execute(
+                sql.SQL("NOTIFY {}").format(sql.Identifier(MATCHING_TUNING_CHANNEL))
+            )
+        _matching_tuning_cache.invalidate(self._dsn)
 
     def get_global_matching_health(self, window_days: int = 7) -> MatchingHealth:
-        cutoff = datetime.now(timezone.utc) - timedelta(days=window_days)
+        start_day = _health_window_start_day(datetime.now(timezone.utc), window_days)
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT COUNT(*)
-                FROM inbox_items i
-                JOIN messages m ON i.message_id = m.id
-                WHERE i.received_at >= %s
-                  AND m.origin_device_id != %s
-                """,
-                (cutoff, SYSTEM_SENDER_ID),
-            )
-            delivered_count = int(cur.fetchone()[0] or 0)
-            cur.execute(
-                """
-                SELECT COUNT(*)
-                FROM acknowledgements a
-                JOIN messages m ON a.message_id = m.id
-                WHERE a.created_at >= %s
-                  AND a.reaction IN ('helpful', 'thanks', 'relate')
-                  AND m.origin_device_id != %s
+                SELECT COALESCE(SUM(peer_delivered_count), 0),
+                       COALESCE(SUM(peer_positive_ack_count), 0)
+                FROM daily_ack_aggregates
+                WHERE utc_day >= %s
                 """,
-                (cutoff, SYSTEM_SENDER_ID),
+                (start_day,),
             )
-            positive_ack_count = int(cur.fetchone()[0] or 0)
+            row = cur.fetchone()
+        delivered_count = int(row[0] or 0)
+        positive_ack_count = int(row[1] or 0)
         ratio = _safe_ratio(positive_ack_count, delivered_count)
         return MatchingHealth(
             delivered_count=delivered_count,
@@ -2405,6 +3456,64 @@ class PostgresRepository:
             ratio=ratio,
         )
 
+    def verify_daily_ack_aggregates(
+        self, start_day: datetime.date, end_day: datetime.date
+    ) -> Dict[str, object]:
+        with self._conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT COUNT(*), COUNT(*) FILTER (
+                  WHERE COALESCE(raw.delivered_count, 0) <> COALESCE(agg.delivered_count, 0)
+                     OR COALESCE(raw.positive_ack_count, 0) <> COALESCE(agg.positive_ack_count, 0)
+                )
+                FROM (
+                  SELECT COALESCE(d.utc_day, p.utc_day) AS utc_day,
+                         d.delivered_count,
+                         p.positive_ack_count
+                  FROM (
+                    SELECT (i.received_at AT TIME ZONE 'UTC')::date AS utc_day,
+                           COUNT(*) AS delivered_count
+                    FROM inbox_items i
+                    JOIN messages m ON m.id = i.message_id
+                    WHERE m.origin_device_id != %(system_sender)s
+                      AND (i.received_at AT TIME ZONE 'UTC')::date
+                          BETWEEN %(start_day)s AND %(end_day)s
+                    GROUP BY 1
+                  ) AS d
+                  FULL OUTER JOIN (
+                    SELECT (a.created_at AT TIME ZONE 'UTC')::date AS utc_day,
+                           COUNT(*) AS positive_ack_count
+                    FROM acknowledgements a
+                    JOIN messages m ON m.id = a.message_id
+                    WHERE m.origin_device_id != %(system_sender)s
+                      AND a.reaction IN ('helpful', 'thanks', 'relate')
+                      AND (a.created_at AT TIME ZONE 'UTC')::date
+                          BETWEEN %(start_day)s AND %(end_day)s
+                    GROUP BY 1
+                  ) AS p ON p.utc_day = d.utc_day
+                ) AS raw
+                FULL OUTER JOIN (
+                  SELECT utc_day,
+                         SUM(peer_delivered_count) AS delivered_count,
+                         SUM(peer_positive_ack_count) AS positive_ack_count
+                  FROM daily_ack_aggregates
+                  WHERE utc_day BETWEEN %(start_day)s AND %(end_day)s
+                  GROUP BY utc_day
+                ) AS agg ON agg.utc_day = raw.utc_day
+                """,
+                {
+                    "start_day": start_day,
+                    "end_day": end_day,
+                    "system_sender": SYSTEM_SENDER_ID,
+                },
+            )
+            checked, mismatched = cur.fetchone()
+        return {
+            "days": (end_day - start_day).days + 1,
+            "days_checked": int(checked or 0),
+            "days_mismatched": int(mismatched or 0),
+        }
+
     def get_or_create_finite_content(
         self,
         principal_id: str,
@@ -2467,9 +3576,7 @@ class PostgresRepository:
             )
             for item in self.list_inbox_items(recipient_id)
         ]
-        now = datetime.now(timezone.utc)
-        if not any(offer.state == "available" for offer in self.list_second_touch_offers(recipient_id)):
-            self._maybe_create_second_touch_offer(recipient_id, now)
+        # Offers are generated by generate_second_touch_offers; /inbox only reads.
         for offer in self.list_second_touch_offers(recipient_id):
             if offer.state != "available":
                 continue
@@ -2610,21 +3717,28 @@ class PostgresRepository:
     def update_second_touch_pair_positive(
         self, sender_id: str, recipient_id: str, now: datetime
     ) -> None:
-        a_id, b_id = _pair_key(sender_id, recipient_id)
         with self._conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO second_touch_pairs
-                (sender_id, recipient_id, positive_count, first_positive_at, last_positive_at)
-                VALUES (%s, %s, 1, %s, %s)
-                ON CONFLICT (sender_id, recipient_id)
-                DO UPDATE SET
-                  positive_count = second_touch_pairs.positive_count + 1,
-                  last_positive_at = EXCLUDED.last_positive_at,
-                  first_positive_at = COALESCE(second_touch_pairs.first_positive_at, EXCLUDED.first_positive_at)
-                """,
-                (a_id, b_id, now, now),
-            )
+            self._upsert_second_touch_pair_positive(cur, sender_id, recipient_id, now)
+
+    def _upsert_second_touch_pair_positive(
+        self, cur, sender_id: str, recipient_id: str, now: datetime
+    ) -> None:
+        a_id, b_id = _pair_key(sender_id, recipient_id)
+        cur.execute(
+            """
+            INSERT INTO second_touch_pairs
+            (sender_id, recipient_id, positive_count, first_positive_at, last_positive_at,
+             next_check_at)
+            VALUES (%s, %s, 1, %s, %s, now())
+            ON CONFLICT (sender_id, recipient_id)
+            DO UPDATE SET
+              positive_count = second_touch_pairs.positive_count + 1,
+              last_positive_at = EXCLUDED.last_positive_at,
+              first_positive_at = COALESCE(second_touch_pairs.first_positive_at, EXCLUDED.first_positive_at),
+              next_check_at = now()
+            """,
+            (a_id, b_id, now, now),
+        )
 
     def block_second_touch_pair(
         self,
@@ -2643,129 +3757,218 @@ class PostgresRepository:
             cur.execute(
                 """
                 INSERT INTO second_touch_pairs
-                (sender_id, recipient_id, disabled_until, disabled_permanent, identity_leak_blocked)
-                VALUES (%s, %s, %s, %s, %s)
+                (sender_id, recipient_id, disabled_until, disabled_permanent, identity_leak_blocked,
+                 next_check_at)
+                VALUES (%s, %s, %s, %s, %s, now())
                 ON CONFLICT (sender_id, recipient_id)
                 DO UPDATE SET
                   disabled_until = COALESCE(EXCLUDED.disabled_until, second_touch_pairs.disabled_until),
                   disabled_permanent = second_touch_pairs.disabled_permanent OR EXCLUDED.disabled_permanent,
-                  identity_leak_blocked = second_touch_pairs.identity_leak_blocked OR EXCLUDED.identity_leak_blocked
+                  identity_leak_blocked = second_touch_pairs.identity_leak_blocked OR EXCLUDED.identity_leak_blocked,
+                  next_check_at = now()
                 """,
                 (a_id, b_id, until, permanent, permanent),
             )
 
-    def _maybe_create_second_touch_offer(self, recipient_id: str, now: datetime) -> None:
-        day_key = _utc_day_key(now)
+    def generate_second_touch_offers(
+        self,
+        now: Optional[datetime] = None,
+        limit: int = 500,
+    ) -> Dict[str, int]:
+        timestamp = now or datetime.now(timezone.utc)
+        day_key = _utc_day_key(timestamp)
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
-                """
-                SELECT sender_id, recipient_id, positive_count, first_positive_at, last_positive_at,
-                       last_offer_at, disabled_until, disabled_permanent
-                FROM second_touch_pairs
-                WHERE sender_id = %s OR recipient_id = %s
-                """,
-                (recipient_id, recipient_id),
+                _SECOND_TOUCH_DUE_PAIRS_SQL,
+                {
+                    "now": timestamp,
+                    "limit": limit,
+                    "lease_until": timestamp + timedelta(minutes=SECOND_TOUCH_RECHECK_MINUTES),
+                    "crisis_cutoff": timestamp - timedelta(hours=CRISIS_WINDOW_HOURS),
+                    "month_cutoff": timestamp - timedelta(days=30),
+                    "cooldown_cutoff": timestamp - timedelta(days=SECOND_TOUCH_COOLDOWN_DAYS),
+                },
             )
             rows = cur.fetchall()
+        offers = 0
+        updates = []
+        increments = []
+        # The stats in each row predate the sweep; fold in offers created so
+        # far so a recipient with several due pairs is capped correctly.
+        created: Dict[str, int] = {}
         for row in rows:
-            a_id, b_id = row[0], row[1]
-            counterpart_id = b_id if recipient_id == a_id else a_id
-            positive_count = int(row[2] or 0)
-            first_positive_at = row[3]
-            last_positive_at = row[4]
-            last_offer_at = row[5]
-            disabled_until = row[6]
-            disabled_permanent = bool(row[7])
-            if disabled_permanent:
-                self.increment_second_touch_counter(
-                    day_key,
-                    _second_touch_suppressed_key("disabled_permanent"),
-                )
-                continue
-            if disabled_until and disabled_until > now:
-                self.increment_second_touch_counter(
-                    day_key,
-                    _second_touch_suppressed_key("disabled_until_active"),
-                )
-                continue
-            if positive_count < SECOND_TOUCH_MIN_POSITIVE or positive_count < SECOND_TOUCH_MIN_AFFINITY:
-                continue
-            if not first_positive_at or not last_positive_at:
-                continue
-            if (last_positive_at - first_positive_at).days < SECOND_TOUCH_MIN_SPAN_DAYS:
-                continue
-            if (now - last_positive_at).days < SECOND_TOUCH_COOLDOWN_DAYS:
-                self.increment_second_touch_counter(
-                    day_key,
-                    _second_touch_suppressed_key("cooldown_active"),
-                )
-                continue
-            if last_offer_at and (now - last_offer_at).days < SECOND_TOUCH_COOLDOWN_DAYS:
-                self.increment_second_touch_counter(
-                    day_key,
-                    _second_touch_suppressed_key("cooldown_active"),
-                )
-                continue
-            if self.is_in_crisis_window(recipient_id, CRISIS_WINDOW_HOURS, now):
-                self.increment_second_touch_counter(
-                    day_key,
-                    _second_touch_suppressed_key("crisis_blocked"),
-                )
-                continue
-            if self.is_in_crisis_window(counterpart_id, CRISIS_WINDOW_HOURS, now):
-                self.increment_second_touch_counter(
-                    day_key,
-                    _second_touch_suppressed_key("crisis_blocked"),
-                )
-                continue
-            hold_reason = self.get_second_touch_hold_reason(recipient_id, counterpart_id, now)
-            if hold_reason:
-                self.increment_second_touch_counter(
-                    day_key,
-                    _second_touch_suppressed_key(_suppression_reason_from_hold(hold_reason)),
-                )
-                continue
-            latest_a = self._latest_mood_event_db(recipient_id)
-            latest_b = self._latest_mood_event_db(counterpart_id)
-            if not _is_emotionally_compatible(latest_a, latest_b, now):
-                continue
-            self.create_second_touch_offer(recipient_id, counterpart_id)
-            self.increment_second_touch_counter(day_key, "offers_generated")
+            pair = _with_sweep_offers(_SecondTouchDuePair(*row), created)
+            decision = _decide_second_touch_pair(pair, timestamp)
+            # Counters stay one event per occurrence so recompute can rebuild them.
+            for reason in decision.suppressed:
+                increments.append((day_key, _second_touch_suppressed_key(reason), 1))
+            if decision.offer_to_id:
+                self.create_second_touch_offer(decision.offer_to_id, decision.counterpart_id)
+                created[decision.offer_to_id] = created.get(decision.offer_to_id, 0) + 1
+                increments.append((day_key, "offers_generated", 1))
+                offers += 1
+            updates.append(
+                {
+                    "sender_id": pair.sender_id,
+                    "recipient_id": pair.recipient_id,
+                    "seen_check_at": pair.next_check_at,
+                    "next_check_at": decision.next_check_at,
+                    "last_offer_at": timestamp if decision.offer_to_id else None,
+                }
+            )
+        if updates:
             with self._conn() as conn, conn.cursor() as cur:
-                cur.execute(
+                # A pair touched while it was being evaluated keeps its newer
+                # next_check_at so the change is picked up on the next sweep.
+                cur.executemany(
                     """
                     UPDATE second_touch_pairs
-                    SET last_offer_at = %s
-                    WHERE sender_id = %s AND recipient_id = %s
+                    SET next_check_at = CASE
+                          WHEN next_check_at = %(seen_check_at)s THEN %(next_check_at)s
+                          ELSE next_check_at
+                        END,
+                        last_offer_at = COALESCE(%(last_offer_at)s, last_offer_at)
+                    WHERE sender_id = %(sender_id)s AND recipient_id = %(recipient_id)s
                     """,
-                    (now, a_id, b_id),
+                    updates,
                 )
-            return
+        if increments:
+            self._record_second_touch_counters(increments)
+        return {"evaluated": len(rows), "offers": offers}
 
-    def _latest_mood_event_db(self, principal_id: str) -> Optional[MoodEventRecord]:
-        with self._conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT created_at, valence, intensity, expressed_emotion, risk_level, theme_tag
-                FROM mood_events
-                WHERE device_id = %s
-                ORDER BY created_at DESC
-                LIMIT 1
-                """,
-                (principal_id,),
+
+PARTITIONED_EVENT_TABLES = ("security_events", "second_touch_events")
+
+
+def _event_partition_name(table: str, day: datetime.date) -> str:
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def _event_partition_bounds(day: datetime.date) -> tuple[datetime, datetime]:
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def _event_partition_days(cur, table: str) -> Dict[datetime.date, str]:
+    cur.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        """,
+        (table,),
+    )
+    prefix = f"{table}_p"
+    days: Dict[datetime.date, str] = {}
+    for (name,) in cur.fetchall():
+        suffix = name[len(prefix):] if name.startswith(prefix) else ""
+        if len(suffix) == 8 and suffix.isdigit():
+            days[datetime.strptime(suffix, "%Y%m%d").date()] = name
+    return days
+
+
+def _create_event_partition(cur, table: str, day: datetime.date) -> None:
+    # Build the partition detached and move any rows for its day out of the
+    # default partition first; attaching would fail while they are there.
+    start, end = _event_partition_bounds(day)
+    partition = sql.Identifier(_event_partition_name(table, day))
+    parent = sql.Identifier(table)
+    default = sql.Identifier(f"{table}_default")
+    # Hold off inserts into the default partition until the ATTACH commits;
+    # a row for this day landing there after the move would make it fail.
+    cur.execute(sql.SQL("LOCK TABLE {} IN SHARE ROW EXCLUSIVE MODE").format(default))
+    cur.execute(
+        sql.SQL("CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)").format(
+            partition, parent
+        )
+    )
+    cur.execute(
+        sql.SQL(
+            """
+            WITH moved AS (
+              DELETE FROM {default}
+              WHERE created_at >= %(start)s AND created_at < %(end)s
+              RETURNING *
             )
-            row = cur.fetchone()
-        if not row:
-            return None
-        return MoodEventRecord(
-            principal_id=principal_id,
-            created_at=row[0],
-            valence=row[1],
-            intensity=row[2],
-            expressed_emotion=row[3],
-            risk_level=row[4],
-            theme_tag=row[5],
+            INSERT INTO {partition} SELECT * FROM moved
+            """
+        ).format(default=default, partition=partition),
+        {"start": start, "end": end},
+    )
+    cur.execute(
+        sql.SQL("ALTER TABLE {} ATTACH PARTITION {} FOR VALUES FROM ({}) TO ({})").format(
+            parent, partition, sql.Literal(start.isoformat()), sql.Literal(end.isoformat())
         )
+    )
+
+
+def _expired_event_partitions(cur, table: str, cutoff: datetime) -> List[tuple[str, int]]:
+    # Counted before anything is dropped: DROP TABLE locks the parent, and
+    # that lock must not be held while each expired day is scanned.
+    expired = []
+    for day, name in sorted(_event_partition_days(cur, table).items()):
+        if _event_partition_bounds(day)[1] > cutoff:
+            continue
+        cur.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(name)))
+        expired.append((name, int(cur.fetchone()[0] or 0)))
+    return expired
+
+
+def _drop_partitions(cur, expired: List[tuple[str, int]]) -> int:
+    for name, _ in expired:
+        cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(name)))
+    return sum(rows for _, rows in expired)
+
+
+def _drop_event_partitions(cur, table: str, cutoff: datetime) -> int:
+    return _drop_partitions(cur, _expired_event_partitions(cur, table, cutoff))
+
+
+def _prune_event_partitions(cur, table: str, cutoff: datetime) -> int:
+    expired = _expired_event_partitions(cur, table, cutoff)
+    dropping = {name for name, _ in expired}
+    # Whatever else is expired sits in the default partition or the day the
+    # cutoff falls in; delete it there before the drops lock the parent.
+    deleted = 0
+    for leaf in _retention_delete_targets(cur, table, cutoff):
+        if leaf in dropping:
+            continue
+        cur.execute(
+            sql.SQL("DELETE FROM {} WHERE created_at < %s").format(sql.Identifier(leaf)),
+            (cutoff,),
+        )
+        deleted += int(cur.rowcount or 0)
+    return _drop_partitions(cur, expired) + deleted
+
+
+RETENTION_COLUMNS = {
+    "security_events": "created_at",
+    "second_touch_events": "created_at",
+    "second_touch_daily_aggregates": "utc_day",
+    "daily_ack_aggregates": "utc_day",
+}
+
+
+def _retention_cutoff(table: str, retention_days: int, now_utc: datetime):
+    cutoff = now_utc - timedelta(days=retention_days)
+    # Aggregate tables are keyed by UTC day, matching their cleanup_* methods.
+    return cutoff.date() if RETENTION_COLUMNS[table] == "utc_day" else cutoff
+
+
+def _retention_delete_targets(cur, table: str, cutoff) -> List[str]:
+    if table not in PARTITIONED_EVENT_TABLES:
+        return [table]
+    # ctid is only unique per partition, so batches run against each leaf
+    # that can still hold expired rows.
+    days = _event_partition_days(cur, table)
+    return [f"{table}_default"] + [
+        name for day, name in sorted(days.items()) if _event_partition_bounds(day)[0] < cutoff
+    ]
+
+
+def _daily_ack_shard() -> int:
+    return random.randrange(max(DAILY_ACK_AGGREGATE_SHARDS, 1))
 
 
 def _hash_affinity_actor(principal_id: str) -> str:
@@ -2791,6 +3994,257 @@ def _apply_affinity_decay(
     return score * (AFFINITY_DECAY_PER_DAY ** elapsed_days)
 
 
+# SQL twin of _apply_affinity_decay: whole elapsed days, never negative.
+_AFFINITY_DECAYED_SCORE_SQL = (
+    "affinity_scores.score * power(%(decay)s::float8, GREATEST(0, floor("
+    "extract(epoch FROM (%(now)s::timestamptz - affinity_scores.updated_at)) / 86400)))"
+)
+
+
+_AFFINITY_THEME_INDEX = {theme: index for index, theme in enumerate(CANONICAL_THEMES)}
+
+
+def _affinity_snapshot(rows, now: datetime) -> AffinitySnapshot:
+    # Decayed scores only change on whole-day boundaries, so the snapshot stays
+    # exact until the earliest boundary among its rows.
+    scores = array("d", [0.0] * len(CANONICAL_THEMES))
+    extras: List[tuple[str, float]] = []
+    valid_until: Optional[datetime] = None
+    for theme_id, decayed, updated_at in rows:
+        index = _AFFINITY_THEME_INDEX.get(theme_id)
+        if index is None:
+            extras.append((theme_id, float(decayed)))
+        else:
+            scores[index] = float(decayed)
+        elapsed_days = max(0, (now - updated_at).days)
+        boundary = updated_at + timedelta(days=elapsed_days + 1)
+        if valid_until is None or boundary < valid_until:
+            valid_until = boundary
+    return AffinitySnapshot(
+        reference_at=now,
+        valid_until=valid_until,
+        scores=scores,
+        extras=tuple(extras),
+    )
+
+
+# Due pairs plus everything needed to decide them, for both sides of each
+# pair: crisis state, latest mood (DISTINCT ON), available offers, the
+# monthly offer count and recent sends. Due pairs are claimed by leasing
+# next_check_at forward, so overlapping sweeps never evaluate the same pair
+# and a crashed sweep's pairs come due again when the lease expires.
+_SECOND_TOUCH_DUE_PAIRS_SQL = """
+WITH claim AS (
+  SELECT sender_id, recipient_id, next_check_at AS due_at
+  FROM second_touch_pairs
+  WHERE next_check_at <= %(now)s
+  ORDER BY next_check_at ASC
+  LIMIT %(limit)s
+  FOR UPDATE SKIP LOCKED
+),
+due AS (
+  UPDATE second_touch_pairs AS p
+  SET next_check_at = %(lease_until)s
+  FROM claim
+  WHERE p.sender_id = claim.sender_id AND p.recipient_id = claim.recipient_id
+  RETURNING p.sender_id, p.recipient_id, p.positive_count, p.first_positive_at,
+            p.last_positive_at, p.last_offer_at, p.disabled_until, p.disabled_permanent,
+            p.identity_leak_blocked, p.next_check_at, claim.due_at
+),
+principals AS (
+  SELECT sender_id AS principal_id FROM due
+  UNION
+  SELECT recipient_id FROM due
+),
+latest_mood AS (
+  SELECT DISTINCT ON (device_id) device_id, created_at, valence, risk_level
+  FROM mood_events
+  WHERE device_id IN (SELECT principal_id FROM principals)
+  ORDER BY device_id, created_at DESC
+),
+crisis AS (
+  SELECT principal_id
+  FROM principal_crisis_state
+  WHERE principal_id IN (SELECT principal_id FROM principals)
+    AND last_action_at >= %(crisis_cutoff)s
+),
+offer_stats AS (
+  SELECT
+    offer_to_id,
+    BOOL_OR(state = 'available') AS has_available,
+    COUNT(*) FILTER (WHERE created_at >= %(month_cutoff)s) AS month_count
+  FROM second_touch_offers
+  WHERE offer_to_id IN (SELECT principal_id FROM principals)
+  GROUP BY offer_to_id
+),
+recent_sends AS (
+  SELECT DISTINCT offer_to_id, counterpart_id
+  FROM second_touch_offers
+  WHERE offer_to_id IN (SELECT principal_id FROM principals)
+    AND used_at >= %(cooldown_cutoff)s
+)
+SELECT
+  due.sender_id,
+  due.recipient_id,
+  due.positive_count,
+  due.first_positive_at,
+  due.last_positive_at,
+  due.last_offer_at,
+  due.disabled_until,
+  due.disabled_permanent,
+  due.identity_leak_blocked,
+  due.next_check_at,
+  due.due_at,
+  crisis_a.principal_id IS NOT NULL OR crisis_b.principal_id IS NOT NULL,
+  mood_a.created_at,
+  mood_a.valence,
+  mood_a.risk_level,
+  mood_b.created_at,
+  mood_b.valence,
+  mood_b.risk_level,
+  COALESCE(offers_a.has_available, false),
+  COALESCE(offers_a.month_count, 0),
+  sends_a.offer_to_id IS NOT NULL,
+  COALESCE(offers_b.has_available, false),
+  COALESCE(offers_b.month_count, 0),
+  sends_b.offer_to_id IS NOT NULL
+FROM due
+LEFT JOIN crisis AS crisis_a ON crisis_a.principal_id = due.sender_id
+LEFT JOIN crisis AS crisis_b ON crisis_b.principal_id = due.recipient_id
+LEFT JOIN latest_mood AS mood_a ON mood_a.device_id = due.sender_id
+LEFT JOIN latest_mood AS mood_b ON mood_b.device_id = due.recipient_id
+LEFT JOIN offer_stats AS offers_a ON offers_a.offer_to_id = due.sender_id
+LEFT JOIN offer_stats AS offers_b ON offers_b.offer_to_id = due.recipient_id
+LEFT JOIN recent_sends AS sends_a
+  ON sends_a.offer_to_id = due.sender_id AND sends_a.counterpart_id = due.recipient_id
+LEFT JOIN recent_sends AS sends_b
+  ON sends_b.offer_to_id = due.recipient_id AND sends_b.counterpart_id = due.sender_id
+ORDER BY due.due_at ASC
+"""
+
+
+@dataclass(frozen=True)
+class _SecondTouchDuePair:
+    sender_id: str
+    recipient_id: str
+    positive_count: Optional[int]
+    first_positive_at: Optional[datetime]
+    last_positive_at: Optional[datetime]
+    last_offer_at: Optional[datetime]
+    disabled_until: Optional[datetime]
+    disabled_permanent: bool
+    identity_leak_blocked: bool
+    next_check_at: datetime
+    due_at: datetime
+    in_crisis: bool
+    mood_a_at: Optional[datetime]
+    mood_a_valence: Optional[str]
+    mood_a_risk: Optional[int]
+    mood_b_at: Optional[datetime]
+    mood_b_valence: Optional[str]
+    mood_b_risk: Optional[int]
+    a_has_available: bool
+    a_month_count: int
+    a_recent_send: bool
+    b_has_available: bool
+    b_month_count: int
+    b_recent_send: bool
+
+
+@dataclass(frozen=True)
+class _SecondTouchDecision:
+    offer_to_id: Optional[str]
+    counterpart_id: Optional[str]
+    next_check_at: Optional[datetime]
+    suppressed: tuple[str, ...] = ()
+
+
+def _with_sweep_offers(
+    pair: _SecondTouchDuePair, created: Dict[str, int]
+) -> _SecondTouchDuePair:
+    a_created = created.get(pair.sender_id, 0)
+    b_created = created.get(pair.recipient_id, 0)
+    if not a_created and not b_created:
+        return pair
+    return replace(
+        pair,
+        a_has_available=pair.a_has_available or a_created > 0,
+        a_month_count=pair.a_month_count + a_created,
+        b_has_available=pair.b_has_available or b_created > 0,
+        b_month_count=pair.b_month_count + b_created,
+    )
+
+
+def _decide_second_touch_pair(pair: _SecondTouchDuePair, now: datetime) -> _SecondTouchDecision:
+    cooldown = timedelta(days=SECOND_TOUCH_COOLDOWN_DAYS)
+    recheck_at = now + timedelta(minutes=SECOND_TOUCH_RECHECK_MINUTES)
+    if pair.disabled_permanent:
+        return _SecondTouchDecision(None, None, None, ("disabled_permanent",))
+    if pair.disabled_until and pair.disabled_until > now:
+        return _SecondTouchDecision(None, None, pair.disabled_until, ("disabled_until_active",))
+    positive_count = int(pair.positive_count or 0)
+    if positive_count < SECOND_TOUCH_MIN_POSITIVE or positive_count < SECOND_TOUCH_MIN_AFFINITY:
+        return _SecondTouchDecision(None, None, None)
+    if not pair.first_positive_at or not pair.last_positive_at:
+        return _SecondTouchDecision(None, None, None)
+    if (pair.last_positive_at - pair.first_positive_at).days < SECOND_TOUCH_MIN_SPAN_DAYS:
+        return _SecondTouchDecision(None, None, None)
+    if (now - pair.last_positive_at).days < SECOND_TOUCH_COOLDOWN_DAYS:
+        return _SecondTouchDecision(
+            None, None, pair.last_positive_at + cooldown, ("cooldown_active",)
+        )
+    if pair.last_offer_at and (now - pair.last_offer_at).days < SECOND_TOUCH_COOLDOWN_DAYS:
+        return _SecondTouchDecision(None, None, pair.last_offer_at + cooldown, ("cooldown_active",))
+    if pair.in_crisis:
+        return _SecondTouchDecision(None, None, recheck_at, ("crisis_blocked",))
+    mood_a = _due_pair_mood(pair.sender_id, pair.mood_a_at, pair.mood_a_valence, pair.mood_a_risk)
+    mood_b = _due_pair_mood(
+        pair.recipient_id, pair.mood_b_at, pair.mood_b_valence, pair.mood_b_risk
+    )
+    compatible = _is_emotionally_compatible(mood_a, mood_b, now)
+    suppressed: List[str] = []
+    sides = (
+        (pair.sender_id, pair.recipient_id, pair.a_has_available, pair.a_month_count, pair.a_recent_send),
+        (pair.recipient_id, pair.sender_id, pair.b_has_available, pair.b_month_count, pair.b_recent_send),
+    )
+    for offer_to_id, counterpart_id, has_available, month_count, recent_send in sides:
+        if has_available:
+            continue
+        if pair.identity_leak_blocked:
+            hold_reason = HoldReason.IDENTITY_LEAK.value
+        elif month_count >= SECOND_TOUCH_MONTHLY_CAP:
+            hold_reason = HoldReason.RATE_LIMITED.value
+        elif recent_send:
+            hold_reason = HoldReason.COOLDOWN_ACTIVE.value
+        else:
+            hold_reason = None
+        if hold_reason:
+            suppressed.append(_suppression_reason_from_hold(hold_reason))
+            continue
+        if not compatible:
+            continue
+        return _SecondTouchDecision(offer_to_id, counterpart_id, now + cooldown, tuple(suppressed))
+    return _SecondTouchDecision(None, None, recheck_at, tuple(suppressed))
+
+
+def _due_pair_mood(
+    principal_id: str,
+    created_at: Optional[datetime],
+    valence: Optional[str],
+    risk_level: Optional[int],
+) -> Optional[MoodEventRecord]:
+    if created_at is None:
+        return None
+    return MoodEventRecord(
+        principal_id=principal_id,
+        created_at=created_at,
+        valence=valence,
+        intensity="",
+        expressed_emotion=None,
+        risk_level=risk_level,
+    )
+
+
 def _candidate_seed(sender_id: str, day_key: str) -> str:
     return f"{sender_id}:{day_key}"
 
@@ -2800,6 +4254,76 @@ def _candidate_sort_key(candidate_id: str, seed: str) -> str:
     return digest
 
 
+def _pool_sort_key(candidate_id: str, seed: str) -> str:
+    # Mirrors the SQL ordering md5(principal_id || seed).
+    return hashlib.md5(f"{candidate_id}{seed}".encode("utf-8")).hexdigest()
+
+
+def _is_peer_origin(origin_device_id: Optional[str]) -> bool:
+    return bool(origin_device_id) and origin_device_id != SYSTEM_SENDER_ID
+
+
+def _health_window_start_day(now: datetime, window_days: int) -> datetime.date:
+    # Whole UTC days: today plus the previous window_days - 1 days. The daily
+    # rollups cannot express the rolling window_days * 24h cut-off the raw
+    # queries used, so early in a UTC day the window holds less history.
+    return (now.astimezone(timezone.utc) - timedelta(days=max(window_days, 1) - 1)).date()
+
+
+_RAW_SENDER_DAILY_HEALTH_SQL = """
+  SELECT
+    COALESCE(d.sender_id, p.sender_id) AS sender_id,
+    COALESCE(d.utc_day, p.utc_day) AS utc_day,
+    COALESCE(d.delivered_count, 0) AS delivered_count,
+    COALESCE(p.positive_ack_count, 0) AS positive_ack_count
+  FROM (
+    SELECT m.origin_device_id AS sender_id,
+           (i.received_at AT TIME ZONE 'UTC')::date AS utc_day,
+           COUNT(*) AS delivered_count
+    FROM inbox_items i
+    JOIN messages m ON m.id = i.message_id
+    WHERE m.origin_device_id IS NOT NULL
+      AND (i.received_at AT TIME ZONE 'UTC')::date BETWEEN %(start_day)s AND %(end_day)s
+    GROUP BY 1, 2
+  ) AS d
+  FULL OUTER JOIN (
+    SELECT m.origin_device_id AS sender_id,
+           (a.created_at AT TIME ZONE 'UTC')::date AS utc_day,
+           COUNT(*) AS positive_ack_count
+    FROM acknowledgements a
+    JOIN messages m ON m.id = a.message_id
+    WHERE m.origin_device_id IS NOT NULL
+      AND a.reaction IN ('thanks', 'helpful', 'relate')
+      AND (a.created_at AT TIME ZONE 'UTC')::date BETWEEN %(start_day)s AND %(end_day)s
+    GROUP BY 1, 2
+  ) AS p
+    ON p.sender_id = d.sender_id AND p.utc_day = d.utc_day
+"""
+
+
+def _principal_state_key(dsn: str, field: str, principal_id: str) -> tuple:
+    return (dsn, field, principal_id)
+
+
+def _candidate_pool_key(
+    dsn: str,
+    intensity_bucket: str,
+    theme_tags: List[str],
+) -> tuple[str, str, tuple[str, ...]]:
+    return (dsn, intensity_bucket, tuple(sorted(set(theme_tags))))
+
+
+def _sample_candidate_pool(
+    pool: tuple[Candidate, ...],
+    sender_id: str,
+    seed: str,
+    limit: int,
+) -> List[Candidate]:
+    filtered = [candidate for candidate in pool if candidate.candidate_id != sender_id]
+    filtered.sort(key=lambda c: _pool_sort_key(c.candidate_id, seed))
+    return filtered[:limit]
+
+
 def _utc_day_key(now: Optional[datetime] = None) -> str:
     timestamp = now or datetime.now(timezone.utc)
     return timestamp.date().isoformat()
@@ -2871,6 +4395,110 @@ def _event_from_counter_key(counter_key: str) -> Optional[tuple[str, Optional[st
     return None
 
 
+def _rebuild_second_touch_days(cur, day_predicate: str, params: tuple) -> int:
+    cur.execute(
+        f"""
+        DELETE FROM second_touch_daily_aggregates
+        WHERE utc_day {day_predicate}
+        """,
+        params,
+    )
+    cur.execute(
+        f"""
+        SELECT event_day_utc, event_type, reason, COUNT(*)
+        FROM second_touch_events
+        WHERE event_day_utc {day_predicate}
+        GROUP BY event_day_utc, event_type, reason
+        """,
+        params,
+    )
+    rows = cur.fetchall()
+
+    counts: Dict[tuple[datetime.date, str], int] = {}
+    days_written = set()
+    for event_day, event_type, reason, count in rows:
+        counter_key = _counter_key_from_event(str(event_type), reason)
+        if counter_key is None:
+            continue
+        counts[(event_day, counter_key)] = counts.get((event_day, counter_key), 0) + int(count or 0)
+        days_written.add(event_day)
+
+    inserts = [(day, key, count) for (day, key), count in counts.items()]
+    if inserts:
+        cur.executemany(
+            """
+            INSERT INTO second_touch_daily_aggregates
+              (utc_day, counter_key, count)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (utc_day, counter_key)
+            DO UPDATE SET count = EXCLUDED.count
+            """,
+            inserts,
+        )
+    return len(days_written)
+
+
+def _insert_helped_pairs(cur, sender_hashes: List[str], recipient_hashes: List[str]) -> None:
+    # Same accounting as _record_helped_pair: only pairs this statement
+    # inserts bump their sender's count; pairs a live ack added are skipped.
+    cur.execute(
+        """
+        WITH new_pairs AS (
+          INSERT INTO helped_pairs (sender_hash, recipient_hash)
+          SELECT * FROM unnest(%s::text[], %s::text[])
+          ON CONFLICT (sender_hash, recipient_hash) DO NOTHING
+          RETURNING sender_hash
+        )
+        INSERT INTO helped_counts (sender_hash, helped_count, updated_at)
+        SELECT sender_hash, COUNT(*), now()
+        FROM new_pairs
+        GROUP BY sender_hash
+        ORDER BY sender_hash
+        ON CONFLICT (sender_hash)
+        DO UPDATE SET
+          helped_count = helped_counts.helped_count + EXCLUDED.helped_count,
+          updated_at = now()
+        """,
+        (sender_hashes, recipient_hashes),
+    )
+
+
+def _recount_helped_senders(cur, sender_hashes: List[str]) -> None:
+    # Lock the count rows (creating missing ones) before counting. An ack
+    # that inserted its pair but has not bumped the count yet then waits and
+    # adds its +1 on top of a count that excludes it; one that already
+    # bumped it is committed before the count runs.
+    cur.execute(
+        """
+        INSERT INTO helped_counts (sender_hash, helped_count, updated_at)
+        SELECT sender_hash, 0, now() FROM unnest(%s::text[]) AS sender_hash
+        ORDER BY sender_hash
+        ON CONFLICT (sender_hash) DO NOTHING
+        """,
+        (sender_hashes,),
+    )
+    cur.execute(
+        """
+        SELECT sender_hash FROM helped_counts
+        WHERE sender_hash = ANY(%s)
+        ORDER BY sender_hash
+        FOR UPDATE
+        """,
+        (sender_hashes,),
+    )
+    cur.execute(
+        """
+        UPDATE helped_counts AS c
+        SET helped_count = (
+              SELECT COUNT(*) FROM helped_pairs p WHERE p.sender_hash = c.sender_hash
+            ),
+            updated_at = now()
+        WHERE c.sender_hash = ANY(%s)
+        """,
+        (sender_hashes,),
+    )
+
+
 def _counter_key_from_event(event_type: str, reason: Optional[str]) -> Optional[str]:
     if event_type == "offer_generated":
         return "offers_generated"
@@ -2890,6 +4518,23 @@ def _counter_key_from_event(event_type: str, reason: Optional[str]) -> Optional[
 
 
 _default_repo = InMemoryRepository()
+_candidate_pool_cache = TTLCache(
+    CANDIDATE_POOL_CACHE_TTL_SECONDS,
+    max_entries=CANDIDATE_POOL_CACHE_MAX_ENTRIES,
+)
+CANDIDATE_POOL_CHANNEL = "candidate_pool_changed"
+_matching_tuning_cache = TTLCache(MATCHING_TUNING_CACHE_TTL_SECONDS)
+MATCHING_TUNING_CHANNEL = "matching_tuning_changed"
+MOOD_PRINCIPALS_DIMENSION = "mood_principals"
+_principal_state_cache = TTLCache(
+    PRINCIPAL_STATE_CACHE_TTL_SECONDS,
+    max_entries=PRINCIPAL_STATE_CACHE_MAX_ENTRIES,
+)
+_affinity_map_cache = TTLCache(
+    AFFINITY_MAP_CACHE_TTL_SECONDS,
+    max_entries=AFFINITY_MAP_CACHE_MAX_ENTRIES,
+)
+_CACHE_MISS = object()
 
 
 def get_repository() -> Repository:
@@ -2962,26 +4607,15 @@ def _summarize_mood_events(
         day_valences[day_key] = record.valence
 
     ordered_days = sorted(day_valences.keys())
-    volatility = 0
-    last_valence = None
-    for day in ordered_days:
-        current = day_valences[day]
-        if last_valence is not None and current != last_valence:
-            volatility += 1
-        last_valence = current
+    volatility = _valence_changes([day_valences[day] for day in ordered_days])
 
-    valence_score = {"positive": 1.0, "neutral": 0.0, "negative": -1.0}
-    scores = [valence_score.get(record.valence, 0.0) for record in records]
+    scores = [_VALENCE_SCORES.get(record.valence, 0.0) for record in records]
     trend = "stable"
     if scores:
         mid = max(1, len(scores) // 2)
         first_avg = sum(scores[:mid]) / len(scores[:mid])
         last_avg = sum(scores[mid:]) / len(scores[mid:]) if scores[mid:] else first_avg
-        delta = last_avg - first_avg
-        if delta > 0.2:
-            trend = "up"
-        elif delta < -0.2:
-            trend = "down"
+        trend = _reflection_trend(last_avg - first_avg)
 
     return ReflectionSummary(
         window_days=window_days,
@@ -2992,6 +4626,27 @@ def _summarize_mood_events(
     )
 
 
+_VALENCE_SCORES = {"positive": 1.0, "neutral": 0.0, "negative": -1.0}
+
+
+def _valence_changes(ordered_valences: List[str]) -> int:
+    changes = 0
+    last_valence = None
+    for current in ordered_valences:
+        if last_valence is not None and current != last_valence:
+            changes += 1
+        last_valence = current
+    return changes
+
+
+def _reflection_trend(delta: float) -> str:
+    if delta > 0.2:
+        return "up"
+    if delta < -0.2:
+        return "down"
+    return "stable"
+
+
 def _safe_ratio(numerator: int, denominator: int) -> float:
     if denominator <= 0:
         return 0.0
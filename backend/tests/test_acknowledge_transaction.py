@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from app.repository import MessageRecord, PostgresRepository, psycopg
+from tools.bench_acknowledge import main as bench_main
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def _message(principal_id: str) -> MessageRecord:
+    return MessageRecord(
+        principal_id=principal_id,
+        valence="positive",
+        intensity="low",
+        emotion=None,
+        theme_tags=["calm"],
+        risk_level=0,
+        sanitized_text="hello",
+        reid_risk=0.0,
+    )
+
+
+def _pair_state(sender: str, recipient: str):
+    a_id, b_id = sorted([sender, recipient])
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT positive_count, disabled_until IS NOT NULL
+            FROM second_touch_pairs
+            WHERE sender_id = %s AND recipient_id = %s
+            """,
+            (a_id, b_id),
+        )
+        return cur.fetchone()
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_positive_ack_uses_one_connection(monkeypatch):
+    repo = PostgresRepository(POSTGRES_DSN)
+    sender = "ack-tx-sender"
+    recipient = "ack-tx-recipient"
+    message_id = repo.save_message(_message(sender))
+    inbox_item_id = repo.create_inbox_item(message_id, recipient, "hello")
+    helped_before = repo.get_helped_count(sender)
+
+    with pytest.raises(PermissionError):
+        repo.acknowledge(inbox_item_id, "ack-tx-intruder", "thanks")
+    with pytest.raises(PermissionError):
+        repo.acknowledge("00000000-0000-0000-0000-000000000000", recipient, "thanks")
+
+    connections = []
+    original_conn = repo._conn
+
+    def counting_conn():
+        connections.append(1)
+        return original_conn()
+
+    monkeypatch.setattr(repo, "_conn", counting_conn)
+    assert repo.acknowledge(inbox_item_id, recipient, "thanks") == "recorded"
+    assert len(connections) == 1
+    monkeypatch.setattr(repo, "_conn", original_conn)
+
+    assert repo.get_helped_count(sender) == helped_before + 1
+    assert repo.get_affinity_map(sender)["calm"] > 0
+    assert _pair_state(sender, recipient) == (1, False)
+
+    # A repeated non-positive reaction keeps the original ack and disables the pair.
+    assert repo.acknowledge(inbox_item_id, recipient, "not_helpful") == "already_recorded"
+    assert _pair_state(sender, recipient) == (1, True)
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_ack_bench_reports_throughput(monkeypatch, capsys):
+    repo = PostgresRepository(POSTGRES_DSN)
+    monkeypatch.setattr("tools.bench_acknowledge.get_repository", lambda: repo)
+    assert bench_main(["--acks", "5"]) == 1
+    assert "reason=writes_not_allowed" in capsys.readouterr().out
+    assert bench_main(["--acks", "5", "--allow-writes"]) == 0
+    assert "connections_per_ack=1.00" in capsys.readouterr().out
@@ -4,10 +4,16 @@ import sys
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from datetime import datetime, timedelta, timezone
+import random
 
 from app.config import AFFINITY_DECAY_PER_DAY, AFFINITY_SCORE_MAX  # noqa: E402
-from app.matching import Candidate, match_decision  # noqa: E402
+from app.matching import Candidate, _apply_affinity_bias, match_decision  # noqa: E402
 from app.repository import InMemoryRepository, MessageRecord  # noqa: E402
+from app.themes import CANONICAL_THEMES  # noqa: E402
+from tools.bench_affinity_bias import (  # noqa: E402
+    _legacy_apply_affinity_bias,
+    main as bench_main,
+)
 
 
 class AllowAllDedupeStore:
@@ -75,3 +81,28 @@ def test_affinity_score_is_bounded():
     now = datetime(2026, 1, 20, tzinfo=timezone.utc)
     repo.record_affinity("sender", "calm", AFFINITY_SCORE_MAX + 10, now=now)
     assert repo.get_affinity_map("sender", now=now)["calm"] == AFFINITY_SCORE_MAX
+
+
+def test_affinity_bias_matches_legacy_ordering():
+    rng = random.Random(11)
+    themes = CANONICAL_THEMES + ["legacy_theme"]
+    affinity_map = {"calm": 4.0, "grief": 4.0, "hope": 1.5, "legacy_theme": 2.0}
+    candidates = [
+        Candidate(
+            candidate_id=f"c{index}",
+            intensity="low",
+            themes=rng.sample(themes, rng.randint(0, 3)),
+        )
+        for index in range(500)
+    ]
+    assert _apply_affinity_bias(candidates, affinity_map) == _legacy_apply_affinity_bias(
+        candidates, affinity_map
+    )
+    assert _apply_affinity_bias(candidates, {"calm": 0.0}) == candidates
+
+
+def test_affinity_bias_bench_reports_identical_results(capsys):
+    assert bench_main(["--sizes", "50,200", "--repeat", "1"]) == 0
+    output = capsys.readouterr().out
+    assert output.count("identical=true") == 2
+    assert "affinity_bias_bench status=ok sizes=2 mismatched=0" in output
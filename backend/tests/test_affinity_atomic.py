@@ -0,0 +1,61 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.config import AFFINITY_DECAY_PER_DAY, AFFINITY_SCORE_MAX
+from app.repository import PostgresRepository, _hash_affinity_actor, psycopg
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def _clear(sender_id: str) -> None:
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM affinity_scores WHERE sender_device_id = %s",
+            (_hash_affinity_actor(sender_id),),
+        )
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_affinity_decays_in_sql():
+    repo = PostgresRepository(POSTGRES_DSN)
+    sender = "affinity-atomic-decay"
+    _clear(sender)
+    start = datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+
+    repo.record_affinity(sender, "calm", 1.0, now=start)
+    repo.record_affinity(sender, "calm", 1.0, now=start + timedelta(days=2, hours=3))
+    expected = 1.0 * (AFFINITY_DECAY_PER_DAY**2) + 1.0
+    later = start + timedelta(days=5, hours=3)
+
+    affinity = repo.get_affinity_map(sender, now=later)
+    assert abs(affinity["calm"] - expected * (AFFINITY_DECAY_PER_DAY**3)) < 1e-5
+    assert repo.load_principal_context(sender, now=later).affinity_map == affinity
+    # A read before the last update never inflates the score.
+    assert abs(repo.get_affinity_map(sender, now=start)["calm"] - expected) < 1e-5
+
+    repo.record_affinity(sender, "calm", AFFINITY_SCORE_MAX * 2, now=later)
+    assert repo.get_affinity_map(sender, now=later)["calm"] == AFFINITY_SCORE_MAX
+    _clear(sender)
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_concurrent_affinity_updates_do_not_lose_writes():
+    repo = PostgresRepository(POSTGRES_DSN)
+    sender = "affinity-atomic-concurrent"
+    _clear(sender)
+    now = datetime.now(timezone.utc)
+
+    threads = [
+        threading.Thread(target=repo.record_affinity, args=(sender, "calm", 0.5, now))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert repo.get_affinity_map(sender, now=now)["calm"] == min(AFFINITY_SCORE_MAX, 4.0)
+    _clear(sender)
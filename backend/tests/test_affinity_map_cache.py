@@ -0,0 +1,126 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import cache as cache_module
+from app import repository as repository_module
+from app.cache import TTLCache
+from app.repository import PostgresRepository, _affinity_snapshot, psycopg
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def test_affinity_snapshot_is_valid_until_next_day_boundary():
+    now = datetime(2026, 3, 10, 12, tzinfo=timezone.utc)
+    rows = [
+        ("calm", 2.0, now - timedelta(days=1, hours=6)),
+        ("grief", 1.5, now - timedelta(hours=1)),
+        ("legacy_theme", 0.5, now - timedelta(hours=20)),
+    ]
+
+    snapshot = _affinity_snapshot(rows, now)
+
+    assert len(snapshot.scores) == 11
+    assert snapshot.as_map() == {"calm": 2.0, "grief": 1.5, "legacy_theme": 0.5}
+    assert snapshot.valid_until == now + timedelta(hours=4)
+    assert snapshot.covers(now + timedelta(hours=3))
+    assert not snapshot.covers(now + timedelta(hours=4))
+    assert not snapshot.covers(now - timedelta(seconds=1))
+    assert _affinity_snapshot([], now).covers(now + timedelta(days=30))
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_affinity_map_cached_until_record_affinity(monkeypatch):
+    monkeypatch.setattr(repository_module, "_affinity_map_cache", TTLCache(600))
+    repo = PostgresRepository(POSTGRES_DSN)
+    sender = "affinity-cache-sender"
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM affinity_scores WHERE sender_device_id = %s",
+            (repository_module._hash_affinity_actor(sender),),
+        )
+    now = datetime.now(timezone.utc)
+    repo.record_affinity(sender, "calm", 1.0, now=now)
+
+    connections = []
+    original_conn = repo._conn
+
+    def counting_conn():
+        connections.append(1)
+        return original_conn()
+
+    monkeypatch.setattr(repo, "_conn", counting_conn)
+    first = repo.get_affinity_map(sender, now=now)
+    second = repo.get_affinity_map(sender, now=now + timedelta(minutes=5))
+    assert first == second == {"calm": 1.0}
+    assert len(connections) == 1
+
+    repo.record_affinity(sender, "grief", 2.0, now=now)
+    assert repo.get_affinity_map(sender, now=now) == {"calm": 1.0, "grief": 2.0}
+    assert repo.load_principal_context(sender, now=now).affinity_map == {
+        "calm": 1.0,
+        "grief": 2.0,
+    }
+
+    # Crossing a day boundary reloads so decay stays exact.
+    later = now + timedelta(days=1, minutes=1)
+    monkeypatch.setattr(repo, "_conn", original_conn)
+    expected = repo.get_affinity_map(sender, now=later)
+    repository_module._affinity_map_cache.invalidate()
+    assert repo.get_affinity_map(sender, now=later) == expected
+    assert expected["calm"] < 1.0
+
+
+def test_ttl_cache_set_if_unchanged_skips_raced_invalidation():
+    cache = TTLCache(600)
+    generation = cache.generation()
+    cache.invalidate(("dsn", "actor"))
+    assert cache.set_if_unchanged(("dsn", "actor"), "stale", generation) is False
+    assert cache.get(("dsn", "actor")) is None
+    assert cache.set_if_unchanged(("dsn", "actor"), "fresh", cache.generation()) is True
+    assert cache.get(("dsn", "actor")) == "fresh"
+
+
+def test_ttl_cache_invalidating_one_key_keeps_caching_others(monkeypatch):
+    cache = TTLCache(600)
+    generation = cache.generation()
+    cache.invalidate(("dsn", "other-actor"))
+    assert cache.set_if_unchanged(("dsn", "actor"), "fresh", generation) is True
+    assert cache.get_or_load(("dsn", "loaded"), lambda: cache.invalidate(("dsn", "x")) or 1) == 1
+    assert cache.get(("dsn", "loaded")) == 1
+
+    # A full clear, or a key whose invalidation was evicted from tracking,
+    # still counts as raced.
+    generation = cache.generation()
+    cache.invalidate()
+    assert cache.set_if_unchanged(("dsn", "actor"), "stale", generation) is False
+    monkeypatch.setattr(cache_module, "MAX_TRACKED_INVALIDATIONS", 1)
+    generation = cache.generation()
+    cache.invalidate(("dsn", "actor"))
+    cache.invalidate(("dsn", "other-actor"))
+    assert cache.set_if_unchanged(("dsn", "actor"), "stale", generation) is False
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_affinity_reads_do_not_cache_over_a_racing_invalidation(monkeypatch):
+    monkeypatch.setattr(repository_module, "_affinity_map_cache", TTLCache(600))
+    repo = PostgresRepository(POSTGRES_DSN)
+    sender = "affinity-race-sender"
+    cache_key = (POSTGRES_DSN, repository_module._hash_affinity_actor(sender))
+    original_conn = repo._conn
+
+    def conn_with_racing_write():
+        # record_affinity lands while the snapshot is being read.
+        repository_module._affinity_map_cache.invalidate(cache_key)
+        return original_conn()
+
+    monkeypatch.setattr(repo, "_conn", conn_with_racing_write)
+    repo.get_affinity_map(sender)
+    assert repository_module._affinity_map_cache.get(cache_key) is None
+    repo.load_principal_context(sender)
+    assert repository_module._affinity_map_cache.get(cache_key) is None
+
+    monkeypatch.setattr(repo, "_conn", original_conn)
+    repo.get_affinity_map(sender)
+    assert repository_module._affinity_map_cache.get(cache_key) is not None
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from app.repository import psycopg
+from tools import affinity_metrics
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def test_stream_aggregation_counts_actors_and_upper_inclusive_buckets():
+    rows = [
+        ("a", "calm", 0.0),
+        ("a", "hope", 1.0),
+        ("b", "calm", 3.0),
+        ("b", "hope", 10.0),
+        ("c", "calm", 10.5),
+    ]
+    actor_count, aggregate, buckets = affinity_metrics._aggregate_rows(rows)
+    assert actor_count == 3
+    assert aggregate == {"calm": 13.5, "hope": 11.0}
+    assert buckets == {"0": 1, "0-1": 1, "1-3": 1, "3-10": 1, "10+": 1}
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_sql_aggregation_matches_streaming_scan(monkeypatch, capsys):
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM affinity_scores WHERE sender_device_id LIKE 'metrics-%%'")
+        cur.executemany(
+            """
+            INSERT INTO affinity_scores (sender_device_id, theme_id, score)
+            VALUES (%s, %s, %s)
+            """,
+            [
+                ("metrics-a", "metrics-calm", -0.5),
+                ("metrics-a", "metrics-hope", 1.0),
+                ("metrics-b", "metrics-calm", 2.5),
+                ("metrics-b", "metrics-hope", 3.0),
+                ("metrics-c", "metrics-calm", 10.0),
+                ("metrics-c", "metrics-hope", 12.0),
+            ],
+        )
+    try:
+        actor_count, aggregate, buckets = affinity_metrics._fetch_metrics(POSTGRES_DSN)
+        streamed_count, streamed_aggregate, streamed_buckets = affinity_metrics._stream_metrics(
+            POSTGRES_DSN
+        )
+        assert (actor_count, buckets) == (streamed_count, streamed_buckets)
+        assert aggregate == pytest.approx(streamed_aggregate)
+        assert aggregate["metrics-calm"] == pytest.approx(12.0)
+        assert aggregate["metrics-hope"] == pytest.approx(16.0)
+
+        monkeypatch.setenv("POSTGRES_DSN", POSTGRES_DSN)
+        assert affinity_metrics.main([]) == 0
+        sql_output = capsys.readouterr().out
+        assert affinity_metrics.main(["--stream"]) == 0
+        stream_output = capsys.readouterr().out
+        for output in (sql_output, stream_output):
+            assert f"actors_with_affinity={actor_count}" in output
+    finally:
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM affinity_scores WHERE sender_device_id LIKE 'metrics-%%'")
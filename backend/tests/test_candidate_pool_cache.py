@@ -0,0 +1,153 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app import repository as repository_module
+from app.cache import TTLCache
+from app.matching import Candidate
+from app.repository import PostgresRepository, psycopg
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def test_ttl_cache_expires_and_invalidates():
+    now = [0.0]
+    cache = TTLCache(10, now_fn=lambda: now[0])
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return len(loads)
+
+    assert cache.get_or_load("k", loader) == 1
+    assert cache.get_or_load("k", loader) == 1
+    now[0] = 11
+    assert cache.get_or_load("k", loader) == 2
+    cache.invalidate()
+    assert cache.get_or_load("k", loader) == 3
+
+
+def test_ttl_cache_bounded_entries():
+    cache = TTLCache(10, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+
+@pytest.mark.skipif(psycopg is None, reason="psycopg not installed")
+def test_candidate_pool_shared_across_senders(monkeypatch):
+    monkeypatch.setattr(repository_module, "_candidate_pool_cache", TTLCache(30))
+    monkeypatch.setattr(repository_module, "ensure_listener", lambda *args: None)
+    repo = PostgresRepository("postgresql://unused")
+    calls = []
+
+    def fake_load(intensity_bucket, theme_tags):
+        calls.append((intensity_bucket, tuple(theme_tags)))
+        return tuple(
+            Candidate(candidate_id=f"p{index}", intensity="low", themes=["grief"])
+            for index in range(5)
+        )
+
+    monkeypatch.setattr(repo, "_load_candidate_pool", fake_load)
+
+    first = repo.get_eligible_candidates("p1", "low", ["grief"], limit=10)
+    second = repo.get_eligible_candidates("p2", "low", ["grief"], limit=10)
+    again = repo.get_eligible_candidates("p1", "low", ["grief"], limit=10)
+
+    assert len(calls) == 1
+    assert "p1" not in {c.candidate_id for c in first}
+    assert "p2" not in {c.candidate_id for c in second}
+    assert [c.candidate_id for c in first] == [c.candidate_id for c in again]
+    assert len(repo.get_eligible_candidates("p1", "low", ["grief"], limit=2)) == 2
+
+    repo.get_eligible_candidates("p1", "high", ["grief"], limit=10)
+    assert len(calls) == 2
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_candidate_pool_invalidated_on_crisis(monkeypatch):
+    monkeypatch.setattr(repository_module, "_candidate_pool_cache", TTLCache(300))
+    repo = PostgresRepository(POSTGRES_DSN)
+    ids = ("pool-c1", "pool-c2", "pool-c3")
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM eligible_principals WHERE principal_id = ANY(%s)", (list(ids),))
+        cur.execute("DELETE FROM principal_crisis_state WHERE principal_id = ANY(%s)", (list(ids),))
+        for principal_id in ids:
+            cur.execute(
+                """
+                INSERT INTO eligible_principals
+                (principal_id, intensity_bucket, theme_tags, last_active_bucket, updated_at)
+                VALUES (%s, 'medium', %s, %s, now())
+                """,
+                (principal_id, ["pool-theme"], datetime.now(timezone.utc)),
+            )
+
+    try:
+        before = repo.get_eligible_candidates("sender", "medium", ["pool-theme"], limit=10)
+        assert {c.candidate_id for c in before} == set(ids)
+
+        repo.record_crisis_action("pool-c1", "show_crisis_screen")
+        after = repo.get_eligible_candidates("sender", "medium", ["pool-theme"], limit=10)
+        assert {c.candidate_id for c in after} == {"pool-c2", "pool-c3"}
+    finally:
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM eligible_principals WHERE principal_id = ANY(%s)", (list(ids),))
+            cur.execute("DELETE FROM principal_crisis_state WHERE principal_id = ANY(%s)", (list(ids),))
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_candidate_pool_invalidated_by_crisis_notify(monkeypatch):
+    monkeypatch.setattr(
+        repository_module, "_candidate_pool_cache", TTLCache(300, max_entries=4)
+    )
+    repo = PostgresRepository(POSTGRES_DSN)
+    ids = ("pool-n1", "pool-n2")
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM eligible_principals WHERE principal_id = ANY(%s)", (list(ids),))
+        cur.execute("DELETE FROM principal_crisis_state WHERE principal_id = ANY(%s)", (list(ids),))
+        for principal_id in ids:
+            cur.execute(
+                """
+                INSERT INTO eligible_principals
+                (principal_id, intensity_bucket, theme_tags, last_active_bucket, updated_at)
+                VALUES (%s, 'low', %s, %s, now())
+                """,
+                (principal_id, ["pool-notify"], datetime.now(timezone.utc)),
+            )
+
+    def candidate_ids():
+        return {
+            c.candidate_id
+            for c in repo.get_eligible_candidates("sender", "low", ["pool-notify"], limit=10)
+        }
+
+    try:
+        assert candidate_ids() == set(ids)
+
+        # Simulate a crisis action recorded by another worker.
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO principal_crisis_state
+                (principal_id, last_action, last_action_at)
+                VALUES ('pool-n1', 'show_crisis_screen', now())
+                """
+            )
+            cur.execute(f"NOTIFY {repository_module.CANDIDATE_POOL_CHANNEL}")
+
+        deadline = time.monotonic() + 5
+        seen = candidate_ids()
+        while seen != {"pool-n2"} and time.monotonic() < deadline:
+            time.sleep(0.05)
+            seen = candidate_ids()
+        assert seen == {"pool-n2"}
+    finally:
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM eligible_principals WHERE principal_id = ANY(%s)", (list(ids),))
+            cur.execute("DELETE FROM principal_crisis_state WHERE principal_id = ANY(%s)", (list(ids),))
@@ -0,0 +1,76 @@
+import itertools
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import repository as repository_module
+from app.repository import MessageRecord, PostgresRepository, psycopg
+from tools.compact_daily_ack_aggregates import main as compact_main
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def _message(principal_id: str) -> MessageRecord:
+    return MessageRecord(
+        principal_id=principal_id,
+        valence="positive",
+        intensity="low",
+        emotion=None,
+        theme_tags=["work"],
+        risk_level=0,
+        sanitized_text="hello",
+        reid_risk=0.0,
+    )
+
+
+def _shard_rows(day) -> int:
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT COUNT(*) FROM daily_ack_aggregates WHERE utc_day = %s AND theme_id = 'work'",
+            (day,),
+        )
+        return int(cur.fetchone()[0])
+
+
+def _work_totals(repo):
+    rows = repo.list_daily_ack_aggregates(1, theme_id="work")
+    return [(row.delivered_count, row.positive_ack_count) for row in rows]
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_ack_aggregates_sum_shards_and_compact(monkeypatch, capsys):
+    shards = itertools.cycle(range(4))
+    monkeypatch.setattr(repository_module, "_daily_ack_shard", lambda: next(shards))
+    repo = PostgresRepository(POSTGRES_DSN)
+    today = datetime.now(timezone.utc).date()
+    before = _work_totals(repo)
+    base_delivered, base_positive = before[0] if before else (0, 0)
+    health_before = repo.get_global_matching_health(window_days=1)
+
+    for index in range(3):
+        message_id = repo.save_message(_message("shard-sender"))
+        inbox_item_id = repo.create_inbox_item(message_id, f"shard-recipient-{index}", "hello")
+        repo.acknowledge(inbox_item_id, f"shard-recipient-{index}", "thanks")
+
+    assert _shard_rows(today) >= 4
+    assert _work_totals(repo) == [(base_delivered + 3, base_positive + 3)]
+    health = repo.get_global_matching_health(window_days=1)
+    assert health.delivered_count - health_before.delivered_count == 3
+    assert repo.verify_daily_ack_aggregates(today, today)["days_mismatched"] == 0
+
+    monkeypatch.setattr("tools.compact_daily_ack_aggregates.get_repository", lambda: repo)
+    assert compact_main(["--min-age-days", "0"]) == 0
+    assert "daily_ack_compact status=ok" in capsys.readouterr().out
+    assert _shard_rows(today) == 1
+    assert _work_totals(repo) == [(base_delivered + 3, base_positive + 3)]
+    assert repo.verify_daily_ack_aggregates(today, today)["days_mismatched"] == 0
+    assert repo.compact_daily_ack_aggregates(today + timedelta(days=1)) == {
+        "rows_folded": 0,
+        "rows_merged": 0,
+    }
+
+
+def test_compact_daily_ack_aggregates_rejects_negative_age(capsys):
+    assert compact_main(["--min-age-days", "-1"]) == 1
+    assert "daily_ack_compact status=fail reason=invalid_min_age_days" in capsys.readouterr().out
@@ -0,0 +1,242 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import eligible_pool as eligible_pool_module
+from app import repository as repository_module
+from app.cache import TTLCache
+from app.eligible_pool import RedisEligiblePool
+from app.repository import PostgresRepository, psycopg
+
+
+class FakePipeline:
+    def __init__(self, client: "FakeRedis") -> None:
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        results = [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in self._calls]
+        self._calls = []
+        return results
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.strings: dict[str, tuple[str, int]] = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def expire(self, key, seconds):
+        return True
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, member):
+        self.zsets.get(key, {}).pop(member, None)
+
+    def zremrangebyscore(self, key, low, high):
+        members = self.zsets.get(key, {})
+        bound = float(str(high).lstrip("("))
+        for member in [m for m, score in members.items() if score < bound]:
+            del members[member]
+
+    def zrangebyscore(self, key, low, high, withscores=False):
+        members = self.zsets.get(key, {})
+        return [(m, s) for m, s in sorted(members.items(), key=lambda item: item[1]) if s >= low]
+
+    def exists(self, key):
+        return 1 if key in self.strings else 0
+
+    def set(self, key, value, ex=None):
+        self.strings[key] = (value, ex)
+
+    def get(self, key):
+        entry = self.strings.get(key)
+        return entry[0] if entry else None
+
+    def mget(self, *keys):
+        return [self.get(key) for key in keys]
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.strings[key] = (str(value), None)
+        return value
+
+
+def _warm(pool: RedisEligiblePool) -> RedisEligiblePool:
+    pool.load_rows([], [], NOW, pool.begin_warm())
+    return pool
+
+
+NOW = datetime(2026, 1, 10, 12, 30, tzinfo=timezone.utc)
+
+
+def test_redis_pool_filters_by_theme_and_orders_by_recency():
+    pool = _warm(RedisEligiblePool(FakeRedis()))
+    pool.upsert("a", "low", ["grief"], NOW - timedelta(hours=3))
+    pool.upsert("b", "low", ["grief", "work"], NOW)
+    pool.upsert("c", "low", ["work"], NOW)
+    pool.upsert("d", "high", ["grief"], NOW)
+
+    grief = pool.load_pool("low", ["grief"], NOW, limit=10)
+    assert [c.candidate_id for c in grief] == ["b", "a"]
+    assert grief[0].themes == ["grief", "work"]
+
+    everyone = pool.load_pool("low", [], NOW, limit=10)
+    assert [c.candidate_id for c in everyone] == ["b", "c", "a"]
+    assert len(pool.load_pool("low", [], NOW, limit=1)) == 1
+
+
+def test_redis_pool_moves_principal_and_prunes_stale_members():
+    client = FakeRedis()
+    pool = _warm(RedisEligiblePool(client))
+    pool.upsert("a", "low", ["grief"], NOW - timedelta(hours=100))
+    pool.upsert("b", "low", ["grief"], NOW)
+    pool.upsert("b", "high", ["work"], NOW)
+
+    assert pool.load_pool("low", ["grief"], NOW, limit=10) == ()
+    assert "a" not in client.zsets["elig:pool:low:grief"]
+    assert "b" not in client.zsets["elig:pool:low"]
+    assert [c.candidate_id for c in pool.load_pool("high", ["work"], NOW, limit=10)] == ["b"]
+
+
+def test_redis_pool_touch_keeps_themes_and_excludes_crisis():
+    client = FakeRedis()
+    pool = _warm(RedisEligiblePool(client))
+    pool.upsert("a", "low", ["grief"], NOW - timedelta(hours=2))
+    pool.upsert("b", "low", ["grief"], NOW - timedelta(hours=1))
+    pool.touch("a", "low", NOW)
+
+    assert [c.candidate_id for c in pool.load_pool("low", ["grief"], NOW, limit=10)] == ["a", "b"]
+
+    pool.mark_crisis("a", NOW - timedelta(hours=1), NOW)
+    assert client.strings["elig:crisis:a"][1] == 23 * 3600
+    assert [c.candidate_id for c in pool.load_pool("low", ["grief"], NOW, limit=10)] == ["b"]
+
+    pool.mark_crisis("b", NOW - timedelta(hours=30), NOW)
+    assert "elig:crisis:b" not in client.strings
+
+
+@pytest.mark.skipif(psycopg is None, reason="psycopg not installed")
+def test_postgres_repository_reads_pool_from_redis(monkeypatch):
+    fallback = eligible_pool_module.FallbackEligiblePool()
+    fallback._redis = _warm(RedisEligiblePool(FakeRedis()))
+    monkeypatch.setattr(repository_module, "get_eligible_pool", lambda: fallback)
+    monkeypatch.setattr(repository_module, "_candidate_pool_cache", TTLCache(0))
+    mirrored = []
+    monkeypatch.setattr(repository_module, "submit_mirror_write", mirrored.append)
+    repo = PostgresRepository("postgresql://unused")
+
+    repo.upsert_eligible_principal("r1", "low", ["grief"])
+    repo.upsert_eligible_principal("r2", "low", ["grief"])
+    repo.touch_eligible_principal("r3", "low")
+
+    assert len(mirrored) == 3
+    candidates = repo.get_eligible_candidates("r1", "low", ["grief"], limit=10)
+    assert {c.candidate_id for c in candidates} == {"r2"}
+
+
+def test_redis_pool_is_cold_until_warmed_and_after_a_missed_crisis_write():
+    client = FakeRedis()
+    pool = RedisEligiblePool(client)
+    pool.upsert("a", "low", ["grief"], NOW)
+    assert pool.is_warm() is False
+    assert pool.load_pool("low", ["grief"], NOW, limit=10) is None
+
+    generation = pool.begin_warm()
+    pool.mark_cold()
+    pool.load_rows([("b", "low", ["grief"], NOW)], [], NOW, generation)
+    # The warm started before the crisis write was missed, so it stays cold.
+    assert pool.is_warm() is False
+
+    pool.load_rows([("b", "low", ["grief"], NOW)], [], NOW, pool.begin_warm())
+    assert pool.is_warm() is True
+    assert [c.candidate_id for c in pool.load_pool("low", ["grief"], NOW, limit=10)] == [
+        "a",
+        "b",
+    ]
+
+
+@pytest.mark.skipif(psycopg is None, reason="psycopg not installed")
+def test_postgres_repository_reads_sql_while_redis_pool_is_cold(monkeypatch):
+    fallback = eligible_pool_module.FallbackEligiblePool()
+    fallback._redis = RedisEligiblePool(FakeRedis())
+    monkeypatch.setattr(repository_module, "get_eligible_pool", lambda: fallback)
+    monkeypatch.setattr(repository_module, "_candidate_pool_cache", TTLCache(0))
+    repo = PostgresRepository("postgresql://unused")
+    queries = []
+
+    class FakeCursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+        def execute(self, query, params):
+            queries.append(query)
+
+        def fetchall(self):
+            return [("sql-1", "low", ["grief"])]
+
+    class FakeConn:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+        def cursor(self):
+            return FakeCursor()
+
+    monkeypatch.setattr(repo, "_conn", lambda: FakeConn())
+    candidates = repo.get_eligible_candidates("r1", "low", ["grief"], limit=10)
+    assert [c.candidate_id for c in candidates] == ["sql-1"]
+    assert len(queries) == 1
+
+
+def test_failed_crisis_write_marks_the_mirror_cold_on_reconnect(monkeypatch):
+    client = FakeRedis()
+    _warm(RedisEligiblePool(client))
+    fallback = eligible_pool_module.FallbackEligiblePool()
+    monkeypatch.setattr(eligible_pool_module, "REDIS_URL", "redis://unused")
+
+    class Unreachable:
+        RedisError = RuntimeError
+
+        class Redis:
+            @staticmethod
+            def from_url(*args, **kwargs):
+                raise RuntimeError("down")
+
+    monkeypatch.setattr(eligible_pool_module, "redis", Unreachable)
+    assert fallback.mark_crisis("a", NOW, NOW) is False
+    assert fallback.mark_cold() is False
+    assert RedisEligiblePool(client).is_warm() is True
+
+    class Reachable(Unreachable):
+        class Redis:
+            @staticmethod
+            def from_url(*args, **kwargs):
+                client.ping = lambda: True
+                return client
+
+    monkeypatch.setattr(eligible_pool_module, "redis", Reachable)
+    assert fallback.is_warm() is False
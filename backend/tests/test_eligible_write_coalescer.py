@@ -0,0 +1,189 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import eligible_pool as eligible_pool_module
+from app import repository as repository_module
+from app.eligible_pool import EligibleWriteCoalescer
+from app.repository import PostgresRepository, psycopg
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+NOW = datetime(2026, 1, 10, 12, 30, tzinfo=timezone.utc)
+BUCKET = datetime(2026, 1, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def _recording_flush(batches, offset_batches=None):
+    def flush(writes, offsets):
+        batches.append(writes)
+        if offset_batches is not None:
+            offset_batches.append(offsets)
+
+    return flush
+
+
+def test_coalescer_merges_writes_per_principal():
+    batches = []
+    coalescer = EligibleWriteCoalescer(_recording_flush(batches), 60, max_pending=100)
+    coalescer.record_upsert("p1", "low", ["grief"], NOW - timedelta(hours=1))
+    coalescer.record_touch("p1", "high", NOW)
+    coalescer.record_touch("p2", "low", NOW)
+    coalescer.record_upsert("p2", "medium", ["work"], NOW - timedelta(hours=2))
+
+    assert coalescer.stats()["pending"] == 2
+    assert coalescer.flush() == 2
+    assert sorted(batches[0]) == [
+        ("p1", "low", ["grief"], BUCKET),
+        ("p2", "medium", ["work"], BUCKET),
+    ]
+    stats = coalescer.stats()
+    assert stats["pending"] == 0
+    assert stats["flushes"] == 1
+    assert stats["rows_flushed"] == 2
+    assert coalescer.flush() == 0
+
+
+def test_coalescer_flushes_when_buffer_full():
+    batches = []
+    coalescer = EligibleWriteCoalescer(_recording_flush(batches), 60, max_pending=2)
+    coalescer.record_touch("p1", "low", NOW)
+    assert batches == []
+    coalescer.record_touch("p2", "low", NOW)
+    assert len(batches) == 1
+    assert coalescer.stats()["pending"] == 0
+
+
+def test_coalescer_requeues_failed_flush_without_losing_newer_writes():
+    calls = []
+
+    def flaky_flush(writes, offsets):
+        calls.append(list(writes))
+        if len(calls) == 1:
+            raise RuntimeError("db down")
+
+    coalescer = EligibleWriteCoalescer(flaky_flush, 60, max_pending=100)
+    coalescer.record_upsert("p1", "low", ["grief"], NOW)
+    assert coalescer.flush() == 0
+    coalescer.record_touch("p1", "low", NOW)
+    assert coalescer.stats()["failures"] == 1
+
+    assert coalescer.flush() == 1
+    assert calls[1] == [("p1", "low", ["grief"], BUCKET)]
+
+
+def test_coalescer_flushes_timezone_offsets_with_the_batch():
+    batches = []
+    offset_batches = []
+    coalescer = EligibleWriteCoalescer(
+        _recording_flush(batches, offset_batches), 60, max_pending=100
+    )
+    coalescer.record_timezone_offset("p1", 60)
+    coalescer.record_upsert("p1", "low", ["grief"], NOW)
+    coalescer.record_timezone_offset("p1", 120)
+    coalescer.record_timezone_offset("p2", -300)
+
+    assert coalescer.flush() == 2
+    assert batches == [[("p1", "low", ["grief"], BUCKET)]]
+    assert offset_batches == [{"p1": 120, "p2": -300}]
+    assert coalescer.flush() == 0
+
+
+def test_coalescer_flush_interval_is_bounded():
+    assert EligibleWriteCoalescer(lambda writes, offsets: None, 10**6).flush_interval_seconds == 3600
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_coalesced_upserts_flush_in_one_statement(monkeypatch):
+    monkeypatch.setattr(eligible_pool_module, "ELIGIBLE_WRITE_FLUSH_SECONDS", 3600)
+    monkeypatch.setattr(eligible_pool_module, "_coalescers", {})
+    monkeypatch.setattr(repository_module, "get_eligible_pool", lambda: None)
+    repo = PostgresRepository(POSTGRES_DSN)
+    ids = ["coalesce-1", "coalesce-2", "coalesce-3"]
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM eligible_principals WHERE principal_id = ANY(%s)", (ids,))
+        cur.execute(
+            """
+            INSERT INTO eligible_principals
+            (principal_id, intensity_bucket, theme_tags, last_active_bucket, updated_at)
+            VALUES ('coalesce-3', 'high', ARRAY['work'], now() - interval '5 hours', now())
+            """
+        )
+
+    try:
+        repo.set_last_known_timezone_offset("coalesce-1", 90)
+        repo.upsert_eligible_principal("coalesce-1", "low", ["grief"])
+        repo.upsert_eligible_principal("coalesce-1", "medium", ["grief", "work"])
+        repo.touch_eligible_principal("coalesce-2", "low")
+        repo.touch_eligible_principal("coalesce-3", "low")
+
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT count(*) FROM eligible_principals WHERE principal_id = ANY(%s)",
+                (ids[:2],),
+            )
+            assert cur.fetchone()[0] == 0
+
+        coalescer = eligible_pool_module._coalescers[POSTGRES_DSN]
+        assert coalescer.stop() == 3
+
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT principal_id, intensity_bucket, theme_tags,
+                       last_active_bucket = date_trunc('hour', now()),
+                       last_known_timezone_offset_minutes
+                FROM eligible_principals
+                WHERE principal_id = ANY(%s)
+                ORDER BY principal_id
+                """,
+                (ids,),
+            )
+            rows = cur.fetchall()
+        assert rows == [
+            ("coalesce-1", "medium", ["grief", "work"], True, 90),
+            ("coalesce-2", "low", [], True, None),
+            ("coalesce-3", "high", ["work"], True, None),
+        ]
+    finally:
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM eligible_principals WHERE principal_id = ANY(%s)", (ids,))
+
+
+def test_coalescer_flushes_in_principal_order():
+    batches = []
+    coalescer = EligibleWriteCoalescer(_recording_flush(batches), 60, max_pending=100)
+    for principal_id in ("p3", "p1", "p2"):
+        coalescer.record_touch(principal_id, "low", NOW)
+    coalescer.flush()
+    assert [write[0] for write in batches[0]] == ["p1", "p2", "p3"]
+
+
+def test_coalescer_backs_off_inline_flushes_after_failure(monkeypatch):
+    calls = []
+    now = [0.0]
+
+    def failing_flush(writes, offsets):
+        calls.append(len(writes))
+        raise RuntimeError("db down")
+
+    coalescer = EligibleWriteCoalescer(
+        failing_flush, 1, max_pending=1, clock=lambda: now[0]
+    )
+    monkeypatch.setattr(coalescer, "_ensure_thread", lambda: None)
+    coalescer.record_touch("p1", "low", NOW)
+    assert calls == [1]
+    # Requests during the backoff only buffer.
+    coalescer.record_touch("p2", "low", NOW)
+    coalescer.record_touch("p3", "low", NOW)
+    assert calls == [1]
+
+    now[0] = 2.5
+    coalescer.record_touch("p4", "low", NOW)
+    assert calls == [1, 4]
+    # The second failure in a row doubles the backoff.
+    now[0] = 5.0
+    coalescer.record_touch("p5", "low", NOW)
+    assert calls == [1, 4]
+    now[0] = 7.0
+    coalescer.record_touch("p6", "low", NOW)
+    assert calls == [1, 4, 6]
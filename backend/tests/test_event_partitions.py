@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.repository import PostgresRepository, SecurityEventRecord, psycopg
+from tools.ensure_event_partitions import main as ensure_main
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def _record(repo, actor_hash: str, created_at: datetime) -> None:
+    repo.record_security_event(
+        SecurityEventRecord(
+            actor_hash=actor_hash,
+            event_type="identity_leak_detected",
+            meta={},
+            created_at=created_at,
+        )
+    )
+
+
+def _partitions_by_actor(prefix: str) -> dict:
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT actor_hash, tableoid::regclass::text
+            FROM security_events
+            WHERE actor_hash LIKE %s
+            """,
+            (f"{prefix}%",),
+        )
+        return dict(cur.fetchall())
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_security_event_retention_drops_daily_partitions():
+    repo = PostgresRepository(POSTGRES_DSN)
+    now = datetime(2026, 3, 20, 12, 0, tzinfo=timezone.utc)
+    old = now - timedelta(days=40)
+    boundary = now - timedelta(days=30, hours=6)
+    recent = now - timedelta(days=5)
+    _record(repo, "partition-old", old)
+    _record(repo, "partition-boundary", boundary)
+    _record(repo, "partition-recent", recent)
+    assert set(_partitions_by_actor("partition-").values()) == {"security_events_default"}
+
+    created = repo.ensure_event_partitions(now=now, days_ahead=1, days_back=45)
+    assert created == {"security_events": 47, "second_touch_events": 47}
+    assert repo.ensure_event_partitions(now=now, days_ahead=1, days_back=45) == {
+        "security_events": 0,
+        "second_touch_events": 0,
+    }
+    assert _partitions_by_actor("partition-") == {
+        "partition-old": "security_events_p20260208",
+        "partition-boundary": "security_events_p20260218",
+        "partition-recent": "security_events_p20260315",
+    }
+
+    assert repo.prune_security_events(now, retention_days=30) == 2
+    assert _partitions_by_actor("partition-") == {
+        "partition-recent": "security_events_p20260315",
+    }
+    # Whole days before the cutoff are dropped; the cutoff day keeps its
+    # partition and only loses the rows older than the cutoff.
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('security_events_p20260217')")
+        assert cur.fetchone()[0] is None
+        cur.execute("SELECT to_regclass('security_events_p20260218')")
+        assert cur.fetchone()[0] == "security_events_p20260218"
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_ensure_event_partitions_tool(monkeypatch, capsys):
+    repo = PostgresRepository(POSTGRES_DSN)
+    monkeypatch.setattr("tools.ensure_event_partitions.get_repository", lambda: repo)
+    assert ensure_main(["--days-ahead", "2"]) == 0
+    output = capsys.readouterr().out
+    assert "event_partitions table=security_events status=ok" in output
+    assert "event_partitions table=second_touch_events status=ok" in output
+
+    today = datetime.now(timezone.utc).date()
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        for offset in range(3):
+            day = today + timedelta(days=offset)
+            cur.execute("SELECT to_regclass(%s)", (f"second_touch_events_p{day:%Y%m%d}",))
+            assert cur.fetchone()[0] is not None
+
+
+def test_ensure_event_partitions_rejects_invalid_days(capsys):
+    assert ensure_main(["--days-ahead", "-1"]) == 1
+    assert "event_partitions status=fail reason=invalid_days_ahead" in capsys.readouterr().out
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_partition_creation_waits_for_inserts_into_default():
+    repo = PostgresRepository(POSTGRES_DSN)
+    day = datetime(2031, 5, 5, 9, 0, tzinfo=timezone.utc)
+    results = []
+    # An insert for a day without a partition is still in flight in the
+    # default partition while the partition for that day is created.
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO security_events (actor_hash, event_type, meta, created_at)
+            VALUES ('partition-inflight', 'identity_leak_detected', '{}', %s)
+            """,
+            (day,),
+        )
+        worker = threading.Thread(
+            target=lambda: results.append(repo.ensure_event_partitions(now=day, days_ahead=0))
+        )
+        worker.start()
+        time.sleep(0.3)
+        assert results == []
+    worker.join(timeout=10)
+    try:
+        assert results == [{"security_events": 1, "second_touch_events": 1}]
+        assert _partitions_by_actor("partition-inflight") == {
+            "partition-inflight": "security_events_p20310505"
+        }
+    finally:
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute("DROP TABLE IF EXISTS security_events_p20310505")
+            cur.execute("DROP TABLE IF EXISTS second_touch_events_p20310505")
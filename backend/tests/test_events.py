@@ -94,6 +94,27 @@ class FakeRepo:
     def is_in_crisis_window(self, principal_id: str, window_hours: int, now=None) -> bool:
         return False
 
+    def load_principal_context(
+        self,
+        principal_id: str,
+        window_days: int = 7,
+        include_health=True,
+        now=None,
+        include_affinity=True,
+    ):
+        return repository_module.PrincipalContext(
+            principal_id=principal_id,
+            actor_hash="actor",
+            crisis_at=None,
+            timezone_offset_minutes=None,
+            affinity_map={},
+            health=repository_module.MatchingHealth(
+                delivered_count=0,
+                positive_ack_count=0,
+                ratio=0.0,
+            ),
+        )
+
     def get_matching_health(self, principal_id: str, window_days: int = 7):
         return repository_module.MatchingHealth(
             delivered_count=0,
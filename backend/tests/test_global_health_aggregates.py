@@ -0,0 +1,73 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from app.bridge import SYSTEM_SENDER_ID
+from app.repository import MessageRecord, PostgresRepository, psycopg
+from tools.verify_daily_ack_aggregates import main as verify_main
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def _message(principal_id: str, theme_tags: list[str]) -> MessageRecord:
+    return MessageRecord(
+        principal_id=principal_id,
+        valence="positive",
+        intensity="low",
+        emotion=None,
+        theme_tags=theme_tags,
+        risk_level=0,
+        sanitized_text="hello",
+        reid_risk=0.0,
+    )
+
+
+def _deliver(repo, sender: str, recipient: str, theme_tags: list[str], reaction=None) -> None:
+    message_id = repo.save_message(_message(sender, theme_tags))
+    inbox_item_id = repo.create_inbox_item(message_id, recipient, "hello")
+    if reaction:
+        repo.acknowledge(inbox_item_id, recipient, reaction)
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_global_health_excludes_system_sender(monkeypatch, capsys):
+    repo = PostgresRepository(POSTGRES_DSN)
+    before = repo.get_global_matching_health(window_days=7)
+
+    _deliver(repo, "global-health-sender", "global-health-r1", ["calm"], "thanks")
+    _deliver(repo, "global-health-sender", "global-health-r2", [], "helpful")
+    _deliver(repo, "global-health-sender", "global-health-r3", ["calm"])
+    _deliver(repo, SYSTEM_SENDER_ID, "global-health-r4", ["calm"], "thanks")
+
+    after = repo.get_global_matching_health(window_days=7)
+    assert after.delivered_count - before.delivered_count == 3
+    assert after.positive_ack_count - before.positive_ack_count == 2
+
+    today = datetime.now(timezone.utc).date()
+    assert repo.verify_daily_ack_aggregates(today, today)["days_mismatched"] == 0
+
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE daily_ack_aggregates
+            SET peer_delivered_count = peer_delivered_count + 1
+            WHERE utc_day = %s AND theme_id = 'calm'
+            """,
+            (today,),
+        )
+    monkeypatch.setattr("tools.verify_daily_ack_aggregates.get_repository", lambda: repo)
+    try:
+        assert verify_main(["--days", "1"]) == 1
+        assert "daily_ack_verify status=fail" in capsys.readouterr().out
+    finally:
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE daily_ack_aggregates
+                SET peer_delivered_count = peer_delivered_count - 1
+                WHERE utc_day = %s AND theme_id = 'calm'
+                """,
+                (today,),
+            )
+    assert verify_main(["--days", "1"]) == 0
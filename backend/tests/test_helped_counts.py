@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from app.repository import MessageRecord, PostgresRepository, _hash_affinity_actor, psycopg
+from tools.rebuild_helped_counts import main as rebuild_main
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def _message(principal_id: str) -> MessageRecord:
+    return MessageRecord(
+        principal_id=principal_id,
+        valence="positive",
+        intensity="low",
+        emotion=None,
+        theme_tags=["calm"],
+        risk_level=0,
+        sanitized_text="hello",
+        reid_risk=0.0,
+    )
+
+
+def _ack(repo, sender: str, recipient: str, reaction: str) -> None:
+    message_id = repo.save_message(_message(sender))
+    inbox_item_id = repo.create_inbox_item(message_id, recipient, "hello")
+    repo.acknowledge(inbox_item_id, recipient, reaction)
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_helped_count_counts_first_positive_ack_per_pair(monkeypatch, capsys):
+    repo = PostgresRepository(POSTGRES_DSN)
+    sender = "helped-count-sender"
+    _ack(repo, sender, "helped-r1", "thanks")
+    _ack(repo, sender, "helped-r1", "helpful")
+    _ack(repo, sender, "helped-r2", "relate")
+    _ack(repo, sender, "helped-r3", "not_helpful")
+    assert repo.get_helped_count(sender) == 2
+    assert repo.get_helped_count("helped-count-nobody") == 0
+
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            "UPDATE helped_counts SET helped_count = 99 WHERE sender_hash = %s",
+            (_hash_affinity_actor(sender),),
+        )
+    monkeypatch.setattr("tools.rebuild_helped_counts.get_repository", lambda: repo)
+    assert rebuild_main(["--batch-size", "2"]) == 0
+    assert "helped_count_rebuild status=ok" in capsys.readouterr().out
+    assert repo.get_helped_count(sender) == 2
+
+    _ack(repo, sender, "helped-r3", "thanks")
+    assert repo.get_helped_count(sender) == 3
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_helped_count_backfill_runs_once_without_truncating():
+    repo = PostgresRepository(POSTGRES_DSN)
+    sender = "helped-backfill-sender"
+    sender_hash = _hash_affinity_actor(sender)
+    _ack(repo, sender, "helped-backfill-r1", "thanks")
+    _ack(repo, sender, "helped-backfill-r2", "thanks")
+
+    # History from before migration 0023: one pair was never materialized.
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM helped_pairs WHERE sender_hash = %s AND recipient_hash = %s",
+            (sender_hash, _hash_affinity_actor("helped-backfill-r2")),
+        )
+        cur.execute(
+            "UPDATE helped_counts SET helped_count = 1 WHERE sender_hash = %s", (sender_hash,)
+        )
+        cur.execute("DELETE FROM helped_counts_backfill")
+    # Until the backfill finishes, reads fall back to the live count.
+    assert repo.get_helped_count(sender) == 2
+
+    # A concurrent rebuild holds the lock; this one backs off.
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(hashtext('helped_counts_rebuild'))")
+        assert repo.backfill_helped_counts()["status"] == "skipped"
+    assert repo.get_helped_count(sender) == 2
+
+    assert repo.backfill_helped_counts(batch_size=1)["status"] == "ok"
+    assert repo.get_helped_count(sender) == 2
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("SELECT helped_count FROM helped_counts WHERE sender_hash = %s", (sender_hash,))
+        assert cur.fetchone()[0] == 2
+    assert repo.backfill_helped_counts() is None
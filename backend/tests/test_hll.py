@@ -0,0 +1,172 @@
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app import hll as hll_module
+from app.hll import HyperLogLog, union
+from app.repository import (
+    MOOD_PRINCIPALS_DIMENSION,
+    InMemoryRepository,
+    MoodEventRecord,
+    PostgresRepository,
+    psycopg,
+)
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def test_hll_estimates_within_expected_error():
+    for cardinality in (0, 10, 1000, 50000):
+        sketch = HyperLogLog()
+        sketch.update(f"principal-{index}" for index in range(cardinality))
+        sketch.update(f"principal-{index}" for index in range(cardinality // 2))
+        assert abs(sketch.count() - cardinality) <= max(1, cardinality * 0.05)
+
+
+def test_hll_merge_matches_sketch_of_union():
+    first = HyperLogLog()
+    second = HyperLogLog()
+    combined = HyperLogLog()
+    first.update(f"a-{index}" for index in range(3000))
+    second.update(f"a-{index}" for index in range(2000, 6000))
+    combined.update(f"a-{index}" for index in range(6000))
+
+    assert union([first, second]) == combined
+    with pytest.raises(ValueError):
+        first.merge(HyperLogLog(precision=10))
+
+
+def test_hll_serialization_round_trip():
+    sketch = HyperLogLog(precision=10)
+    sketch.update(["x", "y", "z"])
+    restored = HyperLogLog.from_bytes(sketch.to_bytes())
+    assert restored == sketch
+    assert restored.count() == 3
+    with pytest.raises(ValueError):
+        HyperLogLog.from_bytes(b"\x09\x0a")
+    with pytest.raises(ValueError):
+        HyperLogLog.from_bytes(sketch.to_bytes()[:-1])
+
+
+def test_in_memory_distinct_window_unions_days():
+    repo = InMemoryRepository()
+    today = date(2026, 5, 10)
+    repo.add_distinct_values("helped", today, ["p1", "p2"])
+    repo.add_distinct_values("helped", today - timedelta(days=1), ["p2", "p3"])
+    repo.add_distinct_values("helped", today - timedelta(days=7), ["p4"])
+    repo.add_distinct_values("other", today, ["p5"])
+
+    assert repo.count_distinct_window("helped", today, 7) == 3
+    assert repo.count_distinct_window("helped", today, 8) == 4
+    assert repo.count_distinct_window("missing", today, 7) == 0
+
+
+def test_hll_registers_depend_on_the_hash_key(monkeypatch):
+    values = [f"principal-{index}" for index in range(50)]
+    keyed = HyperLogLog()
+    keyed.update(values)
+    monkeypatch.setattr(hll_module, "_HASH_KEY", b"another-key")
+    rekeyed = HyperLogLog()
+    rekeyed.update(values)
+    assert rekeyed != keyed
+
+
+def _mood_event(principal_id: str, created_at: datetime) -> MoodEventRecord:
+    return MoodEventRecord(
+        principal_id=principal_id,
+        created_at=created_at,
+        valence="neutral",
+        intensity="low",
+        expressed_emotion=None,
+        risk_level=0,
+        theme_tag="hll-sketch-theme",
+    )
+
+
+def test_in_memory_mood_principal_sketch_counts_each_day_once():
+    repo = InMemoryRepository()
+    day = date(2026, 5, 10)
+    noon = datetime(2026, 5, 10, 12, tzinfo=timezone.utc)
+    for principal_id in ("p1", "p2", "p1"):
+        repo.record_mood_event(_mood_event(principal_id, noon))
+    repo.record_mood_event(_mood_event("p3", noon - timedelta(days=1)))
+
+    assert repo.sketch_mood_principals(day) == 2
+    assert repo.sketch_mood_principals(day) == 2
+    assert repo.sketch_mood_principals(day - timedelta(days=1)) == 1
+    assert repo.count_distinct_window(MOOD_PRINCIPALS_DIMENSION, day, 1) == 2
+    assert repo.count_distinct_window(MOOD_PRINCIPALS_DIMENSION, day, 2) == 3
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_mood_principal_sketch_reads_daily_rollups():
+    repo = PostgresRepository(POSTGRES_DSN)
+    day = date(2031, 6, 1)
+    noon = datetime(2031, 6, 1, 12, tzinfo=timezone.utc)
+
+    def cleanup():
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM mood_events WHERE theme_tag = %s", ("hll-sketch-theme",))
+            cur.execute("DELETE FROM mood_daily_rollups WHERE utc_day = %s", (day,))
+            cur.execute(
+                "DELETE FROM distinct_sketches WHERE dimension = %s AND utc_day = %s",
+                (MOOD_PRINCIPALS_DIMENSION, day),
+            )
+
+    cleanup()
+    try:
+        for principal_id in ("hll-p1", "hll-p2", "hll-p1"):
+            repo.record_mood_event(_mood_event(principal_id, noon))
+        assert repo.sketch_mood_principals(day) == 2
+        assert repo.sketch_mood_principals(day) == 2
+        assert repo.count_distinct_window(MOOD_PRINCIPALS_DIMENSION, day, 1) == 2
+    finally:
+        cleanup()
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_distinct_sketches_merge_per_day():
+    repo = PostgresRepository(POSTGRES_DSN)
+    dimension = "hll-test-dimension"
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM distinct_sketches WHERE dimension = %s", (dimension,))
+    today = date(2026, 5, 10)
+    repo.add_distinct_values(dimension, today, [f"p{index}" for index in range(100)])
+    repo.add_distinct_values(dimension, today, [f"p{index}" for index in range(50, 150)])
+    repo.add_distinct_values(dimension, today - timedelta(days=2), ["p0", "other"])
+
+    single_day = repo.count_distinct_window(dimension, today, 1)
+    assert abs(single_day - 150) <= 5
+    assert repo.count_distinct_window(dimension, today, 3) - single_day in (0, 1, 2)
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM distinct_sketches WHERE dimension = %s", (dimension,))
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_distinct_sketches_never_union_across_hash_keys(monkeypatch):
+    repo = PostgresRepository(POSTGRES_DSN)
+    dimension = "hll-key-dimension"
+    today = date(2026, 5, 10)
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM distinct_sketches WHERE dimension = %s", (dimension,))
+    try:
+        repo.add_distinct_values(dimension, today, [f"old-{index}" for index in range(40)])
+        repo.add_distinct_values(dimension, today - timedelta(days=1), ["old-x"])
+        assert repo.count_distinct_window(dimension, today, 2) == 41
+
+        monkeypatch.setattr(hll_module, "_HASH_KEY", b"rotated-key")
+        assert repo.count_distinct_window(dimension, today, 2) == 0
+        repo.add_distinct_values(dimension, today, ["new-1", "new-2"])
+        assert repo.count_distinct_window(dimension, today, 2) == 2
+
+        # Rows from before migration 0031 carry no fingerprint.
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute(
+                "UPDATE distinct_sketches SET key_id = NULL WHERE dimension = %s",
+                (dimension,),
+            )
+        assert repo.count_distinct_window(dimension, today, 2) == 0
+    finally:
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM distinct_sketches WHERE dimension = %s", (dimension,))
@@ -100,6 +100,27 @@ class FakeRepo:
     def is_in_crisis_window(self, principal_id: str, window_hours: int) -> bool:
         return False
 
+    def load_principal_context(
+        self,
+        principal_id: str,
+        window_days: int = 7,
+        include_health=True,
+        now=None,
+        include_affinity=True,
+    ):
+        return repository_module.PrincipalContext(
+            principal_id=principal_id,
+            actor_hash="actor",
+            crisis_at=None,
+            timezone_offset_minutes=None,
+            affinity_map={},
+            health=repository_module.MatchingHealth(
+                delivered_count=0,
+                positive_ack_count=0,
+                ratio=0.0,
+            ),
+        )
+
 
 def _headers(token: str = "dev_test"):
     return {"Authorization": f"Bearer {token}"}
@@ -50,6 +50,7 @@ class FakeRepo:
     def __init__(self) -> None:
         self.saved_messages = 0
         self.security_events = []
+        self.context_loads = []
 
     def save_message(self, record: repository_module.MessageRecord) -> str:
         self.saved_messages += 1
@@ -82,6 +83,28 @@ class FakeRepo:
     def is_in_crisis_window(self, principal_id: str, window_hours: int) -> bool:
         return False
 
+    def load_principal_context(
+        self,
+        principal_id: str,
+        window_days: int = 7,
+        include_health=True,
+        now=None,
+        include_affinity=True,
+    ):
+        self.context_loads.append((include_health, include_affinity))
+        return repository_module.PrincipalContext(
+            principal_id=principal_id,
+            actor_hash="actor",
+            crisis_at=None,
+            timezone_offset_minutes=None,
+            affinity_map={},
+            health=repository_module.MatchingHealth(
+                delivered_count=0,
+                positive_ack_count=0,
+                ratio=0.0,
+            ),
+        )
+
     def get_similar_count(
         self,
         principal_id: str,
@@ -149,6 +172,9 @@ def test_shadow_throttle_holds_on_threshold():
     assert third.json()["hold_reason"] == HoldReason.IDENTITY_LEAK.value
     assert "test@example.com" not in third.json()["sanitized_text"]
     assert repo.saved_messages == count_after_second
+    # A held message never matches, so it skips health and affinity.
+    assert repo.context_loads[-1] == (False, False)
+    assert repo.context_loads[0] == (True, True)
     assert any(
         event.event_type == SecurityEventType.IDENTITY_LEAK_THROTTLE_HELD.value
         for event in repo.security_events
@@ -0,0 +1,57 @@
+from app import maintenance_runner
+from app.maintenance_runner import MaintenanceJob, default_jobs, run_due_jobs
+from app.repository import InMemoryRepository
+
+
+def test_run_due_jobs_respects_intervals_and_isolates_failures():
+    calls = []
+    now = [100.0]
+
+    def failing(repo):
+        calls.append("failing")
+        raise RuntimeError("db down")
+
+    jobs = [
+        MaintenanceJob("fast", 10, lambda repo: calls.append("fast")),
+        MaintenanceJob("failing", 10, failing),
+        MaintenanceJob("slow", 60, lambda repo: calls.append("slow")),
+    ]
+    next_run_at = {}
+    repo = InMemoryRepository()
+
+    assert run_due_jobs(jobs, next_run_at, repo, clock=lambda: now[0]) == ["fast", "slow"]
+    assert calls == ["fast", "failing", "slow"]
+
+    now[0] = 105.0
+    assert run_due_jobs(jobs, next_run_at, repo, clock=lambda: now[0]) == []
+
+    now[0] = 111.0
+    assert run_due_jobs(jobs, next_run_at, repo, clock=lambda: now[0]) == ["fast"]
+    assert calls[-2:] == ["fast", "failing"]
+
+
+def test_offer_job_is_a_no_op_without_postgres():
+    from app.maintenance_runner import default_jobs
+
+    jobs = {job.name: job for job in default_jobs()}
+    assert jobs["second_touch_offers"].run(InMemoryRepository()) is None
+
+
+def test_single_process_jobs_are_off_by_default():
+    names = {job.name for job in default_jobs()}
+    assert "similar_count_grid" not in names
+    assert "mood_principal_sketch" not in names
+
+
+def test_default_jobs_refresh_the_similar_count_grid(monkeypatch):
+    monkeypatch.setattr(maintenance_runner, "SIMILAR_COUNT_GRID_REFRESH_SECONDS", 300)
+    jobs = {job.name: job for job in default_jobs()}
+    assert jobs["similar_count_grid"].run(InMemoryRepository()) is None
+
+
+def test_default_jobs_sketch_mood_principals(monkeypatch):
+    monkeypatch.setattr(maintenance_runner, "MOOD_PRINCIPAL_SKETCH_INTERVAL_SECONDS", 3600)
+    jobs = {job.name: job for job in default_jobs()}
+    result = jobs["mood_principal_sketch"].run(InMemoryRepository())
+    assert sorted(result.values()) == [0, 0]
+    assert jobs["mood_principal_sketch"].run(object()) is None
@@ -0,0 +1,65 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app import repository as repository_module
+from app.cache import TTLCache
+from app.matching import default_matching_tuning
+from app.repository import PostgresRepository, psycopg
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+@pytest.mark.skipif(psycopg is None, reason="psycopg not installed")
+def test_matching_tuning_concurrent_misses_load_once(monkeypatch):
+    monkeypatch.setattr(repository_module, "_matching_tuning_cache", TTLCache(60))
+    monkeypatch.setattr(repository_module, "ensure_listener", lambda *args: None)
+    repo = PostgresRepository("postgresql://unused")
+    loads = []
+
+    def slow_load():
+        loads.append(1)
+        time.sleep(0.05)
+        return default_matching_tuning()
+
+    monkeypatch.setattr(repo, "_load_matching_tuning", slow_load)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(repo.get_matching_tuning()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert results == [default_matching_tuning()] * 8
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_matching_tuning_invalidated_by_notify(monkeypatch):
+    monkeypatch.setattr(repository_module, "_matching_tuning_cache", TTLCache(600))
+    repo = PostgresRepository(POSTGRES_DSN)
+    baseline = default_matching_tuning()
+    repo.update_matching_tuning(baseline, datetime.now(timezone.utc))
+    assert repo.get_matching_tuning() == baseline
+
+    # Simulate another process running the tuning job.
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("UPDATE matching_tuning SET high_intensity_band = 0 WHERE id = 1")
+        cur.execute(f"NOTIFY {repository_module.MATCHING_TUNING_CHANNEL}")
+
+    deadline = time.monotonic() + 5
+    tuning = repo.get_matching_tuning()
+    while tuning.high_intensity_band != 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+        tuning = repo.get_matching_tuning()
+    try:
+        assert tuning.high_intensity_band == 0
+    finally:
+        repo.update_matching_tuning(baseline, datetime.now(timezone.utc))
+    assert repo.get_matching_tuning() == baseline
@@ -1,3 +1,6 @@
+from datetime import datetime, timedelta, timezone
+
+from app.repository import MOOD_PRINCIPALS_DIMENSION, InMemoryRepository
 from tools import ops_daily
 
 
@@ -44,3 +47,47 @@ def test_ops_daily_metrics_snapshot_line(monkeypatch, capsys):
     assert exit_code == 0
     output = capsys.readouterr().out
     assert "ops_metrics_snapshot" in output
+
+
+def test_ops_daily_forwards_compact_daily_ack_aggregates(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        ops_daily, "run_compact_daily_ack_aggregates", lambda argv: calls.append(argv) or 0
+    )
+    assert ops_daily.main(["compact_daily_ack_aggregates", "--min-age-days", "2"]) == 0
+    assert calls == [["--min-age-days", "2"]]
+
+
+def test_ops_daily_retention_cleanup_defaults_to_chunked(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ops_daily, "run_retention_cleanup", lambda argv: calls.append(argv) or 0)
+    assert ops_daily.main(["retention_cleanup"]) == 0
+    assert calls == [
+        ["--batch-size", "5000", "--sleep-ms", "50", "--max-runtime-seconds", "900"]
+    ]
+
+
+def test_ops_daily_metrics_report_distinct_mood_principals(monkeypatch, capsys):
+    repo = InMemoryRepository()
+    today = datetime.now(timezone.utc).date()
+    repo.add_distinct_values(MOOD_PRINCIPALS_DIMENSION, today, ["p1", "p2"])
+    repo.add_distinct_values(MOOD_PRINCIPALS_DIMENSION, today - timedelta(days=10), ["p3"])
+    monkeypatch.setattr(ops_daily, "get_repository", lambda: repo)
+    assert ops_daily.run_metrics(7, None).exit_code == 0
+    output = capsys.readouterr().out
+    assert "distinct_mood_principals window_days=7 estimate=2" in output
+    assert "distinct_mood_principals window_days=30 estimate=3" in output
+
+
+def test_ops_daily_sketches_mood_principals(monkeypatch, capsys):
+    repo = InMemoryRepository()
+    sketched = []
+    monkeypatch.setattr(repo, "sketch_mood_principals", lambda day: sketched.append(day) or 1)
+    monkeypatch.setattr("tools.sketch_mood_principals.get_repository", lambda: repo)
+    assert ops_daily.main(["sketch_mood_principals"]) == 0
+    today = datetime.now(timezone.utc).date()
+    assert sketched == [today - timedelta(days=1), today]
+    assert "mood_principal_sketch status=ok days=2 principals=2" in capsys.readouterr().out
+
+    assert ops_daily.main(["sketch_mood_principals", "--days", "0"]) == 1
+    assert "mood_principal_sketch status=fail reason=invalid_days" in capsys.readouterr().out
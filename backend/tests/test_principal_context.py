@@ -0,0 +1,96 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import repository as repository_module
+from app.cache import TTLCache
+from app.repository import (
+    InMemoryRepository,
+    MessageRecord,
+    PostgresRepository,
+    psycopg,
+)
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def _message(principal_id: str) -> MessageRecord:
+    return MessageRecord(
+        principal_id=principal_id,
+        valence="positive",
+        intensity="low",
+        emotion=None,
+        theme_tags=["calm"],
+        risk_level=0,
+        sanitized_text="hello",
+        reid_risk=0.0,
+    )
+
+
+def test_in_memory_principal_context_matches_individual_reads():
+    repo = InMemoryRepository()
+    now = datetime.now(timezone.utc)
+    repo.upsert_eligible_principal("ctx-sender", "low", ["calm"])
+    repo.set_last_known_timezone_offset("ctx-sender", 90)
+    repo.record_affinity("ctx-sender", "calm", 1.0, now=now)
+    repo.record_crisis_action("ctx-sender", "show_crisis_screen", now=now - timedelta(hours=2))
+
+    context = repo.load_principal_context("ctx-sender", now=now)
+
+    assert context.actor_hash == repository_module._hash_affinity_actor("ctx-sender")
+    assert context.timezone_offset_minutes == 90
+    assert context.affinity_map == repo.get_affinity_map("ctx-sender", now=now)
+    assert context.health == repo.get_matching_health("ctx-sender", 7)
+    assert context.in_crisis_window(24, now=now) is True
+    assert context.in_crisis_window(1, now=now) is False
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_principal_context_loads_in_one_query(monkeypatch):
+    monkeypatch.setattr(repository_module, "get_eligible_write_coalescer", lambda *_: None)
+    monkeypatch.setattr(repository_module, "get_eligible_pool", lambda: None)
+    repo = PostgresRepository(POSTGRES_DSN)
+    sender = "ctx-pg-sender"
+    recipient = "ctx-pg-recipient"
+    now = datetime.now(timezone.utc)
+    repo.upsert_eligible_principal(sender, "low", ["calm"])
+    repo.set_last_known_timezone_offset(sender, -120)
+    repo.record_affinity(sender, "calm", 1.0, now=now)
+    message_id = repo.save_message(_message(sender))
+    inbox_item_id = repo.create_inbox_item(message_id, recipient, "hello")
+    repo.acknowledge(inbox_item_id, recipient, "thanks")
+
+    connections = []
+    original_conn = repo._conn
+
+    def counting_conn():
+        connections.append(1)
+        return original_conn()
+
+    monkeypatch.setattr(repo, "_conn", counting_conn)
+    context = repo.load_principal_context(sender, now=now)
+    assert len(connections) == 1
+    monkeypatch.setattr(repo, "_conn", original_conn)
+
+    assert context.crisis_at is None
+    assert context.timezone_offset_minutes == -120
+    assert context.affinity_map == repo.get_affinity_map(sender, now=now)
+    assert context.health == repo.get_matching_health(sender, 7)
+    assert context.health.delivered_count == 1
+
+    connections.clear()
+    monkeypatch.setattr(repo, "_conn", counting_conn)
+    monkeypatch.setattr(repository_module, "_affinity_map_cache", TTLCache(600))
+    light = repo.load_principal_context(
+        sender, include_health=False, now=now, include_affinity=False
+    )
+    assert len(connections) == 1
+    monkeypatch.setattr(repo, "_conn", original_conn)
+    assert light.health.delivered_count == 0
+    assert light.affinity_map == {}
+    assert light.timezone_offset_minutes == -120
+    assert repository_module._affinity_map_cache.get((POSTGRES_DSN, light.actor_hash)) is None
+
+    repo.record_crisis_action(sender, "show_crisis_screen", now=now)
+    assert repo.load_principal_context(sender, now=now).in_crisis_window(24, now=now)
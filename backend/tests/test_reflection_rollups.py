@@ -0,0 +1,77 @@
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.repository import (
+    MoodEventRecord,
+    PostgresRepository,
+    _summarize_mood_events,
+    psycopg,
+)
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+EMOTIONS = [None, "calm", "sad", "anxious", "hopeful"]
+VALENCES = ["positive", "neutral", "negative"]
+
+
+def _raw_summary(principal_id: str, window_days: int):
+    cutoff = datetime.now(timezone.utc) - timedelta(days=window_days)
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT created_at, valence, intensity, expressed_emotion, risk_level, theme_tag
+            FROM mood_events
+            WHERE device_id = %s AND created_at >= %s
+            ORDER BY created_at ASC
+            """,
+            (principal_id, cutoff),
+        )
+        rows = cur.fetchall()
+    records = [
+        MoodEventRecord(
+            principal_id=principal_id,
+            created_at=row[0],
+            valence=row[1],
+            intensity=row[2],
+            expressed_emotion=row[3],
+            risk_level=row[4],
+            theme_tag=row[5],
+        )
+        for row in rows
+    ]
+    return _summarize_mood_events(records, window_days)
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_reflection_summary_matches_raw_events():
+    repo = PostgresRepository(POSTGRES_DSN)
+    rng = random.Random(5)
+    now = datetime.now(timezone.utc)
+    for seed_index in range(6):
+        principal_id = f"reflection-rollup-{seed_index}"
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM mood_events WHERE device_id = %s", (principal_id,))
+            cur.execute(
+                "DELETE FROM mood_daily_rollups WHERE principal_id = %s", (principal_id,)
+            )
+        offsets = sorted(rng.uniform(0, 12 * 24 * 60) for _ in range(rng.randint(0, 40)))
+        # Insert out of order to exercise the last-valence-of-day guard.
+        rng.shuffle(offsets)
+        for minutes in offsets:
+            repo.record_mood_event(
+                MoodEventRecord(
+                    principal_id=principal_id,
+                    created_at=now - timedelta(minutes=minutes),
+                    valence=rng.choice(VALENCES),
+                    intensity="low",
+                    expressed_emotion=rng.choice(EMOTIONS),
+                    risk_level=0,
+                    theme_tag="calm",
+                )
+            )
+        for window_days in (1, 3, 7, 30):
+            assert repo.get_reflection_summary(principal_id, window_days) == _raw_summary(
+                principal_id, window_days
+            )
@@ -1,6 +1,16 @@
+import os
 from datetime import datetime, timedelta, timezone
 
-from app.repository import DailyAckAggregate, InMemoryRepository, SecurityEventRecord, SecondTouchEventRecord
+import pytest
+
+from app.repository import (
+    DailyAckAggregate,
+    InMemoryRepository,
+    PostgresRepository,
+    SecondTouchEventRecord,
+    SecurityEventRecord,
+    psycopg,
+)
 from tools import retention_cleanup
 
 
@@ -39,7 +49,7 @@ def test_retention_cleanup_inmemory(monkeypatch, capsys):
     monkeypatch.setenv("DAILY_ACK_RETENTION_DAYS", "1")
     monkeypatch.setattr(retention_cleanup, "get_repository", lambda: repo)
 
-    exit_code = retention_cleanup.main()
+    exit_code = retention_cleanup.main([])
     output = capsys.readouterr().out.strip()
     assert exit_code == 0
     assert "postgres://" not in output
@@ -47,3 +57,52 @@ def test_retention_cleanup_inmemory(monkeypatch, capsys):
     assert len(repo.second_touch_events) == 0
     assert len(repo.second_touch_counters) == 0
     assert len(repo.daily_ack_aggregates) == 0
+
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def _old_counter_rows(day_key: str) -> int:
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT COUNT(*) FROM second_touch_daily_aggregates WHERE utc_day = %s", (day_key,)
+        )
+        return int(cur.fetchone()[0])
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_retention_cleanup_chunked_is_resumable(monkeypatch, capsys):
+    repo = PostgresRepository(POSTGRES_DSN)
+    now = datetime.now(timezone.utc)
+    old_day = (now - timedelta(days=300)).date().isoformat()
+    for index in range(25):
+        repo.increment_second_touch_counter(old_day, f"chunked_metric_{index}")
+    repo.record_security_event(
+        SecurityEventRecord(
+            actor_hash="chunked-old",
+            event_type="identity_leak_detected",
+            meta={},
+            created_at=now - timedelta(days=100),
+        )
+    )
+    monkeypatch.setattr(retention_cleanup, "get_repository", lambda: repo)
+
+    # A zero-length budget stops before the first chunk; nothing is lost.
+    assert retention_cleanup.main(["--batch-size", "10", "--max-runtime-seconds", "1e-9"]) == 0
+    output = capsys.readouterr().out
+    assert "retention_cleanup status=partial reason=max_runtime" in output
+    assert _old_counter_rows(old_day) == 25
+
+    assert retention_cleanup.main(["--batch-size", "10", "--sleep-ms", "1"]) == 0
+    output = capsys.readouterr().out
+    assert "retention_cleanup table=second_touch_daily_aggregates status=ok" in output
+    assert "retention_cleanup status=ok groups=4" in output
+    assert _old_counter_rows(old_day) == 0
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM security_events WHERE actor_hash = 'chunked-old'")
+        assert cur.fetchone()[0] == 0
+
+
+def test_retention_cleanup_rejects_negative_batch_size(capsys):
+    assert retention_cleanup.main(["--batch-size", "-1"]) == 1
+    assert "retention_cleanup status=fail reason=invalid_args" in capsys.readouterr().out
@@ -1,7 +1,17 @@
 import json
+import os
 from datetime import datetime, timedelta, timezone
 
-from app.repository import DailyAckAggregate, InMemoryRepository, SecurityEventRecord, SecondTouchEventRecord
+import pytest
+
+from app.repository import (
+    DailyAckAggregate,
+    InMemoryRepository,
+    PostgresRepository,
+    SecondTouchEventRecord,
+    SecurityEventRecord,
+    psycopg,
+)
 from tools import retention_report
 
 
@@ -13,7 +23,7 @@ def _parse_payload(output: str) -> dict:
 
 def test_retention_report_not_configured(monkeypatch, capsys):
     monkeypatch.delenv("POSTGRES_DSN", raising=False)
-    exit_code = retention_report.main()
+    exit_code = retention_report.main([])
     output = capsys.readouterr().out.strip()
     payload = _parse_payload(output)
     assert exit_code == 0
@@ -56,7 +66,7 @@ def test_retention_report_detects_drift(monkeypatch, capsys):
     monkeypatch.setenv("DAILY_ACK_RETENTION_DAYS", "1")
     monkeypatch.setattr(retention_report, "get_repository", lambda: repo)
 
-    exit_code = retention_report.main()
+    exit_code = retention_report.main([])
     output = capsys.readouterr().out.strip()
     payload = _parse_payload(output)
     assert exit_code == 1
@@ -101,9 +111,68 @@ def test_retention_report_ok(monkeypatch, capsys):
     monkeypatch.setenv("DAILY_ACK_RETENTION_DAYS", "30")
     monkeypatch.setattr(retention_report, "get_repository", lambda: repo)
 
-    exit_code = retention_report.main()
+    exit_code = retention_report.main([])
     output = capsys.readouterr().out.strip()
     payload = _parse_payload(output)
     assert exit_code == 0
     assert payload["status"] == "ok"
     assert payload["reason"] == "none"
+
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+RETENTION = {
+    "security_events": 30,
+    "second_touch_events": 90,
+    "second_touch_daily_aggregates": 180,
+    "daily_ack_aggregates": 180,
+}
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_retention_report_single_query_and_fast_mode(monkeypatch):
+    repo = PostgresRepository(POSTGRES_DSN)
+    now = datetime.now(timezone.utc)
+    repo.record_security_event(
+        SecurityEventRecord(
+            actor_hash="report-old",
+            event_type="identity_leak_detected",
+            meta={},
+            created_at=now - timedelta(days=45),
+        )
+    )
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM security_events")
+        total = cur.fetchone()[0]
+        cur.execute(
+            "SELECT COUNT(*) FROM security_events WHERE created_at < %s",
+            (now - timedelta(days=30),),
+        )
+        expired = cur.fetchone()[0]
+
+    connections = []
+    original_conn = repo._conn
+
+    def counting_conn():
+        connections.append(1)
+        return original_conn()
+
+    monkeypatch.setattr(repo, "_conn", counting_conn)
+    exact = repo.get_retention_report(now, RETENTION)
+    assert len(connections) == 1
+    fast = repo.get_retention_report(now, RETENTION, fast=True)
+    assert len(connections) == 2
+    monkeypatch.setattr(repo, "_conn", original_conn)
+
+    assert list(exact) == list(RETENTION)
+    assert exact["security_events"] == {
+        "total_rows": total,
+        "expired_rows": expired,
+        "cutoff_days": 30,
+    }
+    for table in RETENTION:
+        assert fast[table]["expired_rows"] == exact[table]["expired_rows"]
+        assert fast[table]["total_rows"] >= fast[table]["expired_rows"]
+
+    # A report taken after cleanup reflects the deleted rows.
+    repo.prune_security_events(now, retention_days=30)
+    assert repo.get_retention_report(now, RETENTION)["security_events"]["expired_rows"] == 0
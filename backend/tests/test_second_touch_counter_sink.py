@@ -0,0 +1,154 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from app import counter_sink as counter_sink_module
+from app.counter_sink import SecondTouchCounterSink
+from app.repository import PostgresRepository, psycopg
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+NOW = datetime(2026, 1, 10, 12, 30, tzinfo=timezone.utc)
+
+
+def test_sink_merges_deltas_and_keeps_every_event():
+    flushes = []
+    sink = SecondTouchCounterSink(lambda *batch: flushes.append(batch), 60, max_pending=100)
+    sink.record(
+        [("2026-01-10", "sends_attempted", 1), ("2026-01-10", "sends_queued", 1)],
+        [("2026-01-10", "send_attempted", None, NOW), ("2026-01-10", "send_queued", None, NOW)],
+    )
+    sink.record(
+        [("2026-01-10", "sends_attempted", 1)],
+        [("2026-01-10", "send_attempted", None, NOW)],
+    )
+
+    assert sink.stats()["pending"] == 3
+    assert sink.flush() == 3
+    increments, events = flushes[0]
+    assert increments == [
+        ("2026-01-10", "sends_attempted", 2),
+        ("2026-01-10", "sends_queued", 1),
+    ]
+    assert len(events) == 3
+    assert sink.stats()["increments_flushed"] == 3
+    assert sink.flush() == 0
+
+
+def test_sink_flushes_when_buffer_full():
+    flushes = []
+    sink = SecondTouchCounterSink(lambda *batch: flushes.append(batch), 60, max_pending=2)
+    sink.record([("2026-01-10", "offers_generated", 1)])
+    assert flushes == []
+    sink.record([("2026-01-10", "offers_generated", 1)])
+    assert flushes == [([("2026-01-10", "offers_generated", 2)], [])]
+    assert sink.stats()["pending"] == 0
+
+
+def test_sink_requeues_failed_flush_without_losing_newer_increments():
+    calls = []
+
+    def flaky_flush(increments, events):
+        calls.append((increments, events))
+        if len(calls) == 1:
+            raise RuntimeError("db down")
+
+    sink = SecondTouchCounterSink(flaky_flush, 60, max_pending=100)
+    sink.record(
+        [("2026-01-10", "offers_generated", 1)],
+        [("2026-01-10", "offer_generated", None, NOW)],
+    )
+    assert sink.flush() == 0
+    sink.record(
+        [("2026-01-10", "offers_generated", 1)],
+        [("2026-01-10", "offer_generated", None, NOW)],
+    )
+    assert sink.stats()["failures"] == 1
+
+    assert sink.flush() == 2
+    assert calls[1] == (
+        [("2026-01-10", "offers_generated", 2)],
+        [("2026-01-10", "offer_generated", None, NOW)] * 2,
+    )
+
+
+def test_sink_backs_off_and_caps_events_after_failures(monkeypatch):
+    calls = []
+    now = [0.0]
+
+    def failing_flush(increments, events):
+        calls.append(len(events))
+        raise RuntimeError("db down")
+
+    sink = SecondTouchCounterSink(
+        failing_flush, 1, max_pending=1, max_buffered_events=3, clock=lambda: now[0]
+    )
+    monkeypatch.setattr(sink, "_ensure_thread", lambda: None)
+    event = ("2026-01-10", "send_attempted", None, NOW)
+    sink.record([("2026-01-10", "sends_attempted", 1)], [event])
+    assert calls == [1]
+    # Requests during the backoff only buffer, and the event log stays capped.
+    for _ in range(4):
+        sink.record([("2026-01-10", "sends_attempted", 1)], [event])
+    assert calls == [1]
+    assert sink.stats()["pending"] == 5
+    assert sink.stats()["events_dropped"] == 2
+
+    now[0] = 2.5
+    sink.record([("2026-01-10", "sends_attempted", 1)], [event])
+    assert calls == [1, 3]
+    assert sink.stats()["events_dropped"] == 3
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_buffered_counters_flush_on_stop(monkeypatch):
+    monkeypatch.setattr(counter_sink_module, "SECOND_TOUCH_COUNTER_FLUSH_SECONDS", 3600)
+    monkeypatch.setattr(counter_sink_module, "_sinks", {})
+    repo = PostgresRepository(POSTGRES_DSN)
+    day_key = "2020-01-10"
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM second_touch_daily_aggregates WHERE utc_day = %s", (day_key,))
+        cur.execute("DELETE FROM second_touch_events WHERE event_day_utc = %s", (day_key,))
+
+    def stored():
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT counter_key, count
+                FROM second_touch_daily_aggregates
+                WHERE utc_day = %s
+                ORDER BY counter_key
+                """,
+                (day_key,),
+            )
+            counters = cur.fetchall()
+            cur.execute(
+                """
+                SELECT event_type, reason, COUNT(*)
+                FROM second_touch_events
+                WHERE event_day_utc = %s
+                GROUP BY event_type, reason
+                ORDER BY event_type, reason
+                """,
+                (day_key,),
+            )
+            return counters, cur.fetchall()
+
+    try:
+        for _ in range(3):
+            repo.increment_second_touch_counter(day_key, "sends_attempted")
+        repo.increment_second_touch_counter(day_key, "sends_held_rate_limited")
+        repo.increment_second_touch_counter(day_key, "custom_metric", amount=5)
+        assert stored() == ([], [])
+
+        assert counter_sink_module.stop_second_touch_counters() == 5
+        assert stored() == (
+            [("custom_metric", 5), ("sends_attempted", 3), ("sends_held_rate_limited", 1)],
+            [("send_attempted", None, 3), ("send_held", "rate_limited", 1)],
+        )
+    finally:
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute(
+                "DELETE FROM second_touch_daily_aggregates WHERE utc_day = %s", (day_key,)
+            )
+            cur.execute("DELETE FROM second_touch_events WHERE event_day_utc = %s", (day_key,))
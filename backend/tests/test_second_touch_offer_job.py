@@ -0,0 +1,225 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.config import SECOND_TOUCH_RECHECK_MINUTES
+from app.repository import MoodEventRecord, PostgresRepository, psycopg
+from tools.generate_second_touch_offers import main as generate_main
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def _seed_mood(repo, principal_id: str, now: datetime) -> None:
+    repo.record_mood_event(
+        MoodEventRecord(
+            principal_id=principal_id,
+            created_at=now - timedelta(days=1),
+            valence="positive",
+            intensity="low",
+            expressed_emotion=None,
+            risk_level=0,
+            theme_tag="calm",
+        )
+    )
+
+
+def _next_check_at(a_id: str, b_id: str):
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT next_check_at
+            FROM second_touch_pairs
+            WHERE sender_id = %s AND recipient_id = %s
+            """,
+            (a_id, b_id),
+        )
+        return cur.fetchone()[0]
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_offer_job_creates_offers_off_the_inbox_path(monkeypatch, capsys):
+    repo = PostgresRepository(POSTGRES_DSN)
+    now = datetime.now(timezone.utc)
+    a_id, b_id = "offer-job-a", "offer-job-b"
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM second_touch_pairs WHERE sender_id = %s AND recipient_id = %s",
+            (a_id, b_id),
+        )
+        cur.execute(
+            "DELETE FROM second_touch_offers WHERE offer_to_id IN (%s, %s)", (a_id, b_id)
+        )
+    _seed_mood(repo, a_id, now)
+    _seed_mood(repo, b_id, now)
+    for days_ago in (15, 15, 8, 8):
+        repo.update_second_touch_pair_positive(b_id, a_id, now - timedelta(days=days_ago))
+
+    # Reading the inbox never generates offers.
+    assert not any(
+        item.item_type == "second_touch_offer" for item in repo.list_inbox_items_with_offers(a_id)
+    )
+    assert repo.list_second_touch_offers(a_id) == []
+
+    monkeypatch.setattr("tools.generate_second_touch_offers.get_repository", lambda: repo)
+    assert generate_main(["--limit", "10000"]) == 0
+    assert "second_touch_offers status=ok" in capsys.readouterr().out
+    offers = repo.list_second_touch_offers(a_id)
+    assert [(offer.counterpart_id, offer.state) for offer in offers] == [(b_id, "available")]
+    assert any(
+        item.offer_id == offers[0].offer_id for item in repo.list_inbox_items_with_offers(a_id)
+    )
+    assert _next_check_at(a_id, b_id) > now + timedelta(days=6)
+
+    # Not due again until the offer cooldown passes or the pair changes.
+    later = datetime.now(timezone.utc)
+    repo.update_second_touch_pair_positive(a_id, b_id, later)
+    result = repo.generate_second_touch_offers(now=later + timedelta(seconds=1), limit=10000)
+    assert result["offers"] == 0
+    assert _next_check_at(a_id, b_id) > later + timedelta(days=6)
+    assert len(repo.list_second_touch_offers(a_id)) == 1
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_offer_job_evaluates_due_pairs_in_one_query(monkeypatch):
+    repo = PostgresRepository(POSTGRES_DSN)
+    now = datetime.now(timezone.utc)
+    pairs = {
+        "eligible": ("batch-job-a1", "batch-job-b1"),
+        "crisis": ("batch-job-a2", "batch-job-b2"),
+        "capped": ("batch-job-a3", "batch-job-b3"),
+    }
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        # Only these pairs are due for this sweep.
+        cur.execute("UPDATE second_touch_pairs SET next_check_at = NULL")
+        for a_id, b_id in pairs.values():
+            cur.execute(
+                "DELETE FROM second_touch_offers WHERE offer_to_id IN (%s, %s)", (a_id, b_id)
+            )
+    for a_id, b_id in pairs.values():
+        _seed_mood(repo, a_id, now)
+        _seed_mood(repo, b_id, now)
+        for days_ago in (15, 15, 8, 8):
+            repo.update_second_touch_pair_positive(a_id, b_id, now - timedelta(days=days_ago))
+    repo.record_crisis_action(pairs["crisis"][1], "show_crisis_screen", now=now)
+    capped_a, capped_b = pairs["capped"]
+    for _ in range(2):
+        offer_id = repo.create_second_touch_offer(capped_a, "batch-job-other")
+        repo.mark_second_touch_offer_used(offer_id)
+        offer_id = repo.create_second_touch_offer(capped_b, "batch-job-other")
+        repo.mark_second_touch_offer_used(offer_id)
+
+    before = repo.get_second_touch_counters(window_days=1)
+    connections = []
+    original_conn = repo._conn
+
+    def counting_conn():
+        connections.append(1)
+        return original_conn()
+
+    monkeypatch.setattr(repo, "_conn", counting_conn)
+    run_at = datetime.now(timezone.utc) + timedelta(seconds=1)
+    result = repo.generate_second_touch_offers(now=run_at, limit=100)
+    monkeypatch.setattr(repo, "_conn", original_conn)
+
+    assert result == {"evaluated": 3, "offers": 1}
+    # One read, one offer insert, one batched reschedule, one counter flush.
+    assert len(connections) == 4
+    after = repo.get_second_touch_counters(window_days=1)
+    deltas = {key: after[key] - before.get(key, 0) for key in after}
+    assert {key: value for key, value in deltas.items() if value} == {
+        "offers_generated": 1,
+        "offers_suppressed_crisis_blocked": 1,
+        "offers_suppressed_rate_limited": 2,
+    }
+    assert [offer.counterpart_id for offer in repo.list_second_touch_offers("batch-job-a1")] == [
+        "batch-job-b1"
+    ]
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_offer_job_leases_due_pairs(monkeypatch):
+    repo = PostgresRepository(POSTGRES_DSN)
+    now = datetime.now(timezone.utc)
+    a_id, b_id = "lease-job-a", "lease-job-b"
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("UPDATE second_touch_pairs SET next_check_at = NULL")
+        cur.execute(
+            "DELETE FROM second_touch_offers WHERE offer_to_id IN (%s, %s)", (a_id, b_id)
+        )
+    _seed_mood(repo, a_id, now)
+    _seed_mood(repo, b_id, now)
+    for days_ago in (15, 15, 8, 8):
+        repo.update_second_touch_pair_positive(a_id, b_id, now - timedelta(days=days_ago))
+    run_at = datetime.now(timezone.utc) + timedelta(seconds=1)
+
+    # A pair held by an overlapping sweep is skipped, not evaluated twice.
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT 1 FROM second_touch_pairs
+            WHERE sender_id = %s AND recipient_id = %s
+            FOR UPDATE
+            """,
+            (a_id, b_id),
+        )
+        assert repo.generate_second_touch_offers(now=run_at, limit=100) == {
+            "evaluated": 0,
+            "offers": 0,
+        }
+
+    # A sweep that dies after claiming leaves the pair leased, not lost.
+    def crash(*args, **kwargs):
+        raise RuntimeError("sweep died")
+
+    monkeypatch.setattr(repo, "create_second_touch_offer", crash)
+    with pytest.raises(RuntimeError):
+        repo.generate_second_touch_offers(now=run_at, limit=100)
+    monkeypatch.undo()
+    assert repo.generate_second_touch_offers(now=run_at, limit=100)["evaluated"] == 0
+    assert _next_check_at(a_id, b_id) > run_at
+
+    after_lease = run_at + timedelta(minutes=SECOND_TOUCH_RECHECK_MINUTES, seconds=1)
+    assert repo.generate_second_touch_offers(now=after_lease, limit=100) == {
+        "evaluated": 1,
+        "offers": 1,
+    }
+    assert len(repo.list_second_touch_offers(a_id)) == 1
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_offer_job_counts_offers_made_earlier_in_the_sweep():
+    repo = PostgresRepository(POSTGRES_DSN)
+    now = datetime.now(timezone.utc)
+    shared_id = "sweep-cap-a"
+    counterparts = ("sweep-cap-x1", "sweep-cap-x2")
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("UPDATE second_touch_pairs SET next_check_at = NULL")
+        cur.execute(
+            "DELETE FROM second_touch_offers WHERE offer_to_id IN (%s, %s, %s)",
+            (shared_id, *counterparts),
+        )
+    for principal_id in (shared_id, *counterparts):
+        _seed_mood(repo, principal_id, now)
+    for counterpart_id in counterparts:
+        for days_ago in (15, 15, 8, 8):
+            repo.update_second_touch_pair_positive(
+                counterpart_id, shared_id, now - timedelta(days=days_ago)
+            )
+
+    run_at = datetime.now(timezone.utc) + timedelta(seconds=1)
+    assert repo.generate_second_touch_offers(now=run_at, limit=100) == {
+        "evaluated": 2,
+        "offers": 2,
+    }
+    # Both pairs were due for the shared principal, who still gets one offer;
+    # the second pair offers to its other side instead.
+    shared_offers = repo.list_second_touch_offers(shared_id)
+    assert [offer.state for offer in shared_offers] == ["available"]
+    other_offers = [
+        offer
+        for counterpart_id in counterparts
+        for offer in repo.list_second_touch_offers(counterpart_id)
+    ]
+    assert len(other_offers) == 1
+    assert other_offers[0].counterpart_id == shared_id
@@ -1,6 +1,10 @@
+import os
 from datetime import datetime, timedelta, timezone
 
-from app.repository import InMemoryRepository
+import pytest
+
+from app import repository as repository_module
+from app.repository import InMemoryRepository, PostgresRepository, psycopg
 from tools.recompute_second_touch_aggregates import main as recompute_main
 
 
@@ -52,3 +56,138 @@ def test_recompute_overwrites_only_known_keys(monkeypatch, capsys):
     assert exit_code == 0
     output = capsys.readouterr().out.strip()
     assert output.startswith("second_touch_recompute")
+
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def _stored_count(day_key: str, counter_key: str):
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT count FROM second_touch_daily_aggregates
+            WHERE utc_day = %s AND counter_key = %s
+            """,
+            (day_key, counter_key),
+        )
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _set_count(day_key: str, counter_key: str, count: int) -> None:
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO second_touch_daily_aggregates (utc_day, counter_key, count)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (utc_day, counter_key) DO UPDATE SET count = EXCLUDED.count
+            """,
+            (day_key, counter_key, count),
+        )
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_incremental_recompute_only_touches_dirty_days(monkeypatch, capsys):
+    monkeypatch.setattr(repository_module, "SECOND_TOUCH_DIRTY_GRACE_SECONDS", 0)
+    repo = PostgresRepository(POSTGRES_DSN)
+    dirty_day, clean_day = "2021-03-05", "2021-03-04"
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        for table, column in (
+            ("second_touch_daily_aggregates", "utc_day"),
+            ("second_touch_events", "event_day_utc"),
+            ("second_touch_dirty_days", "utc_day"),
+        ):
+            cur.execute(
+                f"DELETE FROM {table} WHERE {column} IN (%s, %s)", (dirty_day, clean_day)
+            )
+
+    _set_count(clean_day, "offers_generated", 7)
+    repo.increment_second_touch_counter(dirty_day, "offers_generated")
+    repo.increment_second_touch_counter(dirty_day, "offers_generated")
+    _set_count(dirty_day, "offers_generated", 99)
+
+    result = repo.recompute_dirty_second_touch_days()
+    assert result["dirty_days"] >= 1
+    assert result["recompute_partial"] is False
+    assert _stored_count(dirty_day, "offers_generated") == 2
+    assert _stored_count(clean_day, "offers_generated") == 7
+
+    # Nothing new since the last run: the drifted row is left alone.
+    _set_count(dirty_day, "offers_generated", 50)
+    assert repo.recompute_dirty_second_touch_days()["dirty_days"] == 0
+    assert _stored_count(dirty_day, "offers_generated") == 50
+
+    repo.increment_second_touch_counter(dirty_day, "sends_queued")
+    monkeypatch.setattr("tools.recompute_second_touch_aggregates.get_repository", lambda: repo)
+    assert recompute_main(["--incremental"]) == 0
+    output = capsys.readouterr().out
+    assert "second_touch_recompute mode=incremental dirty_days=1 days_written=1" in output
+    assert _stored_count(dirty_day, "offers_generated") == 2
+    assert _stored_count(dirty_day, "sends_queued") == 1
+
+
+def _age_dirty_mark(day_key: str, seconds: int) -> None:
+    # Stands in for the grace period passing between recompute runs.
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE second_touch_dirty_days
+            SET marked_at = marked_at - make_interval(secs => %s)
+            WHERE utc_day = %s
+            """,
+            (seconds, day_key),
+        )
+
+
+def _dirty_mark(day_key: str):
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT rebuilt_at IS NOT NULL FROM second_touch_dirty_days WHERE utc_day = %s",
+            (day_key,),
+        )
+        row = cur.fetchone()
+    return None if row is None else row[0]
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_incremental_recompute_rechecks_days_with_uncommitted_writers(monkeypatch):
+    monkeypatch.setattr(repository_module, "SECOND_TOUCH_DIRTY_GRACE_SECONDS", 5)
+    repo = PostgresRepository(POSTGRES_DSN)
+    day_key = "2021-03-08"
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        for table, column in (
+            ("second_touch_daily_aggregates", "utc_day"),
+            ("second_touch_events", "event_day_utc"),
+            ("second_touch_dirty_days", "utc_day"),
+        ):
+            cur.execute(f"DELETE FROM {table} WHERE {column} = %s", (day_key,))
+    repo.increment_second_touch_counter(day_key, "offers_generated")
+    # Marks younger than the grace period are not claimed yet.
+    repo.recompute_dirty_second_touch_days()
+    assert _dirty_mark(day_key) is False
+    _age_dirty_mark(day_key, 10)
+
+    # A writer inserts into an already-dirty day and has not committed yet,
+    # so its DO NOTHING mark is hidden behind the existing one.
+    with psycopg.connect(POSTGRES_DSN) as writer, writer.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO second_touch_events (event_day_utc, event_type, reason)
+            VALUES (%s, 'offer_generated', NULL)
+            """,
+            (day_key,),
+        )
+        assert repo.recompute_dirty_second_touch_days()["dirty_days"] >= 1
+
+    # The rebuilt day stays marked for a re-check, which picks up the writer.
+    assert _stored_count(day_key, "offers_generated") == 1
+    assert _dirty_mark(day_key) is True
+    _age_dirty_mark(day_key, 6)
+    repo.recompute_dirty_second_touch_days()
+    assert _stored_count(day_key, "offers_generated") == 2
+
+    # Once no events arrived within the grace period of the last rebuild,
+    # the re-check settles.
+    monkeypatch.setattr(repository_module, "SECOND_TOUCH_DIRTY_GRACE_SECONDS", 0)
+    repo.recompute_dirty_second_touch_days()
+    assert _dirty_mark(day_key) is None
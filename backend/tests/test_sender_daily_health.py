@@ -0,0 +1,93 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from app.repository import MessageRecord, PostgresRepository, psycopg
+from tools.backfill_sender_daily_health import main as backfill_main
+from tools.verify_sender_daily_health import main as verify_main
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def _message(principal_id: str) -> MessageRecord:
+    return MessageRecord(
+        principal_id=principal_id,
+        valence="positive",
+        intensity="low",
+        emotion=None,
+        theme_tags=["calm"],
+        risk_level=0,
+        sanitized_text="hello",
+        reid_risk=0.0,
+    )
+
+
+def _raw_health(sender_id: str) -> tuple[int, int]:
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT COUNT(*)
+            FROM inbox_items i
+            JOIN messages m ON m.id = i.message_id
+            WHERE m.origin_device_id = %s
+            """,
+            (sender_id,),
+        )
+        delivered = int(cur.fetchone()[0])
+        cur.execute(
+            """
+            SELECT COUNT(*)
+            FROM acknowledgements a
+            JOIN messages m ON m.id = a.message_id
+            WHERE m.origin_device_id = %s
+              AND a.reaction IN ('thanks', 'helpful', 'relate')
+            """,
+            (sender_id,),
+        )
+        positive = int(cur.fetchone()[0])
+    return delivered, positive
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_sender_health_rollup_tracks_raw_join(monkeypatch, capsys):
+    repo = PostgresRepository(POSTGRES_DSN)
+    sender = "health-rollup-sender"
+    for index, reaction in enumerate(["thanks", "relate", "not_helpful", None]):
+        recipient = f"health-rollup-recipient-{index}"
+        message_id = repo.save_message(_message(sender))
+        inbox_item_id = repo.create_inbox_item(message_id, recipient, "hello")
+        if reaction:
+            repo.acknowledge(inbox_item_id, recipient, reaction)
+
+    health = repo.get_matching_health(sender, window_days=7)
+    assert (health.delivered_count, health.positive_ack_count) == _raw_health(sender)
+    assert (health.delivered_count, health.positive_ack_count) == (4, 2)
+    assert health.ratio == 0.5
+
+    today = datetime.now(timezone.utc).date()
+    assert repo.verify_sender_daily_health(today, today)["rows_mismatched"] == 0
+
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            "UPDATE sender_daily_health SET delivered_count = 99 WHERE sender_id = %s",
+            (sender,),
+        )
+    monkeypatch.setattr("tools.verify_sender_daily_health.get_repository", lambda: repo)
+    monkeypatch.setattr("tools.backfill_sender_daily_health.get_repository", lambda: repo)
+
+    assert verify_main(["--days", "1"]) == 1
+    assert "rows_mismatched=1" in capsys.readouterr().out
+
+    assert backfill_main(["--days", "1"]) == 0
+    assert "sender_health_backfill status=ok" in capsys.readouterr().out
+    assert verify_main(["--days", "1"]) == 0
+    assert repo.get_matching_health(sender, window_days=7).delivered_count == 4
+
+
+def test_sender_health_tools_reject_invalid_days(capsys):
+    assert backfill_main(["--days", "0"]) == 1
+    assert verify_main(["--days", "91"]) == 1
+    output = capsys.readouterr().out
+    assert "sender_health_backfill status=fail reason=invalid_days" in output
+    assert "sender_health_verify status=fail reason=invalid_days" in output
@@ -0,0 +1,82 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import repository as repository_module
+from app.repository import MoodEventRecord, PostgresRepository, psycopg
+from tools.refresh_similar_count_grid import main as refresh_main
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+GRID_WINDOW_DAYS = 3
+THEME = "similar-grid-theme"
+
+
+def _mood_event(principal_id: str, created_at: datetime, risk_level: int = 0) -> MoodEventRecord:
+    return MoodEventRecord(
+        principal_id=principal_id,
+        created_at=created_at,
+        valence="negative",
+        intensity="low",
+        expressed_emotion=None,
+        risk_level=risk_level,
+        theme_tag=THEME,
+    )
+
+
+def _cleanup() -> None:
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM mood_events WHERE theme_tag = %s", (THEME,))
+        cur.execute("DELETE FROM similar_count_grid WHERE window_days = %s", (GRID_WINDOW_DAYS,))
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_similar_count_reads_grid_with_self_exclusion(monkeypatch, capsys):
+    repo = PostgresRepository(POSTGRES_DSN)
+    _cleanup()
+    now = datetime.now(timezone.utc)
+    for index in range(4):
+        repo.record_mood_event(_mood_event(f"grid-peer-{index}", now - timedelta(hours=index)))
+    repo.record_mood_event(_mood_event("grid-peer-0", now - timedelta(hours=5)))
+    repo.record_mood_event(_mood_event("grid-crisis", now, risk_level=2))
+    repo.record_mood_event(_mood_event("grid-old", now - timedelta(days=GRID_WINDOW_DAYS + 1)))
+
+    try:
+        live = repo.get_similar_count("grid-peer-0", THEME, "negative", GRID_WINDOW_DAYS)
+        assert live == 3
+
+        monkeypatch.setattr("tools.refresh_similar_count_grid.get_repository", lambda: repo)
+        assert refresh_main(["--window-days", str(GRID_WINDOW_DAYS)]) == 0
+        assert "similar_count_grid status=ok" in capsys.readouterr().out
+
+        # New events after the refresh are not visible until the next refresh.
+        repo.record_mood_event(_mood_event("grid-late", datetime.now(timezone.utc)))
+        assert repo.get_similar_count("grid-peer-0", THEME, "negative", GRID_WINDOW_DAYS) == 3
+        assert repo.get_similar_count("grid-outsider", THEME, "negative", GRID_WINDOW_DAYS) == 4
+        assert repo.get_similar_count("grid-late", THEME, "negative", GRID_WINDOW_DAYS) == 4
+        assert repo.get_similar_count("grid-peer-0", THEME, "positive", GRID_WINDOW_DAYS) == 0
+
+        monkeypatch.setattr(repository_module, "SIMILAR_COUNT_GRID_MAX_AGE_SECONDS", -1)
+        assert repo.get_similar_count("grid-peer-0", THEME, "negative", GRID_WINDOW_DAYS) == 4
+    finally:
+        _cleanup()
+
+
+def test_similar_count_grid_rejects_invalid_window(capsys):
+    assert refresh_main(["--window-days", "0"]) == 1
+    assert "similar_count_grid status=fail reason=invalid_window_days" in capsys.readouterr().out
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_similar_count_grid_refresh_skips_while_another_refresh_runs(monkeypatch, capsys):
+    repo = PostgresRepository(POSTGRES_DSN)
+    monkeypatch.setattr("tools.refresh_similar_count_grid.get_repository", lambda: repo)
+    with psycopg.connect(POSTGRES_DSN) as holder, holder.cursor() as cur:
+        cur.execute(
+            "SELECT pg_advisory_xact_lock(hashtext('similar_count_grid'), %s)",
+            (GRID_WINDOW_DAYS,),
+        )
+        assert refresh_main(["--window-days", str(GRID_WINDOW_DAYS)]) == 0
+        assert "similar_count_grid status=skipped reason=refresh_in_progress" in capsys.readouterr().out
+    assert repo.refresh_similar_count_grid(GRID_WINDOW_DAYS)["skipped"] is False
+    _cleanup()
@@ -0,0 +1,143 @@
+import os
+
+import pytest
+
+from app import eligible_pool as eligible_pool_module
+from app import repository as repository_module
+from app.cache import TTLCache
+from app.repository import PostgresRepository, psycopg
+
+POSTGRES_DSN = os.getenv("POSTGRES_DSN_TEST")
+
+
+def _stored_offset(principal_id: str):
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT last_known_timezone_offset_minutes
+            FROM eligible_principals
+            WHERE principal_id = %s
+            """,
+            (principal_id,),
+        )
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _overwrite_offset(principal_id: str, offset_minutes: int) -> None:
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE eligible_principals
+            SET last_known_timezone_offset_minutes = %s
+            WHERE principal_id = %s
+            """,
+            (offset_minutes, principal_id),
+        )
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_timezone_offset_written_only_on_change(monkeypatch):
+    monkeypatch.setattr(
+        repository_module, "_principal_state_cache", TTLCache(600, max_entries=10)
+    )
+    monkeypatch.setattr(repository_module, "get_eligible_write_coalescer", lambda *_: None)
+    monkeypatch.setattr(repository_module, "get_eligible_pool", lambda: None)
+    repo = PostgresRepository(POSTGRES_DSN)
+    principal_id = "tz-cache-1"
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM eligible_principals WHERE principal_id = %s", (principal_id,))
+
+    try:
+        # Without an eligible row the write is a no-op and must not be cached.
+        repo.set_last_known_timezone_offset(principal_id, 120)
+        repo.upsert_eligible_principal(principal_id, "low", ["grief"])
+        assert repo.get_last_known_timezone_offset(principal_id) is None
+        repo.set_last_known_timezone_offset(principal_id, 120)
+        assert _stored_offset(principal_id) == 120
+
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT updated_at FROM eligible_principals WHERE principal_id = %s",
+                (principal_id,),
+            )
+            updated_at = cur.fetchone()[0]
+        repo.set_last_known_timezone_offset(principal_id, 120)
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT updated_at FROM eligible_principals WHERE principal_id = %s",
+                (principal_id,),
+            )
+            assert cur.fetchone()[0] == updated_at
+
+        # Another worker moved the offset; a stale local entry must not skip
+        # the write when the device returns to the cached value.
+        _overwrite_offset(principal_id, -60)
+        repo.set_last_known_timezone_offset(principal_id, 120)
+        assert _stored_offset(principal_id) == 120
+        assert repo.get_last_known_timezone_offset(principal_id) == 120
+
+        repo.set_last_known_timezone_offset(principal_id, 180)
+        assert _stored_offset(principal_id) == 180
+        assert repo.get_last_known_timezone_offset(principal_id) == 180
+    finally:
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM eligible_principals WHERE principal_id = %s", (principal_id,))
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_timezone_offset_rides_the_coalesced_eligible_write(monkeypatch):
+    monkeypatch.setattr(
+        repository_module, "_principal_state_cache", TTLCache(600, max_entries=10)
+    )
+    monkeypatch.setattr(eligible_pool_module, "ELIGIBLE_WRITE_FLUSH_SECONDS", 3600)
+    monkeypatch.setattr(eligible_pool_module, "_coalescers", {})
+    monkeypatch.setattr(repository_module, "get_eligible_pool", lambda: None)
+    repo = PostgresRepository(POSTGRES_DSN)
+    principal_id = "tz-cache-3"
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM eligible_principals WHERE principal_id = %s", (principal_id,))
+
+    try:
+        # A new principal's row is still buffered when the offset arrives.
+        repo.set_last_known_timezone_offset(principal_id, -240)
+        repo.upsert_eligible_principal(principal_id, "low", ["grief"])
+        assert _stored_offset(principal_id) is None
+
+        assert eligible_pool_module._coalescers[POSTGRES_DSN].stop() == 1
+        assert _stored_offset(principal_id) == -240
+        _overwrite_offset(principal_id, 0)
+        assert repo.get_last_known_timezone_offset(principal_id) == -240
+    finally:
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM eligible_principals WHERE principal_id = %s", (principal_id,))
+
+
+@pytest.mark.skipif(POSTGRES_DSN is None or psycopg is None, reason="POSTGRES_DSN_TEST not set")
+def test_postgres_timezone_offset_reads_through_cache(monkeypatch):
+    monkeypatch.setattr(
+        repository_module, "_principal_state_cache", TTLCache(600, max_entries=10)
+    )
+    repo = PostgresRepository(POSTGRES_DSN)
+    principal_id = "tz-cache-2"
+    with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM eligible_principals WHERE principal_id = %s", (principal_id,))
+        cur.execute(
+            """
+            INSERT INTO eligible_principals
+            (principal_id, intensity_bucket, theme_tags, last_active_bucket,
+             updated_at, last_known_timezone_offset_minutes)
+            VALUES (%s, 'low', ARRAY['grief'], now(), now(), 300)
+            """,
+            (principal_id,),
+        )
+
+    try:
+        assert repo.get_last_known_timezone_offset(principal_id) == 300
+        _overwrite_offset(principal_id, 0)
+        assert repo.get_last_known_timezone_offset(principal_id) == 300
+        repository_module._principal_state_cache.invalidate()
+        assert repo.get_last_known_timezone_offset(principal_id) == 0
+    finally:
+        with psycopg.connect(POSTGRES_DSN) as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM eligible_principals WHERE principal_id = %s", (principal_id,))
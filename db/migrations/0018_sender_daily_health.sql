@@ -0,0 +1,12 @@
+-- Per-sender daily delivery/positive-ack rollup backing matching health.
+CREATE TABLE IF NOT EXISTS sender_daily_health (
+  sender_id text NOT NULL,
+  utc_day date NOT NULL,
+  delivered_count integer NOT NULL DEFAULT 0,
+  positive_ack_count integer NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (sender_id, utc_day)
+);
+
+CREATE INDEX IF NOT EXISTS sender_daily_health_day_idx
+  ON sender_daily_health (utc_day);
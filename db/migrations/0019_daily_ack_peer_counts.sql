@@ -0,0 +1,34 @@
+-- Peer-origin delivery/ack counts so global matching health can exclude
+-- system (bridge) messages without joining raw inbox/ack rows.
+ALTER TABLE daily_ack_aggregates
+  ADD COLUMN IF NOT EXISTS peer_delivered_count integer NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS peer_positive_ack_count integer NOT NULL DEFAULT 0;
+
+UPDATE daily_ack_aggregates agg
+SET peer_delivered_count = raw.delivered_count
+FROM (
+  SELECT (i.received_at AT TIME ZONE 'UTC')::date AS utc_day,
+         COALESCE(m.theme_tags[1], 'unknown') AS theme_id,
+         COUNT(*) AS delivered_count
+  FROM inbox_items i
+  JOIN messages m ON m.id = i.message_id
+  WHERE m.origin_device_id != 'system'
+  GROUP BY 1, 2
+) AS raw
+WHERE agg.utc_day = raw.utc_day
+  AND agg.theme_id = raw.theme_id;
+
+UPDATE daily_ack_aggregates agg
+SET peer_positive_ack_count = raw.positive_ack_count
+FROM (
+  SELECT (a.created_at AT TIME ZONE 'UTC')::date AS utc_day,
+         COALESCE(m.theme_tags[1], 'unknown') AS theme_id,
+         COUNT(*) AS positive_ack_count
+  FROM acknowledgements a
+  JOIN messages m ON m.id = a.message_id
+  WHERE m.origin_device_id != 'system'
+    AND a.reaction IN ('helpful', 'thanks', 'relate')
+  GROUP BY 1, 2
+) AS raw
+WHERE agg.utc_day = raw.utc_day
+  AND agg.theme_id = raw.theme_id;
@@ -0,0 +1,15 @@
+-- Distinct-principal counts per (theme, valence) cell over a rolling window.
+-- Refreshed periodically by tools/refresh_similar_count_grid.py so /mood
+-- reads one cell instead of counting raw mood_events.
+CREATE TABLE IF NOT EXISTS similar_count_grid (
+  window_days integer NOT NULL,
+  theme_tag text NOT NULL,
+  valence text NOT NULL,
+  principal_count integer NOT NULL,
+  window_start timestamptz NOT NULL,
+  refreshed_at timestamptz NOT NULL,
+  PRIMARY KEY (window_days, theme_tag, valence)
+);
+
+CREATE INDEX IF NOT EXISTS mood_events_created_at_idx
+  ON mood_events (created_at);
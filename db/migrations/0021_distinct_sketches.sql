@@ -0,0 +1,9 @@
+-- HyperLogLog registers per (dimension, UTC day). Windowed distinct counts
+-- union the daily sketches instead of scanning raw principal ids.
+CREATE TABLE IF NOT EXISTS distinct_sketches (
+  dimension text NOT NULL,
+  utc_day date NOT NULL,
+  sketch bytea NOT NULL,
+  updated_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (dimension, utc_day)
+);
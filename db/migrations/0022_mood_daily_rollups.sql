@@ -0,0 +1,51 @@
+-- Per-principal daily mood rollup backing the reflection summary.
+-- Maintained by record_mood_event; backfilled here from mood_events.
+CREATE TABLE IF NOT EXISTS mood_daily_rollups (
+  principal_id text NOT NULL,
+  utc_day date NOT NULL,
+  entry_count integer NOT NULL DEFAULT 0,
+  valence_sum integer NOT NULL DEFAULT 0,
+  last_valence text NOT NULL,
+  last_event_at timestamptz NOT NULL,
+  emotion_counts jsonb NOT NULL DEFAULT '{}'::jsonb,
+  PRIMARY KEY (principal_id, utc_day)
+);
+
+INSERT INTO mood_daily_rollups
+  (principal_id, utc_day, entry_count, valence_sum, last_valence, last_event_at, emotion_counts)
+SELECT
+  days.device_id,
+  days.utc_day,
+  days.entry_count,
+  days.valence_sum,
+  days.last_valence,
+  days.last_event_at,
+  COALESCE(emotions.emotion_counts, '{}'::jsonb)
+FROM (
+  SELECT
+    device_id,
+    (created_at AT TIME ZONE 'UTC')::date AS utc_day,
+    COUNT(*) AS entry_count,
+    SUM(CASE valence WHEN 'positive' THEN 1 WHEN 'negative' THEN -1 ELSE 0 END) AS valence_sum,
+    (array_agg(valence ORDER BY created_at DESC))[1] AS last_valence,
+    MAX(created_at) AS last_event_at
+  FROM mood_events
+  GROUP BY 1, 2
+) AS days
+LEFT JOIN (
+  SELECT device_id, utc_day, jsonb_object_agg(expressed_emotion, emotion_count) AS emotion_counts
+  FROM (
+    SELECT
+      device_id,
+      (created_at AT TIME ZONE 'UTC')::date AS utc_day,
+      expressed_emotion,
+      COUNT(*) AS emotion_count
+    FROM mood_events
+    WHERE expressed_emotion IS NOT NULL
+    GROUP BY 1, 2, 3
+  ) AS per_emotion
+  GROUP BY device_id, utc_day
+) AS emotions
+  ON emotions.device_id = days.device_id
+ AND emotions.utc_day = days.utc_day
+ON CONFLICT (principal_id, utc_day) DO NOTHING;
@@ -0,0 +1,16 @@
+-- Materialized /impact helped_count keyed by HMAC'd sender id.
+-- helped_pairs dedupes the first positive ack per (sender, recipient) pair.
+-- Populate existing history with tools/rebuild_helped_counts.py (ids are
+-- hashed with the application HMAC key, which SQL does not have).
+CREATE TABLE IF NOT EXISTS helped_pairs (
+  sender_hash text NOT NULL,
+  recipient_hash text NOT NULL,
+  first_helped_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (sender_hash, recipient_hash)
+);
+
+CREATE TABLE IF NOT EXISTS helped_counts (
+  sender_hash text PRIMARY KEY,
+  helped_count integer NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
@@ -0,0 +1,13 @@
+-- Due time for the second-touch offer job. Set to now() whenever pair state
+-- changes and rescheduled by the job after each evaluation; NULL means the
+-- pair needs another state change before it can qualify.
+ALTER TABLE second_touch_pairs
+  ADD COLUMN IF NOT EXISTS next_check_at timestamptz NULL;
+
+UPDATE second_touch_pairs
+SET next_check_at = now()
+WHERE NOT disabled_permanent;
+
+CREATE INDEX IF NOT EXISTS second_touch_pairs_next_check_idx
+  ON second_touch_pairs (next_check_at)
+  WHERE next_check_at IS NOT NULL;
@@ -0,0 +1,11 @@
+-- Sharded daily ack counters: writers spread increments for the same
+-- (utc_day, theme_id) across shard rows, readers sum them, and the
+-- compaction job folds old shards back into shard 0.
+ALTER TABLE daily_ack_aggregates
+  ADD COLUMN IF NOT EXISTS shard smallint NOT NULL DEFAULT 0;
+
+ALTER TABLE daily_ack_aggregates
+DROP CONSTRAINT IF EXISTS daily_ack_aggregates_pkey;
+
+ALTER TABLE daily_ack_aggregates
+ADD CONSTRAINT daily_ack_aggregates_pkey PRIMARY KEY (utc_day, theme_id, shard);
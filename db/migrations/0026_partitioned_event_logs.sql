@@ -0,0 +1,53 @@
+-- Daily range partitions on created_at for the retention-managed event logs,
+-- so retention can drop whole days instead of deleting rows. Partitions are
+-- created ahead of time by ensure_event_partitions; rows outside any daily
+-- partition (including everything copied here) land in the default partition
+-- and are moved into a daily partition when one is created for their day.
+
+ALTER TABLE security_events RENAME TO security_events_unpartitioned;
+ALTER INDEX IF EXISTS security_events_pkey RENAME TO security_events_unpartitioned_pkey;
+ALTER INDEX IF EXISTS security_events_actor_hash_idx
+  RENAME TO security_events_unpartitioned_actor_hash_idx;
+ALTER INDEX IF EXISTS security_events_created_at_idx
+  RENAME TO security_events_unpartitioned_created_at_idx;
+
+CREATE TABLE security_events (
+  id uuid NOT NULL DEFAULT gen_random_uuid(),
+  actor_hash text NOT NULL,
+  event_type text NOT NULL,
+  meta jsonb NOT NULL DEFAULT '{}'::jsonb,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  CONSTRAINT security_events_pkey PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE security_events_default PARTITION OF security_events DEFAULT;
+
+CREATE INDEX security_events_actor_hash_idx ON security_events (actor_hash);
+CREATE INDEX security_events_created_at_idx ON security_events (created_at DESC);
+
+INSERT INTO security_events (id, actor_hash, event_type, meta, created_at)
+SELECT id, actor_hash, event_type, meta, created_at
+FROM security_events_unpartitioned;
+
+DROP TABLE security_events_unpartitioned;
+
+ALTER TABLE second_touch_events RENAME TO second_touch_events_unpartitioned;
+ALTER INDEX IF EXISTS second_touch_events_day_idx
+  RENAME TO second_touch_events_unpartitioned_day_idx;
+
+CREATE TABLE second_touch_events (
+  event_day_utc date NOT NULL,
+  event_type text NOT NULL,
+  reason text,
+  created_at timestamptz NOT NULL DEFAULT now()
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE second_touch_events_default PARTITION OF second_touch_events DEFAULT;
+
+CREATE INDEX second_touch_events_day_idx ON second_touch_events (event_day_utc);
+
+INSERT INTO second_touch_events (event_day_utc, event_type, reason, created_at)
+SELECT event_day_utc, event_type, reason, created_at
+FROM second_touch_events_unpartitioned;
+
+DROP TABLE second_touch_events_unpartitioned;
@@ -0,0 +1,25 @@
+-- Days whose second_touch_events changed since the last incremental
+-- recompute. A statement-level trigger marks each distinct event day once
+-- per insert statement; DO NOTHING keeps already-dirty days lock-free.
+CREATE TABLE IF NOT EXISTS second_touch_dirty_days (
+  utc_day date PRIMARY KEY,
+  marked_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION mark_second_touch_dirty_days() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  INSERT INTO second_touch_dirty_days (utc_day)
+  SELECT DISTINCT event_day_utc FROM new_events
+  ON CONFLICT (utc_day) DO NOTHING;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS second_touch_events_mark_dirty ON second_touch_events;
+
+CREATE TRIGGER second_touch_events_mark_dirty
+AFTER INSERT ON second_touch_events
+REFERENCING NEW TABLE AS new_events
+FOR EACH STATEMENT
+EXECUTE FUNCTION mark_second_touch_dirty_days();
@@ -0,0 +1,6 @@
+-- Records when helped_pairs/helped_counts were first backfilled from
+-- acknowledgements, so the app backfills once on its own after 0023.
+CREATE TABLE IF NOT EXISTS helped_counts_backfill (
+  id smallint PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+  completed_at timestamptz NOT NULL DEFAULT now()
+);
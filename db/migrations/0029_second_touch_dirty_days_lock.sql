@@ -0,0 +1,14 @@
+-- An existing dirty mark must be row-locked by the writer until it commits:
+-- with DO NOTHING an incremental recompute could claim the day and rebuild
+-- it before the writer's events were visible, losing them for good. The
+-- claim uses SKIP LOCKED, so such a day is simply left for the next run.
+CREATE OR REPLACE FUNCTION mark_second_touch_dirty_days() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  INSERT INTO second_touch_dirty_days (utc_day)
+  SELECT DISTINCT event_day_utc FROM new_events
+  ORDER BY event_day_utc
+  ON CONFLICT (utc_day) DO UPDATE SET marked_at = now();
+  RETURN NULL;
+END;
+$$;
@@ -0,0 +1,17 @@
+-- Writers go back to marking dirty days with DO NOTHING, so an existing mark
+-- never holds them on a row lock. The incremental recompute handles writers
+-- that were still in flight when it claimed a day: it re-marks every rebuilt
+-- day with rebuilt_at, and the next run rebuilds it again only if events
+-- newer than rebuilt_at minus the grace period have appeared.
+ALTER TABLE second_touch_dirty_days
+  ADD COLUMN IF NOT EXISTS rebuilt_at timestamptz;
+
+CREATE OR REPLACE FUNCTION mark_second_touch_dirty_days() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  INSERT INTO second_touch_dirty_days (utc_day)
+  SELECT DISTINCT event_day_utc FROM new_events
+  ON CONFLICT (utc_day) DO NOTHING;
+  RETURN NULL;
+END;
+$$;
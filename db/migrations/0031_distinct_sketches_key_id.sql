@@ -0,0 +1,6 @@
+-- Sketch registers depend on the hash key, so sketches made under different
+-- keys must never be unioned. key_id fingerprints the key a row was built
+-- with; rows from before this migration have no fingerprint and are rebuilt
+-- the next time their day is sketched.
+ALTER TABLE distinct_sketches
+  ADD COLUMN IF NOT EXISTS key_id text;
@@ -1,6 +1,8 @@
-from collections import Counter
+from __future__ import annotations
+
+import argparse
 import os
-from typing import Dict, Tuple
+from typing import Dict, Iterable, Optional, Tuple
 
 try:
     import psycopg
@@ -8,6 +10,17 @@ except Exception:  # pragma: no cover
     psycopg = None
 
 
+BUCKET_LABELS = ["10+", "3-10", "1-3", "0-1", "0"]
+STREAM_ITERSIZE = 5000
+
+# Buckets are closed on the upper edge (0-1 means 0 < score <= 1) while
+# width_bucket closes the lower one, so bucket the negated score against the
+# negated edges; the result indexes BUCKET_LABELS.
+_BUCKET_SQL = "width_bucket(-score, ARRAY[-10, -3, -1, 0]::real[])"
+
+Metrics = Tuple[int, Dict[str, float], Dict[str, int]]
+
+
 def _bucket(score: float) -> str:
     if score <= 0:
         return "0"
@@ -20,25 +33,73 @@ def _bucket(score: float) -> str:
     return "10+"
 
 
-def _fetch_metrics(dsn: str) -> Tuple[int, Dict[str, float], Dict[str, int]]:
+def _fetch_metrics(dsn: str) -> Metrics:
     with psycopg.connect(dsn) as conn, conn.cursor() as cur:
-        cur.execute("SELECT sender_device_id, theme_id, score FROM affinity_scores")
-        rows = cur.fetchall()
-    actors = {row[0] for row in rows}
+        cur.execute("SELECT COUNT(DISTINCT sender_device_id) FROM affinity_scores")
+        actor_count = int(cur.fetchone()[0])
+        cur.execute(
+            """
+            SELECT theme_id, SUM(score::float8)
+            FROM affinity_scores
+            GROUP BY theme_id
+            """
+        )
+        aggregate = {theme_id: float(total) for theme_id, total in cur}
+        cur.execute(
+            f"""
+            SELECT {_BUCKET_SQL} AS bucket, COUNT(*)
+            FROM affinity_scores
+            GROUP BY bucket
+            """
+        )
+        buckets = {BUCKET_LABELS[index]: int(count) for index, count in cur}
+    return actor_count, aggregate, buckets
+
+
+def _aggregate_rows(rows: Iterable[Tuple[str, str, float]]) -> Metrics:
+    # Rows arrive ordered by sender, so distinct actors are counted without
+    # holding them in memory.
+    actor_count = 0
+    last_actor: Optional[str] = None
     aggregate: Dict[str, float] = {}
-    buckets: Counter[str] = Counter()
-    for _, theme_id, score in rows:
+    buckets: Dict[str, int] = {}
+    for actor_id, theme_id, score in rows:
+        if actor_id != last_actor:
+            actor_count += 1
+            last_actor = actor_id
         aggregate[theme_id] = aggregate.get(theme_id, 0.0) + float(score)
-        buckets[_bucket(float(score))] += 1
-    return len(actors), aggregate, dict(buckets)
+        bucket = _bucket(float(score))
+        buckets[bucket] = buckets.get(bucket, 0) + 1
+    return actor_count, aggregate, buckets
+
+
+def _stream_metrics(dsn: str) -> Metrics:
+    with psycopg.connect(dsn) as conn, conn.cursor(name="affinity_metrics_scan") as cur:
+        cur.itersize = STREAM_ITERSIZE
+        cur.execute(
+            """
+            SELECT sender_device_id, theme_id, score
+            FROM affinity_scores
+            ORDER BY sender_device_id
+            """
+        )
+        return _aggregate_rows(cur)
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarise affinity scores.")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Aggregate client-side over a server-side cursor instead of in SQL.",
+    )
+    args = parser.parse_args(argv)
     dsn = os.getenv("POSTGRES_DSN")
     if not dsn or psycopg is None:
         print("affinity_metrics: POSTGRES_DSN not set or psycopg missing; skipping.")
         return 0
-    actor_count, aggregate, buckets = _fetch_metrics(dsn)
+    fetch = _stream_metrics if args.stream else _fetch_metrics
+    actor_count, aggregate, buckets = fetch(dsn)
     top_themes = sorted(aggregate.items(), key=lambda item: item[1], reverse=True)[:5]
     print(f"actors_with_affinity={actor_count}")
     print("top_themes=" + ", ".join(f"{theme}:{score:.2f}" for theme, score in top_themes))
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from app.repository import get_repository
+
+
+MAX_BACKFILL_DAYS = 90
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Rebuild sender_daily_health rollups from inbox items and acknowledgements."
+    )
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    if args.days < 1 or args.days > MAX_BACKFILL_DAYS:
+        print("sender_health_backfill status=fail reason=invalid_days")
+        return 1
+
+    repo = get_repository()
+    if not hasattr(repo, "rebuild_sender_daily_health"):
+        print("sender_health_backfill status=skipped reason=no_postgres")
+        return 0
+
+    now = datetime.now(timezone.utc)
+    start_day = (now - timedelta(days=args.days - 1)).date()
+    result = repo.rebuild_sender_daily_health(start_day, now.date())
+    print(
+        "sender_health_backfill status=ok "
+        f"days={result['days']} rows_written={result['rows_written']}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
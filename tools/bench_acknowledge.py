@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import argparse
+import time
+import uuid
+
+from app.repository import MessageRecord, get_repository
+
+MAX_ACKS = 100000
+
+
+def _seed(repo, run_id: str, acks: int) -> list[tuple[str, str]]:
+    items = []
+    for index in range(acks):
+        sender = f"ack-bench-{run_id}-sender-{index % 50}"
+        recipient = f"ack-bench-{run_id}-recipient-{index}"
+        message_id = repo.save_message(
+            MessageRecord(
+                principal_id=sender,
+                valence="positive",
+                intensity="low",
+                emotion=None,
+                theme_tags=["calm"],
+                risk_level=0,
+                sanitized_text="bench",
+                reid_risk=0.0,
+            )
+        )
+        items.append((repo.create_inbox_item(message_id, recipient, "bench"), recipient))
+    return items
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Measure positive acknowledge throughput against the configured repository."
+    )
+    parser.add_argument("--acks", type=int, default=500)
+    parser.add_argument(
+        "--allow-writes",
+        action="store_true",
+        help="Required: seeds messages, inbox items and acks into the target database.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.acks < 1 or args.acks > MAX_ACKS:
+        print("ack_bench status=fail reason=invalid_acks")
+        return 1
+    if not args.allow_writes:
+        print("ack_bench status=fail reason=writes_not_allowed")
+        return 1
+
+    repo = get_repository()
+    if not hasattr(repo, "_conn"):
+        print("ack_bench status=skipped reason=no_postgres")
+        return 0
+
+    items = _seed(repo, uuid.uuid4().hex[:8], args.acks)
+    connections = 0
+    original_conn = repo._conn
+
+    def counting_conn():
+        nonlocal connections
+        connections += 1
+        return original_conn()
+
+    repo._conn = counting_conn
+    try:
+        started = time.perf_counter()
+        for inbox_item_id, recipient in items:
+            repo.acknowledge(inbox_item_id, recipient, "thanks")
+        elapsed = time.perf_counter() - started
+    finally:
+        repo._conn = original_conn
+    acks_per_sec = args.acks / elapsed if elapsed > 0 else 0.0
+    print(
+        "ack_bench status=ok "
+        f"acks={args.acks} elapsed_ms={elapsed * 1000:.1f} "
+        f"acks_per_sec={acks_per_sec:.1f} connections_per_ack={connections / args.acks:.2f}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,97 @@
+import argparse
+import random
+import time
+from typing import Dict, List, Optional
+
+from app.matching import Candidate, _affinity_weight, _apply_affinity_bias
+from app.themes import CANONICAL_THEMES
+
+DEFAULT_SIZES = "100,1000,10000"
+
+
+def _legacy_apply_affinity_bias(
+    candidates: List[Candidate],
+    affinity_map: Dict[str, float],
+) -> List[Candidate]:
+    max_score = max(affinity_map.values(), default=0.0)
+    if max_score <= 0:
+        return candidates
+    scored = []
+    for index, candidate in enumerate(candidates):
+        weight = _affinity_weight(candidate, affinity_map, max_score)
+        scored.append((-weight, index, candidate))
+    scored.sort()
+    return [item[2] for item in scored]
+
+
+def _build_pool(size: int, rng: random.Random) -> List[Candidate]:
+    return [
+        Candidate(
+            candidate_id=f"candidate-{index}",
+            intensity="low",
+            themes=rng.sample(CANONICAL_THEMES, rng.randint(1, 3)),
+        )
+        for index in range(size)
+    ]
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best: Optional[float] = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best or 0.0
+
+
+def _parse_sizes(value: str) -> Optional[List[int]]:
+    try:
+        sizes = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        return None
+    if not sizes or any(size <= 0 for size in sizes):
+        return None
+    return sizes
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    sizes = _parse_sizes(args.sizes)
+    if sizes is None or args.repeat <= 0:
+        print("affinity_bias_bench status=fail reason=invalid_args")
+        return 1
+
+    rng = random.Random(args.seed)
+    affinity_map = {
+        theme: round(rng.uniform(0.0, 10.0), 3)
+        for theme in rng.sample(CANONICAL_THEMES, 5)
+    }
+    mismatched = 0
+    for size in sizes:
+        pool = _build_pool(size, rng)
+        identical = _apply_affinity_bias(pool, affinity_map) == _legacy_apply_affinity_bias(
+            pool, affinity_map
+        )
+        if not identical:
+            mismatched += 1
+        legacy_ms = _best_ms(lambda: _legacy_apply_affinity_bias(pool, affinity_map), args.repeat)
+        current_ms = _best_ms(lambda: _apply_affinity_bias(pool, affinity_map), args.repeat)
+        speedup = legacy_ms / current_ms if current_ms > 0 else 0.0
+        print(
+            "affinity_bias_bench "
+            f"size={size} legacy_ms={legacy_ms:.3f} current_ms={current_ms:.3f} "
+            f"speedup={speedup:.2f} identical={str(identical).lower()}"
+        )
+    status = "ok" if mismatched == 0 else "fail"
+    print(f"affinity_bias_bench status={status} sizes={len(sizes)} mismatched={mismatched}")
+    return 0 if mismatched == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from app.repository import get_repository
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Fold daily_ack_aggregates shards older than --min-age-days into shard 0."
+    )
+    parser.add_argument("--min-age-days", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.min_age_days < 0:
+        print("daily_ack_compact status=fail reason=invalid_min_age_days")
+        return 1
+
+    repo = get_repository()
+    if not hasattr(repo, "compact_daily_ack_aggregates"):
+        print("daily_ack_compact status=skipped reason=no_postgres")
+        return 0
+
+    before_day = datetime.now(timezone.utc).date() - timedelta(days=args.min_age_days - 1)
+    result = repo.compact_daily_ack_aggregates(before_day)
+    print(
+        "daily_ack_compact status=ok "
+        f"before_day={before_day.isoformat()} "
+        f"rows_folded={result['rows_folded']} rows_merged={result['rows_merged']}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
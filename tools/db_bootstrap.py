@@ -95,6 +95,20 @@ def _migration_files() -> list[str]:
         "0015_second_touch_daily_aggregates.sql",
         "0016_second_touch_events.sql",
         "0017_ghost_signal.sql",
+        "0018_sender_daily_health.sql",
+        "0019_daily_ack_peer_counts.sql",
+        "0020_similar_count_grid.sql",
+        "0021_distinct_sketches.sql",
+        "0022_mood_daily_rollups.sql",
+        "0023_helped_counts.sql",
+        "0024_second_touch_next_check.sql",
+        "0025_daily_ack_aggregate_shards.sql",
+        "0026_partitioned_event_logs.sql",
+        "0027_second_touch_dirty_days.sql",
+        "0028_helped_counts_backfill.sql",
+        "0029_second_touch_dirty_days_lock.sql",
+        "0030_second_touch_dirty_days_recheck.sql",
+        "0031_distinct_sketches_key_id.sql",
     ]
 
 
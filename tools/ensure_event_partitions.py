@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import argparse
+
+from app.config import EVENT_PARTITION_DAYS_AHEAD
+from app.repository import get_repository
+
+
+MAX_DAYS_AHEAD = 90
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Create upcoming daily partitions for the partitioned event logs."
+    )
+    parser.add_argument("--days-ahead", type=int, default=EVENT_PARTITION_DAYS_AHEAD)
+    args = parser.parse_args(argv)
+
+    if args.days_ahead < 0 or args.days_ahead > MAX_DAYS_AHEAD:
+        print("event_partitions status=fail reason=invalid_days_ahead")
+        return 1
+
+    repo = get_repository()
+    if not hasattr(repo, "ensure_event_partitions"):
+        print("event_partitions status=skipped reason=no_postgres")
+        return 0
+
+    created = repo.ensure_event_partitions(days_ahead=args.days_ahead)
+    for table, count in created.items():
+        print(f"event_partitions table={table} status=ok created={count}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
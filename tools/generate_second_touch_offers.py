@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import argparse
+
+from app.counter_sink import stop_second_touch_counters
+from app.repository import get_repository
+
+
+MAX_LIMIT = 10000
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Evaluate due second-touch pairs and create offers."
+    )
+    parser.add_argument("--limit", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    if args.limit < 1 or args.limit > MAX_LIMIT:
+        print("second_touch_offers status=fail reason=invalid_limit")
+        return 1
+
+    repo = get_repository()
+    if not hasattr(repo, "generate_second_touch_offers"):
+        print("second_touch_offers status=skipped reason=no_postgres")
+        return 0
+
+    result = repo.generate_second_touch_offers(limit=args.limit)
+    # Buffered counters must land before the process exits.
+    stop_second_touch_counters()
+    print(
+        "second_touch_offers status=ok "
+        f"evaluated={result['evaluated']} offers={result['offers']}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
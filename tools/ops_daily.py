@@ -5,7 +5,7 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 import json
 
-from app.repository import get_repository
+from app.repository import MOOD_PRINCIPALS_DIMENSION, get_repository
 from tools.matching_health_watchdog import run_watchdog
 from tools.print_daily_ack_metrics import format_daily_ack_metrics
 from tools.print_second_touch_metrics import format_second_touch_metrics
@@ -13,9 +13,13 @@ from tools.second_touch_health import format_second_touch_health, run_second_tou
 from tools.run_matching_health_tuning import main as run_tuning
 from tools.cleanup_second_touch_aggregates import main as run_cleanup_second_touch
 from tools.cleanup_second_touch_events import main as run_cleanup_second_touch_events
+from tools.compact_daily_ack_aggregates import main as run_compact_daily_ack_aggregates
+from tools.generate_second_touch_offers import main as run_generate_second_touch_offers
 from tools.recompute_second_touch_aggregates import main as run_recompute_second_touch
+from tools.rebuild_helped_counts import main as run_rebuild_helped_counts
 from tools.retention_cleanup import main as run_retention_cleanup
 from tools.retention_report import main as run_retention_report
+from tools.sketch_mood_principals import main as run_sketch_mood_principals
 
 
 @dataclass(frozen=True)
@@ -33,6 +37,11 @@ def run_metrics(days: int, theme: str | None) -> OpsResult:
         counters = repo.get_second_touch_counters(window_days)
         for line in format_second_touch_metrics(counters, window_days):
             print(line)
+    if hasattr(repo, "count_distinct_window"):
+        today = datetime.now(timezone.utc).date()
+        for window_days in (7, 30):
+            estimate = repo.count_distinct_window(MOOD_PRINCIPALS_DIMENSION, today, window_days)
+            print(f"distinct_mood_principals window_days={window_days} estimate={estimate}")
     print(_metrics_snapshot_line(aggregates, days))
     return OpsResult(exit_code=0)
 
@@ -94,12 +103,27 @@ def build_parser() -> argparse.ArgumentParser:
 
     recompute_parser = subparsers.add_parser("recompute_second_touch_aggregates")
     recompute_parser.add_argument("--days", type=int, default=7)
+    recompute_parser.add_argument("--incremental", action="store_true")
+
+    offers_parser = subparsers.add_parser("generate_second_touch_offers")
+    offers_parser.add_argument("--limit", type=int, default=500)
+
+    helped_parser = subparsers.add_parser("rebuild_helped_counts")
+    helped_parser.add_argument("--batch-size", type=int, default=1000)
 
     cleanup_events_parser = subparsers.add_parser("cleanup_second_touch_events")
     cleanup_events_parser.add_argument("--retention-days", type=int, default=None)
 
-    subparsers.add_parser("retention_cleanup")
-    subparsers.add_parser("retention_report")
+    retention_parser = subparsers.add_parser("retention_cleanup")
+    retention_parser.add_argument("--batch-size", type=int, default=5000)
+    retention_parser.add_argument("--sleep-ms", type=int, default=50)
+    retention_parser.add_argument("--max-runtime-seconds", type=float, default=900)
+    compact_parser = subparsers.add_parser("compact_daily_ack_aggregates")
+    compact_parser.add_argument("--min-age-days", type=int, default=1)
+    sketch_parser = subparsers.add_parser("sketch_mood_principals")
+    sketch_parser.add_argument("--days", type=int, default=2)
+    retention_report_parser = subparsers.add_parser("retention_report")
+    retention_report_parser.add_argument("--fast", action="store_true")
 
     subparsers.add_parser("tune")
 
@@ -133,16 +157,35 @@ def main(argv: list[str] | None = None) -> int:
             return run_cleanup_second_touch(argv)
         if args.command == "recompute_second_touch_aggregates":
             argv = ["--days", str(args.days)]
+            if args.incremental:
+                argv.append("--incremental")
             return run_recompute_second_touch(argv)
+        if args.command == "generate_second_touch_offers":
+            return run_generate_second_touch_offers(["--limit", str(args.limit)])
+        if args.command == "rebuild_helped_counts":
+            return run_rebuild_helped_counts(["--batch-size", str(args.batch_size)])
         if args.command == "cleanup_second_touch_events":
             argv = []
             if args.retention_days is not None:
                 argv = ["--retention-days", str(args.retention_days)]
             return run_cleanup_second_touch_events(argv)
         if args.command == "retention_cleanup":
-            return run_retention_cleanup()
+            return run_retention_cleanup(
+                [
+                    "--batch-size",
+                    str(args.batch_size),
+                    "--sleep-ms",
+                    str(args.sleep_ms),
+                    "--max-runtime-seconds",
+                    str(args.max_runtime_seconds),
+                ]
+            )
+        if args.command == "compact_daily_ack_aggregates":
+            return run_compact_daily_ack_aggregates(["--min-age-days", str(args.min_age_days)])
+        if args.command == "sketch_mood_principals":
+            return run_sketch_mood_principals(["--days", str(args.days)])
         if args.command == "retention_report":
-            return run_retention_report()
+            return run_retention_report(["--fast"] if args.fast else [])
         if args.command == "tune":
             return run_tune_task().exit_code
         if args.command == "smoke":
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import argparse
+
+from app.repository import get_repository
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Backfill helped_pairs and recount helped_counts from acknowledgements."
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if args.batch_size < 1:
+        print("helped_count_rebuild status=fail reason=invalid_batch_size")
+        return 1
+
+    repo = get_repository()
+    if not hasattr(repo, "rebuild_helped_counts"):
+        print("helped_count_rebuild status=skipped reason=no_postgres")
+        return 0
+
+    result = repo.rebuild_helped_counts(batch_size=args.batch_size)
+    if result["status"] != "ok":
+        print(f"helped_count_rebuild status={result['status']} reason={result['reason']}")
+        return 0
+    print(
+        "helped_count_rebuild status=ok "
+        f"pairs={result['pairs']} senders={result['senders']}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
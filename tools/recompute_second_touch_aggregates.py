@@ -31,6 +31,11 @@ def main(argv: list[str] | None = None) -> int:
         description="Recompute second_touch daily aggregates for last N days."
     )
     parser.add_argument("--days", type=int, default=7)
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only recompute days marked dirty by new events since the last run.",
+    )
     args = parser.parse_args(argv)
 
     if args.days < 1 or args.days > MAX_RECOMPUTE_DAYS:
@@ -42,6 +47,21 @@ def main(argv: list[str] | None = None) -> int:
     end_day = now.date()
 
     repo = get_repository()
+    if args.incremental and hasattr(repo, "recompute_dirty_second_touch_days"):
+        result = repo.recompute_dirty_second_touch_days(limit=MAX_RECOMPUTE_DAYS)
+        parts = [
+            "second_touch_recompute",
+            "mode=incremental",
+            f"dirty_days={int(result.get('dirty_days', 0))}",
+            f"days_written={int(result.get('days_written', 0))}",
+            f"remaining={int(result.get('remaining', 0))}",
+            f"recompute_partial={str(bool(result.get('recompute_partial', False))).lower()}",
+        ]
+        if result.get("reason"):
+            parts.append(f"reason={result['reason']}")
+        print(" ".join(parts))
+        return 0
+
     result = repo.recompute_second_touch_daily_aggregates(start_day, end_day)
     _print_line(
         args.days,
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import argparse
+
+from app.config import SIMILAR_WINDOW_DAYS
+from app.repository import get_repository
+
+
+MAX_WINDOW_DAYS = 90
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Rebuild per (theme, valence) similar-count cells over the rolling window."
+    )
+    parser.add_argument("--window-days", type=int, default=SIMILAR_WINDOW_DAYS)
+    args = parser.parse_args(argv)
+
+    if args.window_days < 1 or args.window_days > MAX_WINDOW_DAYS:
+        print("similar_count_grid status=fail reason=invalid_window_days")
+        return 1
+
+    repo = get_repository()
+    if not hasattr(repo, "refresh_similar_count_grid"):
+        print("similar_count_grid status=skipped reason=no_postgres")
+        return 0
+
+    result = repo.refresh_similar_count_grid(args.window_days)
+    if result.get("skipped"):
+        print("similar_count_grid status=skipped reason=refresh_in_progress")
+        return 0
+    print(
+        "similar_count_grid status=ok "
+        f"window_days={result['window_days']} cells={result['cells']}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,16 +1,100 @@
 from __future__ import annotations
 
+import argparse
 from datetime import datetime, timezone
+import time
 
 from app.repository import get_repository
+from tools.cli_contract import add_common_flags, emit_output, help_epilog
 from tools.retention_policy import get_retention_days
 
 
-def main() -> int:
+PROGRESS_EVERY_BATCHES = 10
+_ALLOWLIST = {
+    "table",
+    "status",
+    "reason",
+    "deleted",
+    "cutoff_days",
+    "batches",
+    "created",
+    "groups",
+    "deleted_total",
+}
+_TABLE_ORDER = ["table", "status", "reason", "deleted", "cutoff_days", "batches"]
+_SUMMARY_ORDER = ["status", "reason", "groups", "deleted_total"]
+
+
+def _emit(fields: dict[str, object], as_json: bool, order: list[str]) -> None:
+    emit_output("retention_cleanup", fields, _ALLOWLIST, as_json, order=order)
+
+
+def _chunked_cleanup(
+    repo, name: str, args, retention_days: int, now, deadline, as_json: bool
+) -> tuple[int, int, bool]:
+    deleted = 0
+    if hasattr(repo, "drop_expired_partitions"):
+        deleted += int(repo.drop_expired_partitions(name, retention_days, now))
+    batches = 0
+    while True:
+        if deadline is not None and time.monotonic() >= deadline:
+            return deleted, batches, False
+        removed = int(repo.delete_expired_batch(name, retention_days, now, args.batch_size))
+        deleted += removed
+        batches += 1
+        if removed < args.batch_size:
+            return deleted, batches, True
+        if batches % PROGRESS_EVERY_BATCHES == 0:
+            _emit(
+                {
+                    "table": name,
+                    "status": "in_progress",
+                    "deleted": deleted,
+                    "cutoff_days": retention_days,
+                    "batches": batches,
+                },
+                as_json,
+                _TABLE_ORDER,
+            )
+        if args.sleep_ms:
+            time.sleep(args.sleep_ms / 1000.0)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Apply the retention policy to event logs and daily aggregates.",
+        epilog=help_epilog("retention_cleanup", ["0 ok/partial", "1 fail"]),
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=0,
+        help="Delete at most this many rows per transaction (0 = one statement per table).",
+    )
+    parser.add_argument("--sleep-ms", type=int, default=0, help="Pause between chunks.")
+    parser.add_argument(
+        "--max-runtime-seconds",
+        type=float,
+        default=0,
+        help="Stop chunking after this long; a re-run resumes (0 = no limit).",
+    )
+    add_common_flags(parser)
+    args = parser.parse_args(argv)
+
+    if args.batch_size < 0 or args.sleep_ms < 0 or args.max_runtime_seconds < 0:
+        _emit({"status": "fail", "reason": "invalid_args"}, args.json, _SUMMARY_ORDER)
+        return 1
+
     retention = get_retention_days()
     repo = get_repository()
     now = datetime.now(timezone.utc)
+    chunked = args.batch_size > 0 and hasattr(repo, "delete_expired_batch")
+    deadline = (
+        time.monotonic() + args.max_runtime_seconds if args.max_runtime_seconds else None
+    )
     deleted_total = 0
+    complete = True
     groups = [
         ("security_events", lambda: repo.prune_security_events(now, retention["security_events"])),
         (
@@ -29,19 +113,48 @@ def main() -> int:
         ),
     ]
     try:
+        if hasattr(repo, "ensure_event_partitions"):
+            # Retention drops expired daily partitions; keep the next days ready.
+            created = repo.ensure_event_partitions(now=now)
+            _emit(
+                {"table": "partitions", "status": "ok", "created": sum(created.values())},
+                args.json,
+                ["table", "status", "created"],
+            )
         for name, cleanup in groups:
-            deleted = int(cleanup())
+            batches = None
+            if chunked:
+                deleted, batches, finished = _chunked_cleanup(
+                    repo, name, args, retention[name], now, deadline, args.json
+                )
+            else:
+                deleted, finished = int(cleanup()), True
             deleted_total += deleted
-            print(
-                "retention_cleanup "
-                f"table={name} status=ok deleted={deleted} cutoff_days={retention[name]}"
+            complete = complete and finished
+            _emit(
+                {
+                    "table": name,
+                    "status": "ok" if finished else "partial",
+                    "reason": None if finished else "max_runtime",
+                    "deleted": deleted,
+                    "cutoff_days": retention[name],
+                    "batches": batches,
+                },
+                args.json,
+                _TABLE_ORDER,
             )
     except Exception:
-        print("retention_cleanup status=fail reason=exception")
+        _emit({"status": "fail", "reason": "exception"}, args.json, _SUMMARY_ORDER)
         return 1
-    print(
-        "retention_cleanup "
-        f"status=ok groups={len(groups)} deleted_total={deleted_total}"
+    _emit(
+        {
+            "status": "ok" if complete else "partial",
+            "reason": None if complete else "max_runtime",
+            "groups": len(groups),
+            "deleted_total": deleted_total,
+        },
+        args.json,
+        _SUMMARY_ORDER,
     )
     return 0
 
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import argparse
 from datetime import datetime, timezone
 import json
 import os
@@ -8,7 +9,15 @@ from app.repository import get_repository
 from tools.retention_policy import get_retention_days
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Report rows past their retention cutoff.")
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Estimate totals from planner statistics; expired counts stay exact.",
+    )
+    args = parser.parse_args(argv)
+
     if not os.getenv("POSTGRES_DSN"):
         payload = {
             "status": "not_configured",
@@ -22,7 +31,7 @@ def main() -> int:
     repo = get_repository()
     now = datetime.now(timezone.utc)
     try:
-        report = repo.get_retention_report(now, retention)
+        report = repo.get_retention_report(now, retention, fast=args.fast)
     except Exception:
         payload = {
             "status": "fail",
@@ -37,6 +46,7 @@ def main() -> int:
         "status": "fail" if drift else "ok",
         "reason": "ttl_drift" if drift else "none",
         "ts_utc": now.isoformat(),
+        "mode": "fast" if args.fast else "exact",
         "groups": report,
     }
     print(f"retention_report {json.dumps(payload, separators=(',', ':'), sort_keys=True)}")
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from app.repository import get_repository
+
+
+MAX_DAYS = 30
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Fold distinct mood principals into the daily HyperLogLog sketches."
+    )
+    parser.add_argument("--days", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    if args.days < 1 or args.days > MAX_DAYS:
+        print("mood_principal_sketch status=fail reason=invalid_days")
+        return 1
+
+    repo = get_repository()
+    if not hasattr(repo, "sketch_mood_principals"):
+        print("mood_principal_sketch status=skipped reason=unsupported")
+        return 0
+
+    # Earlier days are re-sketched so events that landed late are folded in.
+    today = datetime.now(timezone.utc).date()
+    principals = 0
+    for offset in range(args.days - 1, -1, -1):
+        principals += repo.sketch_mood_principals(today - timedelta(days=offset))
+    print(f"mood_principal_sketch status=ok days={args.days} principals={principals}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from app.repository import get_repository
+
+
+MAX_VERIFY_DAYS = 90
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare sender_daily_health rollups against the raw inbox/ack join."
+    )
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    if args.days < 1 or args.days > MAX_VERIFY_DAYS:
+        print("sender_health_verify status=fail reason=invalid_days")
+        return 1
+
+    repo = get_repository()
+    if not hasattr(repo, "verify_sender_daily_health"):
+        print("sender_health_verify status=skipped reason=no_postgres")
+        return 0
+
+    now = datetime.now(timezone.utc)
+    start_day = (now - timedelta(days=args.days - 1)).date()
+    result = repo.verify_sender_daily_health(start_day, now.date())
+    status = "ok" if result["rows_mismatched"] == 0 else "fail"
+    print(
+        f"sender_health_verify status={status} days={result['days']} "
+        f"rows_checked={result['rows_checked']} rows_mismatched={result['rows_mismatched']}"
+    )
+    return 0 if status == "ok" else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
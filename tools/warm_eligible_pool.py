@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+
+from app.repository import get_repository
+
+
+def main() -> int:
+    repo = get_repository()
+    if not hasattr(repo, "warm_eligible_pool"):
+        print("eligible_pool_warm status=skipped reason=no_postgres loaded=0")
+        return 0
+    result = repo.warm_eligible_pool(datetime.now(timezone.utc))
+    parts = [
+        "eligible_pool_warm",
+        f"status={result['status']}",
+        f"loaded={result.get('loaded', 0)}",
+    ]
+    if result.get("reason"):
+        parts.append(f"reason={result['reason']}")
+    if "crisis" in result:
+        parts.append(f"crisis={result['crisis']}")
+    print(" ".join(parts))
+    return 1 if result["status"] == "fail" else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())